@@ -0,0 +1,56 @@
+# backend/app/api/dependencies.py
+from typing import Optional
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel
+from app.core.tokens import TokenInvalideError, decoder_token
+from app.models.user import UserRole
+
+
+# auto_error=False : l'absence d'en-tête donne une 401 (et non la 403 par défaut de HTTPBearer)
+bearer = HTTPBearer(auto_error=False)
+
+
+class UtilisateurCourant(BaseModel):
+    """Identité portée par le jeton d'accès"""
+    id: int
+    role: UserRole
+
+
+def _non_authentifie(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> UtilisateurCourant:
+    """
+    Utilisateur authentifié par le jeton d'accès (en-tête Authorization: Bearer).
+
+    Vérification en mémoire (signature HMAC et expiration) : aucune requête
+    SQL. `async def` pour ne pas passer par le threadpool.
+    """
+    if credentials is None:
+        raise _non_authentifie("Authentification requise")
+    try:
+        claims = decoder_token(credentials.credentials)
+    except TokenInvalideError:
+        raise _non_authentifie("Jeton invalide ou expiré")
+    return UtilisateurCourant(id=int(claims["sub"]), role=claims["role"])
+
+
+def peut_acceder(utilisateur: UtilisateurCourant, user_id: int) -> bool:
+    """Un client n'accède qu'à ses propres données, un administrateur à toutes"""
+    return utilisateur.id == user_id or utilisateur.role == UserRole.ADMIN
+
+
+async def utilisateur_du_chemin(user_id: int, utilisateur: UtilisateurCourant = Depends(get_current_user)) -> UtilisateurCourant:
+    """Routes /user/{user_id} : le jeton doit appartenir à cet utilisateur"""
+    if not peut_acceder(utilisateur, user_id):
+        raise HTTPException(status_code=403, detail="Accès refusé")
+    return utilisateur
+
+
+async def administrateur(utilisateur: UtilisateurCourant = Depends(get_current_user)) -> UtilisateurCourant:
+    """Routes d'administration (diagnostic, réglages d'exploitation) : rôle administrateur requis"""
+    if utilisateur.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Accès réservé aux administrateurs")
+    return utilisateur
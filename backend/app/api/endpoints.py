@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from typing import List
-from app.db.session import get_session
+from fastapi import APIRouter, Depends, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
+from app.api.pagination import LIMITE_DEFAUT, LIMITE_MAX, lister_table, page_de_liste
+from app.db.session import get_async_read_session
 from app.models.offer import Offer
+from app.services.catalog_cache_service import catalog_cache
 
 router = APIRouter()
 
 # Cette route répondra sur http://localhost:8000/offers
-@router.get("/offers", response_model=List[Offer])
-def read_offers(session: Session = Depends(get_session)):
+# Pas de response_model : avec fields= les objets renvoyés sont partiels
+@router.get("/offers")
+async def read_offers(
+    response: Response,
+    limit: int = Query(default=LIMITE_DEFAUT, ge=1, le=LIMITE_MAX),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_read_session)
+):
     """
     Récupère la liste de toutes les offres de billets.
+    
+    Paginée par id avec `limit` (50 par défaut) et `cursor` (curseur suivant
+    dans X-Next-Cursor), réduite aux colonnes de `fields=` si précisé.
     """
-    offers = session.exec(select(Offer)).all()
-    return offers
+    if fields is None:
+        return page_de_liste(response, await session.run_sync(catalog_cache.get_offers), cursor, limit)
+    
+    return await session.run_sync(lister_table, response, Offer, fields, cursor, limit)
 
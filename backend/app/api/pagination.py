@@ -0,0 +1,103 @@
+# backend/app/api/pagination.py
+import base64
+import json
+from typing import Iterable, List, Optional, Sequence
+from fastapi import HTTPException, Response
+# select de SQLAlchemy : des lignes même pour une seule colonne (celui de SQLModel rendrait des scalaires)
+from sqlalchemy import select
+from sqlmodel import Session
+
+
+# En-tête portant le curseur de la page suivante (absent sur la dernière page)
+EN_TETE_CURSEUR = "X-Next-Cursor"
+
+# Taille de page des listes paginées quand `limit` n'est pas précisé
+LIMITE_DEFAUT = 50
+
+# Taille de page maximale acceptée par les listes paginées
+LIMITE_MAX = 200
+
+
+def parser_champs(fields: Optional[str], autorises: Sequence[str], obligatoires: Sequence[str] = ("id",)) -> List[str]:
+    """
+    Liste des champs demandés par `fields=a,b,c`, dans l'ordre de `autorises`.
+
+    Sans paramètre, tous les champs sont renvoyés. Les champs `obligatoires`
+    (la clé du curseur) sont toujours inclus. Un champ inconnu donne une 400.
+    """
+    if not fields:
+        return list(autorises)
+
+    demandes = {champ.strip() for champ in fields.split(",") if champ.strip()}
+    inconnus = demandes - set(autorises)
+    if inconnus:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Champs inconnus: {', '.join(sorted(inconnus))}. Champs disponibles: {', '.join(autorises)}"
+        )
+    demandes.update(obligatoires)
+    return [champ for champ in autorises if champ in demandes]
+
+
+def encoder_curseur(*valeurs) -> str:
+    """Curseur opaque contenant la clé de tri de la dernière ligne renvoyée"""
+    return base64.urlsafe_b64encode(json.dumps(list(valeurs)).encode()).decode().rstrip("=")
+
+
+def decoder_curseur(cursor: Optional[str], nb_valeurs: int = 1) -> Optional[list]:
+    """Clé de tri contenue dans un curseur (None si pas de curseur, 400 s'il est invalide)"""
+    if not cursor:
+        return None
+    try:
+        valeurs = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(valeurs, list) or len(valeurs) != nb_valeurs or not all(isinstance(v, int) for v in valeurs):
+            raise ValueError(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    return valeurs
+
+
+def page_suivante(response: Response, lignes: Sequence, limit: int, cle) -> Iterable:
+    """
+    Coupe les `limit + 1` lignes lues à `limit` et pose l'en-tête du curseur suivant.
+
+    Les requêtes paginées lisent une ligne de plus que demandé : si elle
+    existe, il reste une page, et son curseur est la clé (`cle(ligne)`) de
+    la dernière ligne renvoyée.
+    """
+    if len(lignes) <= limit:
+        return lignes
+    lignes = lignes[:limit]
+    response.headers[EN_TETE_CURSEUR] = encoder_curseur(*cle(lignes[-1]))
+    return lignes
+
+
+def page_de_liste(response: Response, elements: Sequence[dict], cursor: Optional[str], limit: int) -> List[dict]:
+    """Même pagination par id que `lister_table`, sur une liste déjà en mémoire (cache du catalogue)"""
+    apres = decoder_curseur(cursor)
+    lignes = sorted((e for e in elements if apres is None or e["id"] > apres[0]), key=lambda e: e["id"])
+    return page_suivante(response, lignes[:limit + 1], limit, lambda e: (e["id"],))
+
+
+def lister_table(
+    session: Session,
+    response: Response,
+    modele,
+    fields: Optional[str],
+    cursor: Optional[str],
+    limit: int,
+) -> List[dict]:
+    """
+    Liste paginée par id d'une table du catalogue, limitée aux colonnes de `fields`.
+
+    Requête : SELECT <colonnes> WHERE id > <curseur> ORDER BY id LIMIT n+1,
+    servie directement par l'index de la clé primaire.
+    """
+    champs = parser_champs(fields, [colonne.name for colonne in modele.__table__.columns])
+    apres = decoder_curseur(cursor)
+
+    statement = select(*[getattr(modele, champ) for champ in champs]).order_by(modele.id)
+    if apres is not None:
+        statement = statement.where(modele.id > apres[0])
+    rows = page_suivante(response, session.exec(statement.limit(limit + 1)).all(), limit, lambda row: (row.id,))
+    return [dict(row._mapping) for row in rows]
@@ -1,163 +1,260 @@
-from fastapi import APIRouter
-from app.db.session import Session, engine
-from app.models.sport import Sport, Epreuve
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import (
+    async_engine,
+    async_read_engine,
+    engine,
+    get_async_session,
+    read_engine,
+    stats_pool,
+)
+from app.api.dependencies import administrateur
+from app.db.requetes_lentes import journal_requetes_lentes
+from app.models.sport import Sport, Epreuve, EpreuveShard
 from app.models.offer import Offer
+from app.models.panier import SeatHold
+from app.services.inventory_service import InventoryService
+from app.services.catalog_cache_service import catalog_cache
+from app.services.invalidation_bus import InvalidationBus
+from app.services.pdf_cache_service import pdf_cache
 from sqlmodel import select, delete
-from datetime import date, time
+from datetime import date
 
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 
 @router.get("/reset_data")
-def reset_data():
+async def reset_data(session: AsyncSession = Depends(get_async_session)):
     """Supprime toutes les données (sports, épreuves, offres)"""
     
-    with Session(engine) as session:
-        # Supprimer dans l'ordre (épreuves d'abord à cause des clés étrangères)
-        session.exec(delete(Epreuve))
-        session.exec(delete(Sport))
-        session.exec(delete(Offer))
-        
-        session.commit()
-        
-        return {
-            "status": "success", 
-            "message": "Toutes les données ont été supprimées. Appelez /api/admin/init_data pour réinitialiser."
-        }
+    # Supprimer dans l'ordre (blocages, fragments puis épreuves à cause des clés étrangères)
+    await session.exec(delete(SeatHold))
+    await session.exec(delete(EpreuveShard))
+    await session.exec(delete(Epreuve))
+    await session.exec(delete(Sport))
+    await session.exec(delete(Offer))
+    
+    await session.run_sync(InvalidationBus.catalogue_modifie)
+    await session.commit()
+    
+    return {
+        "status": "success", 
+        "message": "Toutes les données ont été supprimées. Appelez /api/admin/init_data pour réinitialiser."
+    }
 
 
 @router.get("/init_data") 
-def initialize_data():
+async def initialize_data(session: AsyncSession = Depends(get_async_session)):
     """Initialiser les données de base (offres, sports et épreuves)"""
     
-    with Session(engine) as session:
-        # Vérifier si des sports existent déjà
-        existing_sports = session.exec(select(Sport)).first()
-        if existing_sports:
-            sports_count = len(session.exec(select(Sport)).all())
-            return {
-                "status": "warning", 
-                "message": "Données déjà présentes",
-                "sports_count": sports_count
-            }
-        
-        # 1. Créer les offres
-        offers = [
-            Offer(nom_offre="Solo", capacite_personne=1, prix=50.0, description="Billet individuel"),
-            Offer(nom_offre="Duo", capacite_personne=2, prix=90.0, description="Billet pour 2"),
-            Offer(nom_offre="Famille", capacite_personne=4, prix=150.0, description="Billet famille")
-        ]
-        for offer in offers:
-            session.add(offer)
-        session.commit()
+    # Vérifier si des sports existent déjà
+    existing_sports = (await session.exec(select(Sport))).first()
+    if existing_sports:
+        sports_count = len((await session.exec(select(Sport))).all())
+        return {
+            "status": "warning", 
+            "message": "Données déjà présentes",
+            "sports_count": sports_count
+        }
+    
+    # 1. Créer les offres
+    offers = [
+        Offer(nom_offre="Solo", capacite_personne=1, prix=50.0, description="Billet individuel"),
+        Offer(nom_offre="Duo", capacite_personne=2, prix=90.0, description="Billet pour 2"),
+        Offer(nom_offre="Famille", capacite_personne=4, prix=150.0, description="Billet famille")
+    ]
+    for offer in offers:
+        session.add(offer)
+    
+    # 2. Créer les 6 sports avec épreuves
+    sports_data = [
+        {
+            "nom": "Athlétisme",
+            "slug": "athletisme",
+            "description": "Course, saut, lancer",
+            "lieu": "Stade de France",
+            "dates_competition": "2-11 Août 2024",
+            "histoire": "L'athlétisme est présent aux Jeux Olympiques depuis leur création en 1896.",
+            "image_url": "/images/Athletisme.jpg"
+        },
+        {
+            "nom": "Natation",
+            "slug": "natation",
+            "description": "Nage libre, papillon, dos, brasse",
+            "lieu": "Paris La Défense Arena",
+            "dates_competition": "27 Juillet - 4 Août 2024",
+            "histoire": "Sport olympique depuis 1896, la natation est l'une des disciplines phares des JO.",
+            "image_url": "/images/Natation.jpg"
+        },
+        {
+            "nom": "BMX",
+            "slug": "bmx",
+            "description": "BMX freestyle et racing",
+            "lieu": "Saint-Quentin-en-Yvelines",
+            "dates_competition": "29 Juillet - 2 Août 2024",
+            "histoire": "Le BMX est une discipline olympique depuis 2008.",
+            "image_url": "/images/Bmx.jpg"
+        },
+        {
+            "nom": "Boxe",
+            "slug": "boxe",
+            "description": "Combat, puissance et technique",
+            "lieu": "Paris Arena Nord",
+            "dates_competition": "27 Juillet - 10 Août 2024",
+            "histoire": "La boxe est présente aux JO depuis 1904.",
+            "image_url": "/images/Boxe.jpg"
+        },
+        {
+            "nom": "Gymnastique",
+            "slug": "gymnastique",
+            "description": "Grâce, force et précision artistique",
+            "lieu": "Bercy Arena",
+            "dates_competition": "27 Juillet - 5 Août 2024",
+            "histoire": "La gymnastique artistique est au programme olympique depuis 1896.",
+            "image_url": "/images/Gymnastique.jpg"
+        },
+        {
+            "nom": "Escalade",
+            "slug": "escalade",
+            "description": "Défiez la gravité avec l'escalade sportive",
+            "lieu": "Le Bourget",
+            "dates_competition": "5-10 Août 2024",
+            "histoire": "L'escalade sportive a fait son entrée olympique à Tokyo 2020.",
+            "image_url": "/images/Escalade.jpg"
+        }
+    ]
+    
+    sports_count = 0
+    epreuves_count = 0
+    
+    for sport_data in sports_data:
+        # Créer le sport
+        sport = Sport(**sport_data)
+        session.add(sport)
+        # flush (et non commit) : l'id du sport sans clore la transaction
+        await session.flush()
+        sports_count += 1
         
-        # 2. Créer les 6 sports avec épreuves
-        sports_data = [
-            {
-                "nom": "Athlétisme",
-                "slug": "athletisme",
-                "description": "Course, saut, lancer",
-                "lieu": "Stade de France",
-                "dates_competition": "2-11 Août 2024",
-                "histoire": "L'athlétisme est présent aux Jeux Olympiques depuis leur création en 1896.",
-                "image_url": "/images/Athletisme.jpg"
-            },
-            {
-                "nom": "Natation",
-                "slug": "natation",
-                "description": "Nage libre, papillon, dos, brasse",
-                "lieu": "Paris La Défense Arena",
-                "dates_competition": "27 Juillet - 4 Août 2024",
-                "histoire": "Sport olympique depuis 1896, la natation est l'une des disciplines phares des JO.",
-                "image_url": "/images/Natation.jpg"
-            },
-            {
-                "nom": "BMX",
-                "slug": "bmx",
-                "description": "BMX freestyle et racing",
-                "lieu": "Saint-Quentin-en-Yvelines",
-                "dates_competition": "29 Juillet - 2 Août 2024",
-                "histoire": "Le BMX est une discipline olympique depuis 2008.",
-                "image_url": "/images/Bmx.jpg"
-            },
-            {
-                "nom": "Boxe",
-                "slug": "boxe",
-                "description": "Combat, puissance et technique",
-                "lieu": "Paris Arena Nord",
-                "dates_competition": "27 Juillet - 10 Août 2024",
-                "histoire": "La boxe est présente aux JO depuis 1904.",
-                "image_url": "/images/Boxe.jpg"
-            },
-            {
-                "nom": "Gymnastique",
-                "slug": "gymnastique",
-                "description": "Grâce, force et précision artistique",
-                "lieu": "Bercy Arena",
-                "dates_competition": "27 Juillet - 5 Août 2024",
-                "histoire": "La gymnastique artistique est au programme olympique depuis 1896.",
-                "image_url": "/images/Gymnastique.jpg"
-            },
-            {
-                "nom": "Escalade",
-                "slug": "escalade",
-                "description": "Défiez la gravité avec l'escalade sportive",
-                "lieu": "Le Bourget",
-                "dates_competition": "5-10 Août 2024",
-                "histoire": "L'escalade sportive a fait son entrée olympique à Tokyo 2020.",
-                "image_url": "/images/Escalade.jpg"
-            }
+        # Créer 3 épreuves pour chaque sport
+        epreuves = [
+            Epreuve(
+                nom_epreuve=f"{sport.nom} - Finale Hommes",
+                sport_id=sport.id,
+                date_epreuve=date(2024, 8, 5),
+                heure="20:00",
+                places_disponibles=5000
+            ),
+            Epreuve(
+                nom_epreuve=f"{sport.nom} - Finale Femmes",
+                sport_id=sport.id,
+                date_epreuve=date(2024, 8, 6),
+                heure="19:30",
+                places_disponibles=5000
+            ),
+            Epreuve(
+                nom_epreuve=f"{sport.nom} - Demi-finale",
+                sport_id=sport.id,
+                date_epreuve=date(2024, 8, 4),
+                heure="18:00",
+                places_disponibles=3000
+            )
         ]
         
-        sports_count = 0
-        epreuves_count = 0
-        
-        for sport_data in sports_data:
-            # Créer le sport
-            sport = Sport(**sport_data)
-            session.add(sport)
-            session.commit()
-            session.refresh(sport)
-            sports_count += 1
-            
-            # Créer 3 épreuves pour chaque sport
-            epreuves = [
-                Epreuve(
-                    nom_epreuve=f"{sport.nom} - Finale Hommes",
-                    sport_id=sport.id,
-                    date_epreuve=date(2024, 8, 5),
-                    heure=time(20, 0),
-                    places_disponibles=5000
-                ),
-                Epreuve(
-                    nom_epreuve=f"{sport.nom} - Finale Femmes",
-                    sport_id=sport.id,
-                    date_epreuve=date(2024, 8, 6),
-                    heure=time(19, 30),
-                    places_disponibles=5000
-                ),
-                Epreuve(
-                    nom_epreuve=f"{sport.nom} - Demi-finale",
-                    sport_id=sport.id,
-                    date_epreuve=date(2024, 8, 4),
-                    heure=time(18, 0),
-                    places_disponibles=3000
-                )
-            ]
-            
-            for epreuve in epreuves:
-                session.add(epreuve)
-                epreuves_count += 1
-            
-            session.commit()
-        
-        return {
-            "status": "success",
-            "message": "Base de données initialisée avec succès !",
-            "offers_created": 3,
-            "sports_created": sports_count,
-            "epreuves_created": epreuves_count
-        }
+        for epreuve in epreuves:
+            session.add(epreuve)
+            epreuves_count += 1
+    
+    # Une seule transaction : pas de catalogue à moitié initialisé en cas d'erreur
+    await session.run_sync(InvalidationBus.catalogue_modifie)
+    await session.commit()
+    
+    return {
+        "status": "success",
+        "message": "Base de données initialisée avec succès !",
+        "offers_created": 3,
+        "sports_created": sports_count,
+        "epreuves_created": epreuves_count
+    }
+
+
+@router.post("/epreuves/{epreuve_id}/shards", dependencies=[Depends(administrateur)])
+async def configurer_shards(
+    epreuve_id: int,
+    nb_shards: int = Query(..., ge=1, le=64),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Fragmenter le compteur de places d'une épreuve très demandée (1 = compteur unique)"""
+    
+    repartition = await session.run_sync(InventoryService.configurer_shards, epreuve_id, nb_shards)
+    if repartition is None:
+        raise HTTPException(status_code=404, detail="Épreuve non trouvée")
+    # nb_shards fait partie des données statiques de l'épreuve
+    await session.run_sync(InvalidationBus.catalogue_modifie)
+    await session.commit()
+    
+    return {
+        "status": "success",
+        "epreuve_id": epreuve_id,
+        "nb_shards": nb_shards,
+        "places_disponibles": sum(repartition.values()),
+        "repartition": repartition
+    }
+
+
+@router.post("/epreuves/{epreuve_id}/shards/reequilibrer", dependencies=[Depends(administrateur)])
+async def reequilibrer_shards(epreuve_id: int, session: AsyncSession = Depends(get_async_session)):
+    """Répartir à nouveau équitablement les places entre les fragments d'une épreuve"""
+    
+    epreuve = await session.get(Epreuve, epreuve_id)
+    if not epreuve:
+        raise HTTPException(status_code=404, detail="Épreuve non trouvée")
+    
+    repartition = await session.run_sync(InventoryService.configurer_shards, epreuve_id, epreuve.nb_shards)
+    await session.run_sync(InvalidationBus.places_modifiees, {epreuve_id: sum(repartition.values())})
+    await session.commit()
+    
+    return {
+        "status": "success",
+        "epreuve_id": epreuve_id,
+        "nb_shards": len(repartition),
+        "places_disponibles": sum(repartition.values()),
+        "repartition": repartition
+    }
+
+
+@router.get("/cache/stats", dependencies=[Depends(administrateur)])
+async def cache_stats():
+    """Taux de succès des caches du processus (catalogue et PDF)"""
+    return {
+        "catalogue": catalog_cache.stats(),
+        "pdf": pdf_cache.stats()
+    }
+
+
+@router.get("/db/pool", dependencies=[Depends(administrateur)])
+async def db_pool_stats():
+    """Statistiques des pools de connexions de ce processus (connexions empruntées, débordement, attente)"""
+    return {
+        "principal": stats_pool(engine),
+        "replique": stats_pool(read_engine) if read_engine is not engine else None,
+        # Pools du driver asyncio, utilisés par les routes quand DB_ASYNC=1
+        "async_principal": stats_pool(async_engine) if async_engine is not None else None,
+        "async_replique": stats_pool(async_read_engine) if async_read_engine is not async_engine else None,
+    }
+
+
+@router.get("/db/requetes-lentes", dependencies=[Depends(administrateur)])
+async def requetes_lentes(limite: int = Query(50, ge=1, le=1000)):
+    """Requêtes SQL plus longues que DB_SLOW_QUERY_MS de ce processus, les plus récentes d'abord, avec leur plan"""
+    return {
+        **journal_requetes_lentes.stats(),
+        "requetes": journal_requetes_lentes.lister(limite),
+    }
 
 
+@router.delete("/db/requetes-lentes", dependencies=[Depends(administrateur)])
+async def vider_requetes_lentes():
+    """Vider le journal des requêtes lentes (et les plans en cache) de ce processus"""
+    journal_requetes_lentes.vider()
+    return {"status": "success", "message": "Journal des requêtes lentes vidé"}
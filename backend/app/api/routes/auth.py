@@ -1,13 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from app.db.session import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_session
 from app.models.user import User, UserRole
-from app.core.security import verify_password
-import bcrypt
+from app.core.security import password_hash_pool, needs_rehash, HachageSatureError
+from app.core.tokens import TYPE_RAFRAICHISSEMENT, TokenInvalideError, creer_tokens, decoder_token
 import secrets
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
+
+def _trop_de_connexions() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Trop de connexions en cours, veuillez réessayer",
+        headers={"Retry-After": "1"}
+    )
+
 class UserCreate:
     def __init__(self, email: str, nom: str, prenom: str, password: str):
         self.email = email
@@ -21,17 +30,20 @@ class UserLogin:
         self.password = password
 
 @router.post("/register")
-def register(email: str, nom: str, prenom: str, password: str, session: Session = Depends(get_session)):
+async def register(email: str, nom: str, prenom: str, password: str, session: AsyncSession = Depends(get_async_session)):
     """Inscription d'un nouvel utilisateur"""
     # Vérifier si l'email existe
     statement = select(User).where(User.email == email)
-    existing_user = session.exec(statement).first()
+    existing_user = (await session.exec(statement)).first()
     
     if existing_user:
         raise HTTPException(status_code=400, detail="Email déjà enregistré")
     
-    # Hasher le mot de passe
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    # Hasher le mot de passe (calcul coûteux : pool bcrypt dédié et borné)
+    try:
+        hashed_password = await password_hash_pool.hacher(password)
+    except HachageSatureError:
+        raise _trop_de_connexions()
     
     # Générer une clé de compte unique
     clef_compte = secrets.token_urlsafe(32)
@@ -41,14 +53,14 @@ def register(email: str, nom: str, prenom: str, password: str, session: Session
         email=email,
         nom=nom,
         prenom=prenom,
-        hashed_password=hashed_password.decode('utf-8'),
+        hashed_password=hashed_password,
         clef_compte=clef_compte,
         role=UserRole.CLIENT
     )
     
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
     
     return {
         "id": new_user.id,  # ← Déjà correct
@@ -60,28 +72,57 @@ def register(email: str, nom: str, prenom: str, password: str, session: Session
     }
 
 @router.post("/login")
-def login(email: str, password: str, session: Session = Depends(get_session)):
+async def login(email: str, password: str, session: AsyncSession = Depends(get_async_session)):
     """Connexion d'un utilisateur"""
     # Chercher l'utilisateur
     statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     
     if not user:
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     
     # Vérifier le mot de passe
-    if not bcrypt.checkpw(password.encode('utf-8'), user.hashed_password.encode('utf-8')):
+    try:
+        mot_de_passe_valide = await password_hash_pool.verifier(password, user.hashed_password)
+    except HachageSatureError:
+        raise _trop_de_connexions()
+    if not mot_de_passe_valide:
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Compte désactivé")
     
-    # Sauvegarder l'utilisateur dans la session
+    # Coût bcrypt modifié depuis le dernier hachage : recalculé avec le mot de passe en clair
+    if needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await password_hash_pool.hacher(password)
+            session.add(user)
+            await session.commit()
+        except HachageSatureError:
+            # Pas prioritaire : ce sera fait à une prochaine connexion
+            pass
+    
+    # Jetons signés : les routes protégées authentifient sans relire l'utilisateur en base
     return {
         "id": user.id,
         "email": user.email,
         "nom": user.nom,
         "prenom": user.prenom,
         "role": user.role,
-        "message": "Connexion réussie"
+        "message": "Connexion réussie",
+        **creer_tokens(user.id, user.role.value)
     }
+
+@router.post("/refresh")
+async def refresh(refresh_token: str):
+    """Nouveaux jetons à partir d'un jeton de rafraîchissement valide (sans accès à la base)"""
+    try:
+        claims = decoder_token(refresh_token, type_attendu=TYPE_RAFRAICHISSEMENT)
+    except TokenInvalideError:
+        raise HTTPException(
+            status_code=401,
+            detail="Jeton de rafraîchissement invalide ou expiré",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    return creer_tokens(int(claims["sub"]), claims["role"])
@@ -0,0 +1,12 @@
+# app/api/routes/metriques.py
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.core.metriques import exposer
+
+router = APIRouter(tags=["Métriques"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métriques au format Prometheus (latences par route, requêtes SQL, pool, PDF, bcrypt, checkout)"""
+    return Response(content=exposer(), media_type=CONTENT_TYPE_LATEST)
@@ -1,30 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from app.db.session import get_session
-from app.models.panier import PanierItem
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.api.dependencies import utilisateur_du_chemin
+from app.db.session import get_async_session, marquer_ecriture
+from app.models.panier import PanierItem, SeatHold
 from app.models.sport import Sport, Epreuve
 from app.models.offer import Offer
-import secrets
-from datetime import datetime
+from app.services.checkout_service import CheckoutService, CheckoutError
+from app.services.hold_service import HoldService
+from app.services.invalidation_bus import InvalidationBus
+from app.services.inventory_service import PlacesInsuffisantesError
 
-router = APIRouter(prefix="/api/panier", tags=["Panier"])
+# Toutes les routes sont en /user/{user_id} : réservées au titulaire du jeton (ou à un admin)
+router = APIRouter(prefix="/api/panier", tags=["Panier"], dependencies=[Depends(utilisateur_du_chemin)])
 
 
 @router.get("/user/{user_id}")
-def get_panier(user_id: int, session: Session = Depends(get_session)):
+async def get_panier(user_id: int, session: AsyncSession = Depends(get_async_session)):
     """Récupérer le panier d'un utilisateur avec détails enrichis"""
-    statement = select(PanierItem).where(PanierItem.user_id == user_id)
-    items = session.exec(statement).all()
+    # Épreuves, offres, sports et blocages en cours chargés en une seule requête,
+    # prix total calculé directement par la base. Un blocage expiré mais pas
+    # encore libéré par le balayeur n'est pas joint.
+    prix_total = func.coalesce(Offer.prix * PanierItem.nombre_places, 0).label("prix_total")
+    statement = (
+        select(PanierItem, Epreuve, Offer, Sport, SeatHold.expire_le, prix_total)
+        .outerjoin(Epreuve, Epreuve.id == PanierItem.epreuve_id)
+        .outerjoin(Offer, Offer.id == PanierItem.offer_id)
+        .outerjoin(Sport, Sport.id == Epreuve.sport_id)
+        .outerjoin(SeatHold, (SeatHold.panier_item_id == PanierItem.id) & (SeatHold.expire_le > datetime.utcnow()))
+        .where(PanierItem.user_id == user_id)
+        .order_by(PanierItem.id)
+    )
+    rows = (await session.exec(statement)).all()
     
     result = []
-    for item in items:
-        epreuve = session.get(Epreuve, item.epreuve_id)
-        offer = session.get(Offer, item.offer_id)
-        sport = session.get(Sport, epreuve.sport_id) if epreuve else None
-        
-        # Calculer le prix total
-        prix_total = offer.prix * item.nombre_places if offer else 0
-        
+    for item, epreuve, offer, sport, expire_le, prix_total in rows:
         result.append({
             "id": item.id,
             "epreuve_id": item.epreuve_id,
@@ -39,39 +50,33 @@ def get_panier(user_id: int, session: Session = Depends(get_session)):
             "sport_nom": sport.nom if sport else None,
             # Infos offre
             "offer_nom": offer.nom_offre if offer else None,
+            # Fin du blocage des places (None si le blocage a expiré)
+            "expire_le": expire_le.isoformat() if expire_le else None,
         })
     
     return result
 
 
 @router.post("/user/{user_id}")
-def ajouter_au_panier(
+async def ajouter_au_panier(
     user_id: int,
     epreuve_id: int,
     offer_id: int,
-    nombre_places: int = 1,
-    session: Session = Depends(get_session)
+    nombre_places: int = Query(default=1, ge=1),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Ajouter un article au panier"""
     
     # Vérifier que l'épreuve existe
-    epreuve = session.get(Epreuve, epreuve_id)
+    epreuve = await session.get(Epreuve, epreuve_id)
     if not epreuve:
         raise HTTPException(status_code=404, detail="Épreuve non trouvée")
     
     # Vérifier que l'offre existe
-    offer = session.get(Offer, offer_id)
+    offer = await session.get(Offer, offer_id)
     if not offer:
         raise HTTPException(status_code=404, detail="Offre non trouvée")
     
-    # Vérifier les places disponibles
-    places_necessaires = nombre_places * offer.capacite_personne
-    if epreuve.places_disponibles < places_necessaires:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Seulement {epreuve.places_disponibles} places disponibles"
-        )
-    
     # Créer l'item du panier
     panier_item = PanierItem(
         user_id=user_id,
@@ -79,113 +84,65 @@ def ajouter_au_panier(
         offer_id=offer_id,
         nombre_places=nombre_places
     )
-    
     session.add(panier_item)
-    session.commit()
-    session.refresh(panier_item)
+    await session.flush()  # Pour obtenir l'ID de l'item
+    
+    # Bloquer les places le temps de la commande (UPDATE conditionnel sur le stock)
+    places_necessaires = nombre_places * offer.capacite_personne
+    try:
+        hold = await session.run_sync(HoldService.bloquer, panier_item, places_necessaires)
+    except PlacesInsuffisantesError as e:
+        await session.rollback()
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Seulement {e.places_disponibles} places disponibles"
+        )
+    
+    await session.run_sync(InvalidationBus.places_invalides, [epreuve_id])
+    await session.commit()
+    await session.refresh(panier_item)
     
     return {
         "message": "Ajouté au panier avec succès",
         "item_id": panier_item.id,
-        "prix_total": offer.prix * nombre_places
+        "prix_total": offer.prix * nombre_places,
+        "expire_le": hold.expire_le.isoformat()
     }
 
 
 @router.delete("/user/{user_id}/item/{item_id}")
-def supprimer_du_panier(user_id: int, item_id: int, session: Session = Depends(get_session)):
+async def supprimer_du_panier(user_id: int, item_id: int, session: AsyncSession = Depends(get_async_session)):
     """Supprimer un article du panier"""
     statement = select(PanierItem).where(
         PanierItem.id == item_id,
         PanierItem.user_id == user_id
     )
-    item = session.exec(statement).first()
+    item = (await session.exec(statement)).first()
     
     if not item:
         raise HTTPException(status_code=404, detail="Article non trouvé dans votre panier")
     
-    session.delete(item)
-    session.commit()
+    # Remettre en vente les places bloquées
+    nouvelles_places = await session.run_sync(HoldService.liberer, [item.id])
+    await session.delete(item)
+    await session.run_sync(InvalidationBus.places_modifiees, nouvelles_places)
+    await session.commit()
     
     return {"message": "Article supprimé du panier"}
 
 
 @router.post("/user/{user_id}/valider")
-def valider_panier(user_id: int, session: Session = Depends(get_session)):
+async def valider_panier(user_id: int, response: Response, session: AsyncSession = Depends(get_async_session)):
     """Valider le panier et créer les tickets"""
-    from app.models.ticket import Ticket
-    from app.models.sport import TicketEpreuve
-    
-    # Récupérer les items du panier
-    statement = select(PanierItem).where(PanierItem.user_id == user_id)
-    panier_items = session.exec(statement).all()
-    
-    if not panier_items:
-        raise HTTPException(status_code=400, detail="Votre panier est vide")
-    
-    tickets_crees = []
-    
-    for item in panier_items:
-        # Vérifier la disponibilité
-        epreuve = session.get(Epreuve, item.epreuve_id)
-        offer = session.get(Offer, item.offer_id)
-        
-        if not epreuve:
-            raise HTTPException(status_code=404, detail=f"Épreuve {item.epreuve_id} non trouvée")
-        
-        if not offer:
-            raise HTTPException(status_code=404, detail=f"Offre {item.offer_id} non trouvée")
-        
-        places_necessaires = item.nombre_places * offer.capacite_personne
-        
-        if epreuve.places_disponibles < places_necessaires:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Plus assez de places pour {epreuve.nom_epreuve}"
-            )
-        
-        # Calculer le prix total
-        prix_total = offer.prix * item.nombre_places
-        
-        # Générer clé d'achat unique
-        clef_achat = secrets.token_urlsafe(16)
-        qr_code = f"{clef_achat}-{int(datetime.utcnow().timestamp())}"
-        
-        # Créer le ticket
-        ticket = Ticket(
-            user_id=user_id,
-            offer_id=offer.id,
-            clef_achat=clef_achat,
-            qr_code_content=qr_code,
-            prix_total=prix_total,
-            nombre_places=item.nombre_places  # Ajouter cette info
-        )
-        
-        session.add(ticket)
-        session.flush()  # Pour obtenir l'ID du ticket
-        
-        # Lier le ticket à l'épreuve
-        ticket_epreuve = TicketEpreuve(
-            ticket_id=ticket.id,
-            epreuve_id=epreuve.id,
-            nombre_places=item.nombre_places
-        )
-        session.add(ticket_epreuve)
-        
-        # Réduire les places disponibles
-        epreuve.places_disponibles -= places_necessaires
-        
-        # Supprimer du panier
-        session.delete(item)
-        
-        tickets_crees.append({
-            "ticket_id": ticket.id,
-            "epreuve": epreuve.nom_epreuve,
-            "prix": prix_total
-        })
+    try:
+        resultat = await session.run_sync(CheckoutService.valider_panier, user_id)
+    except CheckoutError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    session.commit()
+    # Les prochaines lectures de ce client (historique des billets) doivent voir cet achat
+    marquer_ecriture(response)
     
     return {
-        "message": f"{len(tickets_crees)} billet(s) acheté(s) avec succès",
-        "tickets": tickets_crees
+        "message": resultat["message"],
+        "tickets": resultat["tickets"]
     }
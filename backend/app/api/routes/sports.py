@@ -1,33 +1,37 @@
 # app/api/routes/sports.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from typing import List
-from app.db.session import get_session
-from app.models.sport import Sport, Epreuve
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional
+from app.api.pagination import LIMITE_DEFAUT, LIMITE_MAX, lister_table, page_de_liste
+from app.db.session import get_async_read_session
+from app.models.sport import Sport
+from app.services.catalog_cache_service import catalog_cache
 
 router = APIRouter(prefix="/api/sports", tags=["Sports"])
 
 
 @router.get("")
-def get_all_sports(session: Session = Depends(get_session)):
-    statement = select(Sport)
-    sports = session.exec(statement).all()
-    return sports
+async def get_all_sports(
+    response: Response,
+    limit: int = Query(default=LIMITE_DEFAUT, ge=1, le=LIMITE_MAX),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_read_session)
+):
+    # Toutes les colonnes : page découpée dans le cache du catalogue
+    if fields is None:
+        return page_de_liste(response, await session.run_sync(catalog_cache.get_sports), cursor, limit)
+    
+    # Écrans de liste : page par clé (curseur dans X-Next-Cursor) et colonnes demandées seulement
+    return await session.run_sync(lister_table, response, Sport, fields, cursor, limit)
 
 
 @router.get("/{slug}")
-def get_sport_detail(slug: str, session: Session = Depends(get_session)):
-    statement = select(Sport).where(Sport.slug == slug)
-    sport = session.exec(statement).first()
+async def get_sport_detail(slug: str, session: AsyncSession = Depends(get_async_read_session)):
+    # Catalogue en cache, places des épreuves (fragments inclus) relues à l'expiration de leur TTL
+    sport = await session.run_sync(catalog_cache.get_sport_detail, slug)
     
     if not sport:
         raise HTTPException(status_code=404, detail="Sport non trouvé")
     
-    # Charger les épreuves
-    epreuves_statement = select(Epreuve).where(Epreuve.sport_id == sport.id)
-    epreuves = session.exec(epreuves_statement).all()
-    
-    return {
-        **sport.dict(),
-        "epreuves": [e.dict() for e in epreuves]
-    }
+    return sport
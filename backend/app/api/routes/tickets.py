@@ -1,271 +1,283 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import tuple_
 from sqlmodel import Session, select
-from fastapi.responses import StreamingResponse
-from app.services.ticket_pdf_service import TicketPDFService    
-from typing import List
-from app.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi.responses import Response, StreamingResponse
+from app.core.config import PDF_WALLET_MAX_TICKETS
+from app.services.pdf_executor import pdf_render_pool, PDFFileSatureeError
+from app.services.pdf_cache_service import pdf_cache, etag_correspond
+from app.services.wallet_pdf_service import WalletPDFService
+from typing import List, Optional
+from app.db.session import get_async_session, get_async_read_session, marquer_ecriture
 from app.models.ticket import Ticket
 from app.models.offer import Offer
 from app.models.sport import Epreuve, Sport, TicketEpreuve
-from app.models.panier import PanierItem
 from app.models.user import User
-import secrets
-import io
-from datetime import datetime
+from app.services.checkout_service import CheckoutService, CheckoutError
+from app.api.pagination import LIMITE_DEFAUT, LIMITE_MAX, decoder_curseur, page_suivante, parser_champs
+from app.api.dependencies import UtilisateurCourant, get_current_user, peut_acceder, utilisateur_du_chemin
 
 
 router = APIRouter(prefix="/api/tickets", tags=["Tickets"])
 
+logger = logging.getLogger(__name__)
 
-@router.get("/user/{user_id}")
-def get_user_tickets(user_id: int, session: Session = Depends(get_session)):
-    """Récupérer tous les billets achetés d'un utilisateur avec détails enrichis"""
-    try:
-        print(f"📋 Récupération des tickets pour user_id: {user_id}")
-        
-        statement = select(Ticket).where(Ticket.user_id == user_id)
-        tickets = session.exec(statement).all()
-        
-        print(f"✅ {len(tickets)} tickets trouvés")
-        
-        if not tickets:
-            return []
-        
-        result = []
-        for ticket in tickets:
-            print(f"🎫 Traitement ticket {ticket.id}")
-            
-            # Récupérer l'offre
-            offer = session.get(Offer, ticket.offer_id)
-            if not offer:
-                print(f"⚠️ Offre {ticket.offer_id} non trouvée pour ticket {ticket.id}")
-                continue
-            
-            # Récupérer les épreuves liées via TicketEpreuve
-            statement_te = select(TicketEpreuve).where(TicketEpreuve.ticket_id == ticket.id)
-            ticket_epreuves = session.exec(statement_te).all()
-            
-            if not ticket_epreuves:
-                print(f"⚠️ Aucune épreuve liée au ticket {ticket.id}")
-                continue
-            
-            for te in ticket_epreuves:
-                epreuve = session.get(Epreuve, te.epreuve_id)
-                if not epreuve:
-                    print(f"⚠️ Épreuve {te.epreuve_id} non trouvée")
-                    continue
-                
-                sport = session.get(Sport, epreuve.sport_id) if epreuve else None
-                
-                # Adapter les noms de champs pour le frontend
-                ticket_data = {
-                    "id": ticket.id,
-                    "epreuve_id": epreuve.id,
-                    "epreuve_nom": epreuve.nom_epreuve if hasattr(epreuve, 'nom_epreuve') else epreuve.nom,
-                    "sport_nom": sport.nom if sport else None,
-                    "date": epreuve.date_epreuve.isoformat() if hasattr(epreuve, 'date_epreuve') and epreuve.date_epreuve else (epreuve.date.isoformat() if hasattr(epreuve, 'date') and epreuve.date else None),
-                    "heure": epreuve.heure if hasattr(epreuve, 'heure') else None,
-                    "lieu": sport.lieu if sport and hasattr(sport, 'lieu') else None,
-                    "offer_id": offer.id,
-                    "offer_nom": offer.nom_offre if hasattr(offer, 'nom_offre') else offer.nom,
-                    "prix_unitaire": float(offer.prix),
-                    "nombre_places": ticket.nombre_places if hasattr(ticket, 'nombre_places') else 1,
-                    "prix_total": float(ticket.prix_total),
-                    "statut": "validé",
-                    "date_achat": ticket.date_achat.isoformat() if ticket.date_achat else None,
-                    "clef_achat": ticket.clef_achat if hasattr(ticket, 'clef_achat') else None,
-                    "qr_code": ticket.qr_code_content if hasattr(ticket, 'qr_code_content') else None,
-                }
-                
-                print(f"✅ Ticket formaté: {ticket_data}")
-                result.append(ticket_data)
-        
-        print(f"✅ Retour de {len(result)} tickets")
-        return result
-        
-    except Exception as e:
-        print(f"❌ ERREUR lors de la récupération des tickets: {type(e).__name__}")
-        print(f"❌ Message: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+
+# Champs de la liste des billets : colonne SQL lue pour chacun (None = valeur constante)
+CHAMPS_BILLET = {
+    "id": Ticket.id,
+    "epreuve_id": Epreuve.id,
+    "epreuve_nom": Epreuve.nom_epreuve,
+    "sport_nom": Sport.nom,
+    "date": Epreuve.date_epreuve,
+    "heure": Epreuve.heure,
+    "lieu": Sport.lieu,
+    "offer_id": Offer.id,
+    "offer_nom": Offer.nom_offre,
+    "prix_unitaire": Offer.prix,
+    "nombre_places": Ticket.nombre_places,
+    "prix_total": Ticket.prix_total,
+    "statut": None,
+    "date_achat": Ticket.date_achat,
+    "clef_achat": Ticket.clef_achat,
+    "qr_code": Ticket.qr_code_content,
+}
+
+
+def _formater_champ_billet(champ: str, valeur):
+    """Adapter les valeurs pour le frontend"""
+    if champ == "statut":
+        return "validé"
+    if champ in ("date", "date_achat"):
+        return valeur.isoformat() if valeur else None
+    if champ in ("prix_unitaire", "prix_total"):
+        return float(valeur)
+    return valeur
+
+
+@router.get("/user/{user_id}", dependencies=[Depends(utilisateur_du_chemin)])
+async def get_user_tickets(
+    user_id: int,
+    response: Response,
+    limit: int = Query(default=LIMITE_DEFAUT, ge=1, le=LIMITE_MAX),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_read_session)
+):
+    """
+    Récupérer les billets achetés d'un utilisateur avec détails enrichis.
+    
+    Pagination par clé (billet, épreuve) : `limit` lignes (50 par défaut) après `cursor`, le
+    curseur suivant est dans l'en-tête X-Next-Cursor. `fields=id,epreuve_nom`
+    ne lit et ne renvoie que ces champs (plus la clé du curseur).
+    """
+    champs = parser_champs(fields, list(CHAMPS_BILLET), obligatoires=("id", "epreuve_id"))
+    apres = decoder_curseur(cursor, nb_valeurs=2)
+    
+    # Une seule requête jointe : Ticket → TicketEpreuve → Epreuve → Sport, plus Offer.
+    # Seules les colonnes des champs demandés sont lues.
+    colonnes = [CHAMPS_BILLET[champ].label(champ) for champ in champs if CHAMPS_BILLET[champ] is not None]
+    statement = (
+        select(*colonnes)
+        .select_from(Ticket)
+        .join(TicketEpreuve, TicketEpreuve.ticket_id == Ticket.id)
+        .join(Epreuve, Epreuve.id == TicketEpreuve.epreuve_id)
+        .join(Offer, Offer.id == Ticket.offer_id)
+        .outerjoin(Sport, Sport.id == Epreuve.sport_id)
+        .where(Ticket.user_id == user_id)
+        .order_by(Ticket.id, Epreuve.id)
+    )
+    if apres is not None:
+        statement = statement.where(tuple_(Ticket.id, Epreuve.id) > tuple_(*apres))
+    rows = (await session.exec(statement.limit(limit + 1))).all()
+    rows = page_suivante(response, rows, limit, lambda row: (row.id, row.epreuve_id))
+    
+    return [
+        {champ: _formater_champ_billet(champ, None if CHAMPS_BILLET[champ] is None else row._mapping[champ]) for champ in champs}
+        for row in rows
+    ]
 
 
-@router.post("/acheter/{user_id}")
-def acheter_ticket_depuis_panier(user_id: int, session: Session = Depends(get_session)):
+@router.post("/acheter/{user_id}", dependencies=[Depends(utilisateur_du_chemin)])
+async def acheter_ticket_depuis_panier(user_id: int, response: Response, session: AsyncSession = Depends(get_async_session)):
     """Valider le panier et créer les tickets (alternative à /panier/valider)"""
     try:
-        print(f"🛒 Validation panier pour user_id: {user_id}")
-        
-        # Récupérer les items du panier
-        statement = select(PanierItem).where(PanierItem.user_id == user_id)
-        panier_items = session.exec(statement).all()
-        
-        if not panier_items:
-            raise HTTPException(status_code=400, detail="Votre panier est vide")
-        
-        print(f"📦 {len(panier_items)} items dans le panier")
-        
-        tickets_crees = []
-        
-        for item in panier_items:
-            print(f"🎫 Traitement item panier: epreuve_id={item.epreuve_id}, offer_id={item.offer_id}")
-            
-            # Vérifier l'épreuve
-            epreuve = session.get(Epreuve, item.epreuve_id)
-            if not epreuve:
-                raise HTTPException(status_code=404, detail=f"Épreuve {item.epreuve_id} non trouvée")
-            
-            # Vérifier l'offre
-            offer = session.get(Offer, item.offer_id)
-            if not offer:
-                raise HTTPException(status_code=404, detail="Offre non trouvée")
-            
-            # Calculer les places nécessaires
-            capacite = offer.capacite_personne if hasattr(offer, 'capacite_personne') else 1
-            places_necessaires = item.nombre_places * capacite
-            
-            # Vérifier la disponibilité
-            places_dispo = epreuve.places_disponibles if hasattr(epreuve, 'places_disponibles') else 1000
-            if places_dispo < places_necessaires:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Plus assez de places (disponibles: {places_dispo}, demandées: {places_necessaires})"
-                )
-            
-            # Calculer le prix total
-            prix_total = offer.prix * item.nombre_places
-            
-            # Générer clé d'achat unique
-            clef_achat = secrets.token_urlsafe(16)
-            qr_code = f"{clef_achat}-{int(datetime.utcnow().timestamp())}"
-            
-            # Créer le ticket
-            ticket = Ticket(
-                user_id=user_id,
-                offer_id=offer.id,
-                clef_achat=clef_achat,
-                qr_code_content=qr_code,
-                prix_total=prix_total,
-                nombre_places=item.nombre_places
-            )
-            
-            session.add(ticket)
-            session.flush()  # Pour obtenir l'ID du ticket
-            
-            print(f"✅ Ticket créé: id={ticket.id}")
-            
-            # Lier le ticket à l'épreuve
-            ticket_epreuve = TicketEpreuve(
-                ticket_id=ticket.id,
-                epreuve_id=epreuve.id,
-                nombre_places=item.nombre_places
-            )
-            session.add(ticket_epreuve)
-            
-            # Réduire les places disponibles
-            if hasattr(epreuve, 'places_disponibles'):
-                epreuve.places_disponibles -= places_necessaires
-            
-            # Supprimer l'item du panier
-            session.delete(item)
-            
-            nom_epreuve = epreuve.nom_epreuve if hasattr(epreuve, 'nom_epreuve') else epreuve.nom
-            
-            tickets_crees.append({
-                "ticket_id": ticket.id,
-                "epreuve": nom_epreuve,
-                "prix": prix_total
-            })
-        
-        session.commit()
-        
-        print(f"✅ {len(tickets_crees)} tickets créés avec succès")
-        
-        return {
-            "message": f"{len(tickets_crees)} billet(s) acheté(s) avec succès",
-            "tickets": tickets_crees
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Erreur lors de l'achat: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        session.rollback()
-        raise HTTPException(status_code=500, detail=f"Erreur serveur: {str(e)}")
+        resultat = await session.run_sync(CheckoutService.valider_panier, user_id)
+    except CheckoutError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    # Les prochaines lectures de ce client (historique des billets) doivent voir cet achat
+    marquer_ecriture(response)
+    
+    return {
+        "message": resultat["message"],
+        "tickets": resultat["tickets"]
+    }
+
+
+def _requete_ticket_data():
+    """Requête commune aux PDF : billet, propriétaire, offre, épreuve et sport en une jointure"""
+    return (
+        select(Ticket, User, Offer, Epreuve, Sport)
+        .outerjoin(User, User.id == Ticket.user_id)
+        .outerjoin(Offer, Offer.id == Ticket.offer_id)
+        .outerjoin(TicketEpreuve, TicketEpreuve.ticket_id == Ticket.id)
+        .outerjoin(Epreuve, Epreuve.id == TicketEpreuve.epreuve_id)
+        .outerjoin(Sport, Sport.id == Epreuve.sport_id)
+    )
+
+
+def _ticket_data(ticket: Ticket, user: User, offer: Offer, epreuve: Epreuve, sport: Sport) -> dict:
+    """Préparer les données pour le PDF"""
+    return {
+        "clef_achat": ticket.clef_achat,
+        "epreuve_nom": epreuve.nom_epreuve if epreuve else "Événement Paris 2024",
+        "sport_nom": sport.nom if sport else "Sport",
+        "lieu": sport.lieu if sport else "Paris",
+        "date_epreuve": epreuve.date_epreuve.strftime("%d/%m/%Y") if epreuve and epreuve.date_epreuve else "Date à confirmer",
+        "heure": epreuve.heure if epreuve else "",
+        "offer_nom": offer.nom_offre,
+        "prix_total": float(ticket.prix_total),
+        "nombre_places": ticket.nombre_places,
+        "user_name": f"{user.prenom} {user.nom}" if user else "Client"
+    }
+
+
+def _charger_ticket_data(session: Session, ticket_id: int, utilisateur: UtilisateurCourant) -> dict:
+    """Charger en une requête les données d'un billet nécessaires à son PDF"""
+    statement = _requete_ticket_data().where(Ticket.id == ticket_id).limit(1)
+    row = session.exec(statement).first()
+    
+    # Le billet d'un autre utilisateur est traité comme inexistant
+    if not row or not peut_acceder(utilisateur, row[0].user_id):
+        raise HTTPException(status_code=404, detail="Billet non trouvé")
+    
+    ticket, user, offer, epreuve, sport = row
+    
+    if not offer:
+        raise HTTPException(status_code=404, detail="Offre non trouvée")
+    
+    return _ticket_data(ticket, user, offer, epreuve, sport)
+
+
+def _trop_de_billets() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Portefeuille limité à {PDF_WALLET_MAX_TICKETS} billets : sélectionnez-les avec ticket_ids"
+    )
+
+
+def _charger_wallet_data(session: Session, user_id: int, ticket_ids: Optional[List[int]]) -> List[dict]:
+    """Charger en une requête les données PDF de tous les billets (ou d'une sélection) d'un utilisateur"""
+    # Au plus PDF_WALLET_MAX_TICKETS + 1 billets lus : assez pour savoir que la limite est dépassée
+    billets = select(Ticket.id).where(Ticket.user_id == user_id)
+    if ticket_ids:
+        billets = billets.where(Ticket.id.in_(ticket_ids))
+    billets = billets.order_by(Ticket.id).limit(PDF_WALLET_MAX_TICKETS + 1)
+    statement = (
+        _requete_ticket_data()
+        .where(Ticket.id.in_(billets.scalar_subquery()))
+        .order_by(Ticket.id, Epreuve.id)
+    )
+    
+    tickets_data = []
+    dernier_ticket_id = None
+    for ticket, user, offer, epreuve, sport in session.exec(statement).all():
+        # Une page par billet : première épreuve du billet, comme le PDF unitaire
+        if ticket.id == dernier_ticket_id or not offer:
+            continue
+        dernier_ticket_id = ticket.id
+        tickets_data.append(_ticket_data(ticket, user, offer, epreuve, sport))
+    
+    if not tickets_data:
+        raise HTTPException(status_code=404, detail="Aucun billet trouvé")
+    if len(tickets_data) > PDF_WALLET_MAX_TICKETS:
+        raise _trop_de_billets()
+    
+    return tickets_data
 
 
 @router.get("/{ticket_id}/download-pdf")
 async def download_ticket_pdf(
     ticket_id: int,
-    session: Session = Depends(get_session)
+    if_none_match: Optional[str] = Header(default=None),
+    utilisateur: UtilisateurCourant = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """Télécharger le billet en PDF avec QR code"""
     try:
-        print(f"📥 Génération du PDF pour le ticket {ticket_id}")
-        
-        # Récupérer le ticket
-        ticket = session.get(Ticket, ticket_id)
-        
-        if not ticket:
-            raise HTTPException(status_code=404, detail="Billet non trouvé")
-        
-        # Récupérer l'utilisateur
-        user = session.get(User, ticket.user_id)
-        user_name = f"{user.prenom} {user.nom}" if user else "Client"
+        ticket_data = await session.run_sync(_charger_ticket_data, ticket_id, utilisateur)
         
-        # Récupérer l'offre
-        offer = session.get(Offer, ticket.offer_id)
+        # ETag fort = empreinte des données du billet : identique tant que le PDF l'est
+        clef = pdf_cache.clef(ticket_data)
+        etag = f'"{clef}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
         
-        if not offer:
-            raise HTTPException(status_code=404, detail="Offre non trouvée")
+        # Le client a déjà ce PDF : ni génération ni transfert
+        if etag_correspond(if_none_match, etag):
+            return Response(status_code=304, headers=cache_headers)
         
-        # Récupérer l'épreuve liée
-        statement_te = select(TicketEpreuve).where(TicketEpreuve.ticket_id == ticket.id)
-        ticket_epreuve = session.exec(statement_te).first()
-        
-        epreuve = None
-        sport = None
-        
-        if ticket_epreuve:
-            epreuve = session.get(Epreuve, ticket_epreuve.epreuve_id)
-            if epreuve:
-                sport = session.get(Sport, epreuve.sport_id)
-        
-        # Préparer les données pour le PDF
-        ticket_data = {
-            "clef_achat": ticket.clef_achat,
-            "epreuve_nom": epreuve.nom_epreuve if epreuve else "Événement Paris 2024",
-            "sport_nom": sport.nom if sport else "Sport",
-            "lieu": sport.lieu if sport else "Paris",
-            "date_epreuve": epreuve.date_epreuve.strftime("%d/%m/%Y") if epreuve and epreuve.date_epreuve else "Date à confirmer",
-            "heure": epreuve.heure if epreuve else "",
-            "offer_nom": offer.nom_offre if hasattr(offer, 'nom_offre') else "Offre",
-            "prix_total": float(ticket.prix_total),
-            "nombre_places": ticket.nombre_places if hasattr(ticket, 'nombre_places') else 1,
-            "user_name": user_name
-        }
-        
-        # Générer le PDF
-        pdf_bytes = TicketPDFService.generate_ticket_pdf(ticket_data)
-        
-        print(f"✅ PDF généré avec succès pour le ticket {ticket_id}")
+        pdf_bytes = await run_in_threadpool(pdf_cache.get, clef)
+        if pdf_bytes is None:
+            # Générer le PDF dans le pool dédié (processus ou threads)
+            try:
+                pdf_bytes = await pdf_render_pool.generer_ticket_pdf(ticket_data)
+            except PDFFileSatureeError:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Trop de billets en cours de génération, veuillez réessayer",
+                    headers={"Retry-After": "1"}
+                )
+            await run_in_threadpool(pdf_cache.put, clef, pdf_bytes)
+            logger.debug("PDF généré pour le ticket %s", ticket_id)
         
         # Retourner le PDF
-        return StreamingResponse(
-            io.BytesIO(pdf_bytes),
+        return Response(
+            content=pdf_bytes,
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename=billet_paris2024_{ticket.clef_achat}.pdf"
+                **cache_headers,
+                "Content-Disposition": f"attachment; filename=billet_paris2024_{ticket_data['clef_achat']}.pdf"
             }
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Erreur lors de la génération du PDF: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Erreur lors de la génération du PDF du ticket %s", ticket_id)
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération du PDF: {str(e)}")
+
+
+@router.get("/user/{user_id}/wallet-pdf", dependencies=[Depends(utilisateur_du_chemin)])
+async def download_wallet_pdf(
+    user_id: int,
+    ticket_ids: Optional[List[int]] = Query(default=None),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Télécharger tous les billets d'un utilisateur (ou ceux de ticket_ids) dans un seul PDF"""
+    if ticket_ids and len(set(ticket_ids)) > PDF_WALLET_MAX_TICKETS:
+        raise _trop_de_billets()
+    
+    # Les données sont chargées avant de répondre : la session n'est pas utilisée pendant le streaming
+    tickets_data = await session.run_sync(_charger_wallet_data, user_id, ticket_ids)
+    
+    # Une place de la file des PDF pour tout le flux : 503 tout de suite si elle est pleine
+    try:
+        flux = pdf_render_pool.flux(WalletPDFService.generer_wallet(tickets_data), document="portefeuille")
+    except PDFFileSatureeError:
+        raise HTTPException(
+            status_code=503,
+            detail="Trop de billets en cours de génération, veuillez réessayer",
+            headers={"Retry-After": "1"}
+        )
+    
+    # Itérateur synchrone : Starlette le parcourt dans le threadpool et envoie chaque page dès qu'elle est prête
+    return StreamingResponse(
+        flux,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename=billets_paris2024_{user_id}.pdf"
+        }
+    )
@@ -0,0 +1,142 @@
+# backend/app/core/config.py
+import os
+import tempfile
+
+# ========== BLOCAGE DES PLACES DU PANIER ==========
+
+# Durée pendant laquelle les places d'un article du panier restent bloquées (secondes)
+SEAT_HOLD_TTL_SECONDS = int(os.getenv("SEAT_HOLD_TTL_SECONDS", "900"))
+
+# Intervalle entre deux passages du libérateur de blocages expirés (secondes)
+SEAT_HOLD_SWEEP_INTERVAL_SECONDS = int(os.getenv("SEAT_HOLD_SWEEP_INTERVAL_SECONDS", "30"))
+
+# Nombre maximum de blocages libérés par transaction
+SEAT_HOLD_SWEEP_BATCH_SIZE = int(os.getenv("SEAT_HOLD_SWEEP_BATCH_SIZE", "1000"))
+
+# ========== GÉNÉRATION DES PDF ==========
+
+# "process" (pool de processus, n'occupe pas le GIL du serveur) ou "thread"
+PDF_EXECUTOR = os.getenv("PDF_EXECUTOR", "process")
+
+# Nombre de PDF générés en parallèle
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+
+# Nombre maximum de PDF en cours ou en attente avant de répondre 503
+PDF_MAX_QUEUE = int(os.getenv("PDF_MAX_QUEUE", "16"))
+
+# Nombre maximum de billets dans un portefeuille PDF (au-delà : 413, à demander par ticket_ids)
+PDF_WALLET_MAX_TICKETS = int(os.getenv("PDF_WALLET_MAX_TICKETS", "100"))
+
+# ========== CACHE DES PDF ==========
+
+# Taille maximale du cache mémoire des PDF, par processus (octets)
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Répertoire du cache disque des PDF (vide = cache disque désactivé)
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "paris2024_billets_pdf"))
+
+# Taille maximale du cache disque des PDF, partagé par les workers (octets) :
+# au-delà, les PDF les moins récemment servis sont supprimés
+PDF_CACHE_DISK_MAX_BYTES = int(os.getenv("PDF_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# ========== CACHE DU CATALOGUE ==========
+
+# Durée de vie des données statiques du catalogue : sports, épreuves, offres (secondes, 0 = pas de cache)
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+
+# Durée de vie des compteurs de places des épreuves (secondes, 0 = toujours relus)
+CATALOG_SEATS_TTL_SECONDS = float(os.getenv("CATALOG_SEATS_TTL_SECONDS", "5"))
+
+# ========== INVALIDATION ENTRE WORKERS ==========
+
+# Canal Postgres LISTEN/NOTIFY des invalidations du catalogue ("" = bus désactivé)
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "catalogue_invalidation")
+
+# ========== MOTS DE PASSE ==========
+
+# Coût bcrypt (2^n itérations) ; les hachages d'un autre coût sont recalculés à la connexion
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Nombre de hachages bcrypt calculés en parallèle
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# Nombre maximum de hachages en cours ou en attente avant de répondre 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+# ========== AUTHENTIFICATION (JWT) ==========
+
+# Clé de signature des jetons, identique sur tous les workers : obligatoire, l'API refuse de démarrer sans elle
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "")
+
+# Développement uniquement : sans JWT_SECRET_KEY, signer avec une clé locale connue de tous
+JWT_INSECURE_DEV_KEY = os.getenv("JWT_INSECURE_DEV_KEY", "0") == "1"
+
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+
+# Durée de vie d'un jeton d'accès (minutes)
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+
+# Durée de vie d'un jeton de rafraîchissement (minutes) : courte, car il est renouvelé sans
+# relire la base (un compte désactivé ou dont le rôle change garde ses droits jusqu'à son expiration)
+REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", "60"))
+
+# ========== BASE DE DONNÉES ==========
+
+# Connexions gardées ouvertes dans le pool, par processus
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+
+# Connexions supplémentaires autorisées en pic, fermées une fois rendues
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Attente maximale d'une connexion libre avant erreur (secondes)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Âge maximal d'une connexion avant reconnexion (secondes, -1 = jamais)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Vérifier chaque connexion avant usage (coupures réseau, redémarrages de Postgres)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+# Durée maximale d'une requête SQL côté Postgres (millisecondes, 0 = illimitée)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+# Journaliser chaque requête SQL (développement uniquement)
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+
+# Nombre de requêtes SQL de chaque requête HTTP dans l'en-tête X-DB-Queries (benchmarks)
+DB_QUERY_COUNT_HEADER = os.getenv("DB_QUERY_COUNT_HEADER", "0") == "1"
+
+# Développement : signaler les requêtes SQL répétées (N+1) et les dépassements de budget, avec leur pile d'appel
+DB_N_PLUS_1_LOG = os.getenv("DB_N_PLUS_1_LOG", "0") == "1"
+
+# Nombre d'exécutions d'une même requête (aux valeurs près) à partir duquel elle est signalée
+DB_N_PLUS_1_THRESHOLD = int(os.getenv("DB_N_PLUS_1_THRESHOLD", "3"))
+
+# Requêtes SQL par requête HTTP au-delà desquelles elle est signalée (0 = pas de budget)
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "0"))
+
+# Requêtes SQL plus longues que ce seuil journalisées avec leur plan (millisecondes, 0 = désactivé)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "0"))
+
+# Nombre de requêtes lentes gardées en mémoire, par processus (les plus anciennes sont oubliées)
+DB_SLOW_QUERY_BUFFER = int(os.getenv("DB_SLOW_QUERY_BUFFER", "200"))
+
+# Fichier JSON lines où ajouter aussi chaque requête lente ("" = mémoire seulement)
+DB_SLOW_QUERY_LOG_FILE = os.getenv("DB_SLOW_QUERY_LOG_FILE", "")
+
+# Capturer le plan (EXPLAIN, sans ANALYZE : la requête n'est pas rejouée) des requêtes lentes, Postgres uniquement
+DB_SLOW_QUERY_EXPLAIN = os.getenv("DB_SLOW_QUERY_EXPLAIN", "1") == "1"
+
+# Routes servies par le driver asyncio (asyncpg) ; 0 = sessions synchrones dans le threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "1") == "1"
+
+# ========== RÉPLIQUE EN LECTURE ==========
+
+# Après une écriture, les lectures du même client vont sur la base principale pendant
+# cette durée (secondes) : couvre le retard de réplication
+REPLICA_READ_YOUR_WRITES_SECONDS = float(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", "10"))
+
+# ========== MÉTRIQUES ==========
+
+# Endpoint Prometheus /metrics et mesure des requêtes HTTP (latences par route, requêtes SQL)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
@@ -0,0 +1,130 @@
+# backend/app/core/metriques.py
+"""
+Métriques Prometheus de l'API, exposées par GET /metrics.
+
+Avec plusieurs workers uvicorn, définir PROMETHEUS_MULTIPROC_DIR (répertoire
+vidé avant le démarrage) : chaque processus y écrit ses valeurs et /metrics
+les agrège.
+"""
+import os
+import time
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+from app.db.compteur_requetes import compter_requetes
+
+
+MULTIPROCESSUS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Routes non reconnues (404) regroupées : pas une série par URL inventée
+ROUTE_INCONNUE = "non_routee"
+
+BUCKETS_SQL = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# ===== REQUÊTES HTTP =====
+
+REQUETES_HTTP = Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ["method", "route", "status"]
+)
+DUREE_HTTP = Histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP (jusqu'au dernier octet envoyé)", ["method", "route"]
+)
+REQUETES_EN_COURS = Gauge(
+    "http_requests_in_flight", "Requêtes HTTP en cours de traitement", multiprocess_mode="livesum"
+)
+
+# ===== BASE DE DONNÉES =====
+
+REQUETES_SQL = Counter(
+    "db_queries_total", "Requêtes SQL exécutées, par route HTTP", ["route"]
+)
+DUREE_SQL = Histogram(
+    "db_query_duration_seconds", "Durée des requêtes SQL, par route HTTP", ["route"], buckets=BUCKETS_SQL
+)
+REQUETES_SQL_PAR_REQUETE = Histogram(
+    "db_queries_per_request", "Requêtes SQL par requête HTTP", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+ATTENTE_POOL = Histogram(
+    "db_pool_checkout_wait_seconds", "Attente d'une connexion libre du pool", ["pool"], buckets=BUCKETS_SQL + (10.0, 30.0)
+)
+
+# ===== TRAVAUX LOURDS =====
+
+DUREE_PDF = Histogram(
+    "pdf_render_seconds", "Génération d'un PDF, attente dans le pool comprise", ["document"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DUREE_HACHAGE = Histogram(
+    "password_hash_seconds", "Calcul bcrypt (hachage ou vérification)", ["operation"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# ===== CHECKOUT =====
+
+CHECKOUTS = Counter(
+    "checkouts_total", "Validations de panier, par résultat et raison d'échec", ["result", "reason"]
+)
+
+
+def _route(scope) -> str:
+    """Modèle de chemin de la route servie (/api/tickets/{ticket_id}/download-pdf), pas l'URL"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or ROUTE_INCONNUE
+
+
+class MiddlewareMetriques:
+    """
+    Middleware ASGI : latence, statut et requêtes SQL de chaque requête HTTP, par route.
+
+    ASGI pur plutôt que BaseHTTPMiddleware : pas de tâche supplémentaire par
+    requête, et les réponses en streaming (portefeuille PDF) sont mesurées
+    jusqu'au dernier octet.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statut = 500
+
+        async def envoyer(message):
+            nonlocal statut
+            if message["type"] == "http.response.start":
+                statut = message["status"]
+            await send(message)
+
+        REQUETES_EN_COURS.inc()
+        debut = time.perf_counter()
+        try:
+            with compter_requetes() as compteur:
+                await self.app(scope, receive, envoyer)
+        finally:
+            duree = time.perf_counter() - debut
+            REQUETES_EN_COURS.dec()
+            route, methode = _route(scope), scope["method"]
+            REQUETES_HTTP.labels(methode, route, str(statut)).inc()
+            DUREE_HTTP.labels(methode, route).observe(duree)
+            REQUETES_SQL_PAR_REQUETE.labels(route).observe(compteur.total)
+            if compteur.total:
+                REQUETES_SQL.labels(route).inc(compteur.total)
+                histogramme_sql = DUREE_SQL.labels(route)
+                for duree_sql in compteur.durees:
+                    histogramme_sql.observe(duree_sql)
+
+
+def exposer() -> bytes:
+    """Texte au format Prometheus de toutes les métriques (de tous les workers en multiprocessus)"""
+    if MULTIPROCESSUS:
+        registre = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registre)
+        return generate_latest(registre)
+    return generate_latest(REGISTRY)
+
+
+def arreter_metriques():
+    """Arrêt du worker : ses jauges « live » ne comptent plus dans l'agrégat"""
+    if MULTIPROCESSUS:
+        multiprocess.mark_process_dead(os.getpid())
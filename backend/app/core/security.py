@@ -1,9 +1,106 @@
-from passlib.context import CryptContext
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import bcrypt
+from app.core.config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+from app.core.metriques import DUREE_HACHAGE
+
+# bcrypt ne lit que les 72 premiers octets (et bcrypt >= 5 refuse les mots de passe plus longs)
+LONGUEUR_MAX_BCRYPT = 72
+
+
+def _octets(password: str) -> bytes:
+    return password.encode('utf-8')[:LONGUEUR_MAX_BCRYPT]
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated = "auto")
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(_octets(password), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(_octets(plain_password), hashed_password.encode('utf-8'))
+    except ValueError:
+        # Hachage illisible (pas un hachage bcrypt)
+        return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Le hachage a été calculé avec un autre coût que BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _chronometrer(operation: str, fonction, *args):
+    """Exécute un calcul bcrypt dans le thread du pool et mesure sa durée (hors attente)"""
+    debut = time.perf_counter()
+    try:
+        return fonction(*args)
+    finally:
+        DUREE_HACHAGE.labels(operation).observe(time.perf_counter() - debut)
+
+
+class HachageSatureError(Exception):
+    """Levée quand trop de hachages de mots de passe sont déjà en cours ou en attente"""
+
+
+class PasswordHashPool:
+    """
+    Pool borné pour les calculs bcrypt (inscription, connexion).
+
+    Un hachage au coût par défaut occupe un cœur pendant des centaines de
+    millisecondes : calculé dans le threadpool de Starlette, un pic de
+    connexions à l'ouverture des ventes priverait le catalogue de threads.
+    bcrypt libère le GIL, des threads dédiés suffisent. Au-delà de
+    `max_en_attente` calculs en cours ou en attente, la demande est
+    refusée immédiatement plutôt que mise en file.
+    """
+
+    def __init__(self, workers: int, max_en_attente: int):
+        self.workers = workers
+        self.max_en_attente = max_en_attente
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._en_cours = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    @property
+    def en_cours(self) -> int:
+        return self._en_cours
+
+    async def executer(self, fonction, *args, operation: str = "autre"):
+        """Exécute `fonction(*args)` dans le pool ; lève HachageSatureError si la file est pleine"""
+        with self._lock:
+            if self._en_cours >= self.max_en_attente:
+                raise HachageSatureError()
+            self._en_cours += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), _chronometrer, operation, fonction, *args)
+        finally:
+            with self._lock:
+                self._en_cours -= 1
+
+    async def hacher(self, password: str) -> str:
+        return await self.executer(get_password_hash, password, operation="hachage")
+
+    async def verifier(self, password: str, hashed_password: str) -> bool:
+        return await self.executer(verify_password, password, hashed_password, operation="verification")
+
+    def arreter(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
@@ -0,0 +1,95 @@
+# backend/app/core/tokens.py
+import time
+from functools import lru_cache
+from typing import Dict
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from app.core.config import (
+    JWT_SECRET_KEY,
+    JWT_INSECURE_DEV_KEY,
+    JWT_ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_MINUTES,
+)
+
+
+# Types de jetons : un jeton de rafraîchissement n'ouvre pas les routes protégées
+TYPE_ACCES = "access"
+TYPE_RAFRAICHISSEMENT = "refresh"
+
+
+# Clé publique (dans ce dépôt) : n'importe qui peut signer un jeton avec, rôle admin compris
+CLE_DEVELOPPEMENT = "cle_locale_de_developpement_uniquement"
+
+
+class TokenInvalideError(Exception):
+    """Jeton mal formé, mal signé, expiré ou du mauvais type"""
+
+
+class CleSignatureManquanteError(RuntimeError):
+    """JWT_SECRET_KEY n'est pas définie (et la clé de développement n'est pas autorisée)"""
+
+
+@lru_cache(maxsize=1)
+def _cle_signature() -> Key:
+    """
+    Clé construite une seule fois par processus.
+
+    Avec une chaîne, python-jose reconstruit l'objet clé (et tente de la
+    lire comme du JSON) à chaque signature et à chaque vérification.
+    """
+    if JWT_SECRET_KEY:
+        return jwk.construct(JWT_SECRET_KEY, JWT_ALGORITHM)
+    if not JWT_INSECURE_DEV_KEY:
+        raise CleSignatureManquanteError(
+            "JWT_SECRET_KEY n'est pas définie : générez une clé (python -c \"import secrets; print(secrets.token_urlsafe(48))\"), "
+            "ou JWT_INSECURE_DEV_KEY=1 en développement uniquement"
+        )
+    print("⚠️ JWT_SECRET_KEY absente : jetons signés avec la clé de développement (JWT_INSECURE_DEV_KEY=1)")
+    return jwk.construct(CLE_DEVELOPPEMENT, JWT_ALGORITHM)
+
+
+def verifier_cle_signature():
+    """Au démarrage : sans clé de signature, l'API ne démarre pas (plutôt que d'accepter des jetons forgés)"""
+    _cle_signature()
+
+
+def _creer_token(user_id: int, role: str, type_token: str, duree_minutes: int) -> str:
+    maintenant = int(time.time())
+    claims = {
+        "sub": str(user_id),
+        "role": role,
+        "type": type_token,
+        "iat": maintenant,
+        "exp": maintenant + duree_minutes * 60,
+    }
+    return jwt.encode(claims, _cle_signature(), algorithm=JWT_ALGORITHM)
+
+
+def creer_access_token(user_id: int, role: str) -> str:
+    return _creer_token(user_id, role, TYPE_ACCES, ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def creer_refresh_token(user_id: int, role: str) -> str:
+    return _creer_token(user_id, role, TYPE_RAFRAICHISSEMENT, REFRESH_TOKEN_EXPIRE_MINUTES)
+
+
+def creer_tokens(user_id: int, role: str) -> Dict:
+    """Réponse d'authentification : jeton d'accès et jeton de rafraîchissement"""
+    return {
+        "access_token": creer_access_token(user_id, role),
+        "refresh_token": creer_refresh_token(user_id, role),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def decoder_token(token: str, type_attendu: str = TYPE_ACCES) -> Dict:
+    """Claims d'un jeton vérifié en mémoire (signature, expiration, type), sans accès à la base"""
+    try:
+        claims = jwt.decode(token, _cle_signature(), algorithms=[JWT_ALGORITHM])
+    except JWTError as e:
+        raise TokenInvalideError(str(e))
+    if claims.get("type") != type_attendu or not str(claims.get("sub", "")).isdigit():
+        raise TokenInvalideError("Type de jeton inattendu")
+    return claims
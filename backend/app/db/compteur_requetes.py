@@ -0,0 +1,126 @@
+# backend/app/db/compteur_requetes.py
+import contextlib
+import sys
+import time
+import traceback
+from contextvars import ContextVar
+from pathlib import Path
+from typing import List, Optional, Tuple
+import greenlet
+from sqlalchemy import event
+
+
+# En-tête de réponse portant le nombre de requêtes SQL (DB_QUERY_COUNT_HEADER=1)
+EN_TETE_REQUETES_SQL = "X-DB-Queries"
+
+# Seules les lignes du projet (backend/) figurent dans les piles d'appel relevées,
+# hors middlewares de mesure qui enveloppent toutes les requêtes
+RACINE_PROJET = str(Path(__file__).resolve().parents[2])
+FICHIERS_INSTRUMENTATION = {
+    __file__,
+    str(Path(__file__).with_name("detection_n_plus_1.py")),
+    str(Path(__file__).resolve().parents[1] / "core" / "metriques.py"),
+}
+
+
+class CompteurRequetes:
+    """
+    Requêtes SQL exécutées pendant un bloc `compter_requetes()`, avec leurs durées (secondes).
+
+    Avec `detail`, garde aussi le texte de chaque requête (et avec `piles`,
+    la pile d'appel qui l'a émise) dans `requetes`.
+    """
+
+    def __init__(self, parent: Optional["CompteurRequetes"] = None, detail: bool = False, piles: bool = False):
+        # Blocs imbriqués (métriques, en-tête X-DB-Queries) : chaque requête compte pour tous
+        self.parent = parent
+        self.total = 0
+        self.durees: List[float] = []
+        self.piles = piles
+        self.requetes: Optional[List[Tuple[str, Optional[traceback.StackSummary]]]] = [] if detail or piles else None
+
+
+# Porté par le contexte de la requête : suit la session dans le threadpool
+# (run_in_threadpool copie le contexte) comme dans les greenlets d'AsyncSession
+_compteur_courant: ContextVar[Optional[CompteurRequetes]] = ContextVar("compteur_requetes_sql", default=None)
+
+
+def pile_appel() -> traceback.StackSummary:
+    """
+    Pile d'appel courante, limitée aux fichiers du projet.
+
+    Sous AsyncSession, la requête part d'un greenlet de SQLAlchemy dont la
+    pile s'arrête à greenlet_spawn : on la prolonge par celle du greenlet
+    parent, suspendu dans la route qui a fait `await session.exec(...)`.
+    """
+    cadres = []
+    cadre, courant = sys._getframe(1), greenlet.getcurrent()
+    while cadre is not None:
+        while cadre is not None:
+            cadres.append(cadre)
+            cadre = cadre.f_back
+        courant = courant.parent
+        cadre = courant.gr_frame if courant is not None else None
+    cadres.reverse()
+    return traceback.StackSummary.extract(
+        (
+            (c, c.f_lineno) for c in cadres
+            if c.f_code.co_filename.startswith(RACINE_PROJET) and c.f_code.co_filename not in FICHIERS_INSTRUMENTATION
+        ),
+        lookup_lines=True,
+    )
+
+
+def _avant_execution(conn, cursor, statement, parameters, context, executemany):
+    compteur = _compteur_courant.get()
+    if compteur is None:
+        return
+    if context is not None:
+        context._debut_requete_compteur = time.perf_counter()
+    pile = None
+    while compteur is not None:
+        compteur.total += 1
+        if compteur.requetes is not None:
+            if compteur.piles and pile is None:
+                pile = pile_appel()
+            compteur.requetes.append((statement, pile if compteur.piles else None))
+        compteur = compteur.parent
+
+
+def _apres_execution(conn, cursor, statement, parameters, context, executemany):
+    # Requêtes en erreur : comptées, sans durée
+    compteur = _compteur_courant.get()
+    debut = getattr(context, "_debut_requete_compteur", None)
+    if compteur is None or debut is None:
+        return
+    duree = time.perf_counter() - debut
+    while compteur is not None:
+        compteur.durees.append(duree)
+        compteur = compteur.parent
+
+
+def instrumenter(moteur):
+    """Compte les requêtes d'un engine (synchrone ou asyncio) ; sans compteur actif, coût négligeable"""
+    moteur_sync = getattr(moteur, "sync_engine", moteur)
+    for nom, fonction in (("before_cursor_execute", _avant_execution), ("after_cursor_execute", _apres_execution)):
+        if not event.contains(moteur_sync, nom, fonction):
+            event.listen(moteur_sync, nom, fonction)
+
+
+@contextlib.contextmanager
+def compter_requetes(detail: bool = False, piles: bool = False):
+    """
+    Compte les requêtes SQL exécutées dans le bloc, tous engines instrumentés confondus.
+
+        with compter_requetes() as compteur:
+            ...
+        print(compteur.total)
+
+    `detail` garde le texte des requêtes, `piles` leur pile d'appel (coûteux : développement et tests).
+    """
+    compteur = CompteurRequetes(_compteur_courant.get(), detail=detail, piles=piles)
+    jeton = _compteur_courant.set(compteur)
+    try:
+        yield compteur
+    finally:
+        _compteur_courant.reset(jeton)
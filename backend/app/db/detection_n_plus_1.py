@@ -0,0 +1,141 @@
+# backend/app/db/detection_n_plus_1.py
+"""
+Détection des requêtes N+1 et budgets de requêtes SQL.
+
+Une requête N+1 est la même requête SQL, aux valeurs près, exécutée en
+boucle dans un même bloc (typiquement un `session.get` par ligne d'un
+résultat). `surveiller_requetes()` la signale dans les tests,
+MiddlewareDetectionNPlus1 la journalise avec sa pile d'appel en
+développement (DB_N_PLUS_1_LOG=1).
+"""
+import contextlib
+import re
+from collections import Counter
+from typing import List, Optional
+from app.core.config import DB_N_PLUS_1_THRESHOLD, DB_QUERY_BUDGET
+from app.db.compteur_requetes import CompteurRequetes, compter_requetes
+
+
+_RE_CHAINES = re.compile(r"'(?:[^']|'')*'")
+_RE_NOMBRES = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+# Paramètres des trois dialectes : psycopg2 %(nom)s, asyncpg $1 (éventuellement typé $1::INTEGER), SQLite ?
+_RE_PARAMETRE = r"(?:%\(\w+\)s|\$\d+(?:::\w+)?|\?)"
+_RE_LISTES = re.compile(r"\(\s*" + _RE_PARAMETRE + r"(?:\s*,\s*" + _RE_PARAMETRE + r")*\s*\)")
+
+
+class RequetesExcessivesError(AssertionError):
+    """Budget de requêtes SQL dépassé ou requête répétée (N+1) dans un bloc surveillé"""
+
+
+class Repetition:
+    """Requête exécutée `nombre` fois dans le bloc, avec la pile d'appel de sa première exécution"""
+
+    def __init__(self, empreinte: str, nombre: int, pile=None):
+        self.empreinte = empreinte
+        self.nombre = nombre
+        self.pile = pile
+
+    def __str__(self) -> str:
+        texte = f"{self.nombre} x {self.empreinte[:300]}"
+        if self.pile:
+            texte += "\n" + "".join(self.pile.format()).rstrip()
+        return texte
+
+    def resume(self) -> str:
+        """Une ligne : nombre, début de la requête et ligne du projet qui l'a émise"""
+        texte = f"{self.nombre} x {self.empreinte[:120]}"
+        if self.pile:
+            cadre = self.pile[-1]
+            texte += f" ({cadre.filename}:{cadre.lineno} in {cadre.name})"
+        return texte
+
+
+def empreinte(statement: str) -> str:
+    """
+    Forme d'une requête sans ses valeurs : deux requêtes de même structure ont la même empreinte.
+
+    Les chaînes et nombres littéraux deviennent `?`, les listes de
+    paramètres d'un IN (une entrée par valeur) une seule `(?)`.
+    """
+    forme = _RE_CHAINES.sub("?", statement)
+    forme = _RE_NOMBRES.sub("?", forme)
+    forme = _RE_LISTES.sub("(?)", forme)
+    return " ".join(forme.split())
+
+
+def regrouper(compteur: CompteurRequetes) -> List[Repetition]:
+    """Requêtes du bloc (compteur ouvert avec `detail`) regroupées par empreinte, les plus fréquentes d'abord"""
+    nombres = Counter()
+    piles = {}
+    for statement, pile in compteur.requetes or []:
+        forme = empreinte(statement)
+        nombres[forme] += 1
+        piles.setdefault(forme, pile)
+    return [Repetition(forme, nombre, piles[forme]) for forme, nombre in nombres.most_common()]
+
+
+def repetitions(compteur: CompteurRequetes, seuil: int = DB_N_PLUS_1_THRESHOLD) -> List[Repetition]:
+    """Requêtes exécutées au moins `seuil` fois dans le bloc"""
+    return [repetition for repetition in regrouper(compteur) if repetition.nombre >= seuil]
+
+
+def problemes(compteur: CompteurRequetes, budget: Optional[int] = None, seuil: int = DB_N_PLUS_1_THRESHOLD) -> List[str]:
+    """Dépassement du budget et requêtes répétées (`seuil` 0 : non recherchées), en messages lisibles"""
+    messages = []
+    if budget is not None and compteur.total > budget:
+        messages.append(
+            f"{compteur.total} requêtes SQL pour un budget de {budget} :"
+            + "".join(f"\n  - {repetition.resume()}" for repetition in regrouper(compteur))
+        )
+    if seuil:
+        for repetition in repetitions(compteur, seuil):
+            messages.append(f"Requête répétée (N+1) : {repetition}")
+    return messages
+
+
+@contextlib.contextmanager
+def surveiller_requetes(budget: Optional[int] = None, seuil: int = DB_N_PLUS_1_THRESHOLD, piles: bool = True):
+    """
+    Lève RequetesExcessivesError à la sortie du bloc si plus de `budget`
+    requêtes SQL y ont été exécutées, ou si une même requête l'a été au
+    moins `seuil` fois (0 = pas de détection des N+1).
+
+        with surveiller_requetes(budget=2):
+            client.get(f"/api/tickets/user/{user_id}")
+    """
+    with compter_requetes(detail=True, piles=piles) as compteur:
+        yield compteur
+    messages = problemes(compteur, budget, seuil)
+    if messages:
+        raise RequetesExcessivesError("\n".join(messages))
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "?")
+
+
+class MiddlewareDetectionNPlus1:
+    """
+    Middleware ASGI de développement : journalise les requêtes HTTP qui
+    dépassent DB_QUERY_BUDGET ou répètent une requête SQL, avec la ligne du
+    projet qui l'a émise. Relever les piles d'appel est coûteux : jamais en
+    production.
+    """
+
+    def __init__(self, app, budget: Optional[int] = DB_QUERY_BUDGET or None, seuil: int = DB_N_PLUS_1_THRESHOLD):
+        self.app = app
+        self.budget = budget
+        self.seuil = seuil
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with compter_requetes(piles=True) as compteur:
+            await self.app(scope, receive, send)
+
+        messages = problemes(compteur, self.budget, self.seuil)
+        if messages:
+            print(f"⚠️ {scope['method']} {_route(scope)} : " + "\n".join(messages))
@@ -0,0 +1,56 @@
+# backend/app/db/pytest_requetes.py
+"""
+Plugin pytest : budgets de requêtes SQL et détection des N+1 dans les tests.
+
+Activé par `pytest -p app.db.pytest_requetes` (ou `pytest_plugins` d'un
+conftest.py). Deux formes :
+
+    def test_historique(client, requetes_sql):
+        with requetes_sql(budget=2):
+            client.get(f"/api/tickets/user/{user_id}", headers=headers)
+
+    @pytest.mark.budget_requetes(3)
+    def test_panier(client):
+        ...
+
+Le test échoue si le budget est dépassé ou si une même requête est
+répétée (DB_N_PLUS_1_THRESHOLD fois, ou `seuil=`), avec la ligne du
+projet qui l'a émise. Le comptage suit la requête dans le TestClient.
+"""
+import pytest
+from app.core.config import DB_N_PLUS_1_THRESHOLD
+from app.db.compteur_requetes import compter_requetes
+from app.db.detection_n_plus_1 import problemes, surveiller_requetes
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "budget_requetes(budget=None, seuil=DB_N_PLUS_1_THRESHOLD): échoue au-delà de `budget` requêtes SQL "
+        "ou si une requête est répétée `seuil` fois (0 = pas de détection des N+1)",
+    )
+
+
+@pytest.fixture
+def requetes_sql():
+    """Gestionnaire de contexte `surveiller_requetes(budget=None, seuil=..., piles=True)`"""
+    return surveiller_requetes
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marque = item.get_closest_marker("budget_requetes")
+    if marque is None:
+        yield
+        return
+
+    budget = marque.args[0] if marque.args else marque.kwargs.get("budget")
+    seuil = marque.kwargs.get("seuil", DB_N_PLUS_1_THRESHOLD)
+    with compter_requetes(piles=True) as compteur:
+        resultat = yield
+
+    # Un test déjà en échec garde son erreur d'origine
+    if resultat.excinfo is None:
+        messages = problemes(compteur, budget, seuil)
+        if messages:
+            resultat.force_exception(pytest.fail.Exception("\n".join(messages), pytrace=False))
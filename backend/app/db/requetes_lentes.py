@@ -0,0 +1,256 @@
+# backend/app/db/requetes_lentes.py
+"""
+Journal des requêtes SQL lentes (DB_SLOW_QUERY_MS > 0).
+
+Chaque requête plus longue que le seuil est gardée dans un tampon
+circulaire, lu par GET /api/admin/db/requetes-lentes, et si
+DB_SLOW_QUERY_LOG_FILE est défini ajoutée à un fichier JSON lines : texte,
+paramètres masqués, route HTTP d'origine et plan d'exécution. Contrairement
+à DB_ECHO, les requêtes rapides ne coûtent qu'une mesure de durée.
+"""
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
+from sqlalchemy import event
+from app.core.config import (
+    DB_SLOW_QUERY_MS,
+    DB_SLOW_QUERY_BUFFER,
+    DB_SLOW_QUERY_LOG_FILE,
+    DB_SLOW_QUERY_EXPLAIN,
+)
+from app.db.detection_n_plus_1 import empreinte
+
+logger = logging.getLogger(__name__)
+
+
+# Requêtes dont on demande le plan ; EXPLAIN sans ANALYZE ne les exécute pas
+_RE_EXPLICABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+# Le plan d'une même requête (aux valeurs près) n'est redemandé qu'après ce délai (secondes)
+DUREE_CACHE_PLANS = 60
+
+# Lignes en attente d'écriture dans DB_SLOW_QUERY_LOG_FILE ; au-delà, les suivantes ne sont pas écrites
+TAILLE_FILE_ECRITURE = 10000
+
+# Requête HTTP en cours (scope ASGI), posée par MiddlewareRouteSQL
+_requete_http: ContextVar[Optional[dict]] = ContextVar("requete_http_sql", default=None)
+
+
+def masquer(valeur):
+    """Paramètre journalisable : nombres, booléens et dates gardés, textes (emails, hachages, clés) masqués"""
+    if valeur is None or isinstance(valeur, (bool, int, float)):
+        return valeur
+    if isinstance(valeur, Decimal):
+        return float(valeur)
+    if isinstance(valeur, (datetime, date)):
+        return valeur.isoformat()
+    if isinstance(valeur, str):
+        return f"<texte:{len(valeur)}>"
+    if isinstance(valeur, (bytes, bytearray, memoryview)):
+        return f"<binaire:{len(valeur)}>"
+    if isinstance(valeur, (list, tuple)):
+        return [masquer(v) for v in valeur]
+    return f"<{type(valeur).__name__}>"
+
+
+def _masquer_parametres(parameters, executemany: bool):
+    if executemany:
+        lignes = list(parameters)
+        return {"lignes": len(lignes), "premieres": [_masquer_parametres(p, False) for p in lignes[:3]]}
+    if isinstance(parameters, dict):
+        return {nom: masquer(valeur) for nom, valeur in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [masquer(valeur) for valeur in parameters]
+    return None
+
+
+def _route_courante() -> Optional[str]:
+    """« GET /api/tickets/user/{user_id} » ; None hors requête HTTP (balayeur, écoute NOTIFY)"""
+    scope = _requete_http.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', None) or scope.get('path')}"
+
+
+class JournalRequetesLentes:
+    """Tampon circulaire (et fichier optionnel) des requêtes SQL plus longues que `seuil_ms`"""
+
+    def __init__(self, seuil_ms: float, taille: int, fichier: str = "", expliquer: bool = True):
+        self.seuil_ms = seuil_ms
+        self.fichier = fichier
+        self.expliquer = expliquer
+        self.total = 0
+        self.non_ecrites = 0
+        self._entrees = deque(maxlen=taille)
+        self._plans = {}
+        self._lock = threading.Lock()
+        # Le fichier est écrit par un thread dédié : l'enregistrement se fait dans le greenlet
+        # de la requête (boucle d'événements avec asyncpg), qui ne doit jamais attendre le disque
+        self._a_ecrire = queue.Queue(maxsize=TAILLE_FILE_ECRITURE)
+        self._ecrivain: Optional[threading.Thread] = None
+
+    @property
+    def actif(self) -> bool:
+        return self.seuil_ms > 0
+
+    def instrumenter(self, moteur):
+        """Mesure les requêtes d'un engine (synchrone ou asyncio)"""
+        moteur_sync = getattr(moteur, "sync_engine", moteur)
+        for nom, fonction in (("before_cursor_execute", self._avant_execution), ("after_cursor_execute", self._apres_execution)):
+            if not event.contains(moteur_sync, nom, fonction):
+                event.listen(moteur_sync, nom, fonction)
+
+    def _avant_execution(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._debut_requete_lente = time.perf_counter()
+
+    def _apres_execution(self, conn, cursor, statement, parameters, context, executemany):
+        debut = getattr(context, "_debut_requete_lente", None)
+        if debut is None:
+            return
+        duree_ms = (time.perf_counter() - debut) * 1000
+        if duree_ms < self.seuil_ms:
+            return
+        # Le journal ne doit jamais faire échouer la requête qu'il observe
+        try:
+            self.enregistrer({
+                "horodatage": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "duree_ms": round(duree_ms, 2),
+                "route": _route_courante(),
+                "requete": statement,
+                "parametres": _masquer_parametres(parameters, executemany),
+                "plan": self._plan(conn, statement, parameters, executemany),
+            })
+        except Exception:
+            logger.exception("Journal des requêtes lentes : enregistrement impossible")
+
+    def _plan(self, conn, statement: str, parameters, executemany: bool) -> Optional[str]:
+        """
+        Plan de la requête (EXPLAIN, sans ANALYZE), sur la même connexion et dans la même transaction.
+
+        Un savepoint isole l'EXPLAIN : en cas d'erreur, la transaction de la
+        requête observée reste utilisable. Postgres uniquement.
+        """
+        if not self.expliquer or executemany or conn.dialect.name != "postgresql" or not _RE_EXPLICABLE.match(statement):
+            return None
+
+        forme = empreinte(statement)
+        maintenant = time.monotonic()
+        with self._lock:
+            en_cache = self._plans.get(forme)
+        if en_cache is not None and maintenant - en_cache[0] < DUREE_CACHE_PLANS:
+            return en_cache[1]
+
+        # Curseur DBAPI direct : l'EXPLAIN ne repasse pas par les événements de l'engine
+        curseur = conn.connection.cursor()
+        try:
+            curseur.execute("SAVEPOINT requete_lente_explain")
+            try:
+                curseur.execute(f"EXPLAIN (ANALYZE off) {statement}", parameters)
+                plan = "\n".join(ligne[0] for ligne in curseur.fetchall())
+                curseur.execute("RELEASE SAVEPOINT requete_lente_explain")
+            except Exception as e:
+                curseur.execute("ROLLBACK TO SAVEPOINT requete_lente_explain")
+                plan = f"EXPLAIN impossible : {type(e).__name__}: {str(e)}"
+        finally:
+            curseur.close()
+
+        with self._lock:
+            if len(self._plans) >= 1000:
+                self._plans.clear()
+            self._plans[forme] = (maintenant, plan)
+        return plan
+
+    def enregistrer(self, entree: dict):
+        with self._lock:
+            self._entrees.append(entree)
+            self.total += 1
+            if self.fichier and self._ecrivain is None:
+                self._ecrivain = threading.Thread(target=self._ecrire, name="journal-requetes-lentes", daemon=True)
+                self._ecrivain.start()
+        if self.fichier:
+            try:
+                self._a_ecrire.put_nowait(entree)
+            except queue.Full:
+                with self._lock:
+                    self.non_ecrites += 1
+
+    def _ecrire(self):
+        """Thread d'écriture du fichier : une ligne JSON par requête, par lots"""
+        while True:
+            entrees = [self._a_ecrire.get()]
+            while not self._a_ecrire.empty() and entrees[-1] is not None:
+                entrees.append(self._a_ecrire.get_nowait())
+            arret = entrees[-1] is None
+            lignes = [json.dumps(entree, ensure_ascii=False, default=str) + "\n" for entree in entrees if entree is not None]
+            try:
+                with open(self.fichier, "a", encoding="utf-8") as fichier:
+                    fichier.writelines(lignes)
+            except OSError as e:
+                with self._lock:
+                    self.non_ecrites += len(lignes)
+                logger.warning("Journal des requêtes lentes : écriture de %s impossible : %s", self.fichier, e)
+            if arret:
+                return
+
+    def arreter(self):
+        """Arrêt du worker : écrit les dernières lignes en attente"""
+        with self._lock:
+            ecrivain, self._ecrivain = self._ecrivain, None
+        if ecrivain is not None:
+            self._a_ecrire.put(None)
+            ecrivain.join(timeout=5)
+
+    def lister(self, limite: int = 50) -> List[dict]:
+        """Requêtes lentes en mémoire, les plus récentes d'abord"""
+        with self._lock:
+            return list(self._entrees)[::-1][:limite]
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
+            self._plans.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "actif": self.actif,
+                "seuil_ms": self.seuil_ms,
+                "enregistrees": self.total,
+                "en_memoire": len(self._entrees),
+                "capacite": self._entrees.maxlen,
+                "fichier": self.fichier or None,
+                "non_ecrites": self.non_ecrites,
+            }
+
+
+class MiddlewareRouteSQL:
+    """Middleware ASGI : rend la requête HTTP en cours visible du journal des requêtes lentes"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Le scope est complété par le routeur (scope["route"]) avant l'exécution de la route
+        jeton = _requete_http.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _requete_http.reset(jeton)
+
+
+journal_requetes_lentes = JournalRequetesLentes(
+    DB_SLOW_QUERY_MS, DB_SLOW_QUERY_BUFFER, DB_SLOW_QUERY_LOG_FILE, DB_SLOW_QUERY_EXPLAIN
+)
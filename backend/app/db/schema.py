@@ -0,0 +1,54 @@
+# backend/app/db/schema.py
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from app.db.session import engine
+
+
+# backend/alembic.ini : les migrations sont dans backend/migrations
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+class SchemaNonAJourError(RuntimeError):
+    """La base n'est pas à la version de schéma attendue par ce code"""
+
+
+def _config_alembic() -> Config:
+    return Config(str(ALEMBIC_INI))
+
+
+def version_attendue() -> set:
+    """Révision(s) de tête des migrations livrées avec ce code"""
+    return set(ScriptDirectory.from_config(_config_alembic()).get_heads())
+
+
+def version_base(moteur=engine) -> set:
+    """Révision(s) enregistrées dans la table alembic_version (vide si jamais migrée)"""
+    with moteur.connect() as connexion:
+        return set(MigrationContext.configure(connexion).get_current_heads())
+
+
+def verifier_version_schema(moteur=engine):
+    """
+    Vérifie au démarrage que la base est à la dernière migration.
+
+    Aucun DDL ici : les migrations sont appliquées une seule fois par
+    `alembic upgrade head` avant le lancement des workers.
+    """
+    attendue, actuelle = version_attendue(), version_base(moteur)
+    if actuelle != attendue:
+        raise SchemaNonAJourError(
+            f"Schéma de la base en version {sorted(actuelle) or 'aucune'}, attendu {sorted(attendue)} : "
+            f"lancez `alembic upgrade head` depuis backend/"
+        )
+
+
+def appliquer_migrations(moteur=engine):
+    """Applique les migrations manquantes (outils et benchmarks, pas le démarrage de l'API)"""
+    config = _config_alembic()
+    # Connexion sans transaction ouverte : env.py valide chaque migration séparément
+    with moteur.connect() as connexion:
+        config.attributes["connection"] = connexion
+        command.upgrade(config, "head")
@@ -1,25 +1,32 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel
-from app.db.session import engine
+from app.db.schema import verifier_version_schema
+from app.db.compteur_requetes import EN_TETE_REQUETES_SQL, compter_requetes
+from app.db.detection_n_plus_1 import MiddlewareDetectionNPlus1
+from app.db.requetes_lentes import MiddlewareRouteSQL, journal_requetes_lentes
+from app.db.session import async_engine, async_read_engine
 from app.api.endpoints import router as api_router
-from app.api.routes import admin
+from app.api.routes import admin, metriques
 
-# Import des modèles EXISTANTS pour créer les tables
+# Import des modèles EXISTANTS
 from app.models.user import User
 from app.models.offer import Offer
 from app.models.ticket import Ticket
 
 # Import des NOUVEAUX modèles
 from app.models.sport import Sport, Epreuve, TicketEpreuve
-from app.models.panier import PanierItem
+from app.models.panier import PanierItem, SeatHold
 
 # Import des routes
 from app.api.routes import auth, sports, panier, tickets  # ← Ajouter tickets
-
-# Cette fonction crée les tables au démarrage
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+from app.core.config import SEAT_HOLD_SWEEP_INTERVAL_SECONDS, DB_QUERY_COUNT_HEADER, METRICS_ENABLED, DB_N_PLUS_1_LOG
+from app.core.metriques import MiddlewareMetriques, arreter_metriques
+from app.core.security import password_hash_pool
+from app.core.tokens import verifier_cle_signature
+from app.services.hold_service import boucle_liberation_holds
+from app.services.invalidation_bus import invalidation_listener
+from app.services.pdf_executor import pdf_render_pool
 
 app = FastAPI(title="Olympic Ticketing API - Paris 2024")
 
@@ -37,13 +44,78 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Autorise toutes les méthodes (GET, POST, etc.)
     allow_headers=["*"],  # Autorise tous les headers
+    expose_headers=["X-Next-Cursor"],  # Curseur de pagination lisible par le frontend
 )
 
+if DB_QUERY_COUNT_HEADER:
+    @app.middleware("http")
+    async def entete_requetes_sql(request: Request, call_next):
+        # Requêtes SQL de la requête HTTP, lues par les benchmarks (benchmarks/bench_api.py)
+        with compter_requetes() as compteur:
+            response = await call_next(request)
+        response.headers[EN_TETE_REQUETES_SQL] = str(compteur.total)
+        return response
+
+if DB_N_PLUS_1_LOG:
+    # Développement : requêtes SQL répétées (N+1) et budgets dépassés journalisés avec leur pile d'appel
+    app.add_middleware(MiddlewareDetectionNPlus1)
+
+if journal_requetes_lentes.actif:
+    # Route HTTP d'origine des requêtes lentes (GET /api/admin/db/requetes-lentes)
+    app.add_middleware(MiddlewareRouteSQL)
+
+if METRICS_ENABLED:
+    # Ajouté en dernier : enveloppe toute la pile, erreurs et CORS compris
+    app.add_middleware(MiddlewareMetriques)
+
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
-    print("✅ Base de données initialisée")
-    print("📊 Tables créées: User, Offer, Ticket, Sport, Epreuve, TicketEpreuve, PanierItem")
+    # Sans JWT_SECRET_KEY, n'importe qui pourrait signer des jetons (rôle admin compris)
+    verifier_cle_signature()
+    # Le schéma est créé et migré par `alembic upgrade head`, jamais par les workers
+    verifier_version_schema()
+    print("✅ Schéma de la base à jour")
+
+@app.on_event("startup")
+async def demarrer_liberation_holds():
+    # Tâche de fond qui remet en vente les places des blocages expirés
+    app.state.liberation_holds = asyncio.create_task(boucle_liberation_holds(SEAT_HOLD_SWEEP_INTERVAL_SECONDS))
+
+@app.on_event("shutdown")
+async def arreter_liberation_holds():
+    app.state.liberation_holds.cancel()
+
+@app.on_event("shutdown")
+def arreter_pool_pdf():
+    pdf_render_pool.arreter()
+
+@app.on_event("shutdown")
+def arreter_pool_hachage():
+    password_hash_pool.arreter()
+
+@app.on_event("startup")
+def demarrer_ecoute_invalidations():
+    # Applique les invalidations du catalogue publiées par les autres workers (Postgres uniquement)
+    invalidation_listener.demarrer()
+
+@app.on_event("shutdown")
+def arreter_ecoute_invalidations():
+    invalidation_listener.arreter()
+
+@app.on_event("shutdown")
+def fermer_metriques():
+    arreter_metriques()
+
+@app.on_event("shutdown")
+def arreter_journal_requetes_lentes():
+    # Dernières requêtes lentes en attente d'écriture dans DB_SLOW_QUERY_LOG_FILE
+    journal_requetes_lentes.arreter()
+
+@app.on_event("shutdown")
+async def fermer_engines_async():
+    # Ferme proprement les connexions asyncpg avant l'arrêt de la boucle
+    for moteur in {async_engine, async_read_engine} - {None}:
+        await moteur.dispose()
 
 # ========== INCLUSION DES ROUTES ==========
 
@@ -56,6 +128,8 @@ app.include_router(sports.router)    # /api/sports, /api/sports/{slug}
 app.include_router(panier.router)    # /api/panier/user/{user_id}
 app.include_router(tickets.router)   # /api/tickets/user/{user_id}
 app.include_router(admin.router)     # /api/admin/init_data
+if METRICS_ENABLED:
+    app.include_router(metriques.router) # /metrics (Prometheus)
 
 @app.get("/")
 def read_root():
@@ -1,4 +1,5 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from datetime import datetime
 
@@ -6,6 +7,8 @@ from datetime import datetime
 class PanierItem(SQLModel, table=True):
     """Items temporaires dans le panier avant validation"""
     __tablename__ = "panier_item"
+    # Panier d'un utilisateur dans l'ordre d'ajout
+    __table_args__ = (Index("ix_panier_item_user_id_id", "user_id", "id"),)
     
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
@@ -13,3 +16,16 @@ class PanierItem(SQLModel, table=True):
     offer_id: int = Field(foreign_key="offer.id")
     nombre_places: int = 1
     date_ajout: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SeatHold(SQLModel, table=True):
+    """Places bloquées pour un article du panier jusqu'à expiration"""
+    __tablename__ = "seat_hold"
+    
+    # Les places bloquées sont déjà retirées de places_disponibles :
+    # aucune lecture du stock n'a besoin de parcourir les paniers
+    id: Optional[int] = Field(default=None, primary_key=True)
+    panier_item_id: int = Field(foreign_key="panier_item.id", unique=True)
+    epreuve_id: int = Field(foreign_key="epreuve.id")
+    places: int
+    expire_le: datetime = Field(index=True)
@@ -26,20 +26,32 @@ class EpreuveBase(SQLModel):
     date_epreuve: datetime
     heure: str
     places_disponibles: int
-    sport_id: int = Field(foreign_key="sport.id")
+    sport_id: int = Field(foreign_key="sport.id", index=True)
 
 class Epreuve(EpreuveBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Nombre de compteurs fragmentés (1 = compteur unique sur la ligne epreuve)
+    nb_shards: int = Field(default=1)
     
     # Relations
     sport: Optional[Sport] = Relationship(back_populates="epreuves")
     tickets_vendus: List["TicketEpreuve"] = Relationship(back_populates="epreuve")  # Relation many-to-many avec Ticket via TicketEpreuve
 
+class EpreuveShard(SQLModel, table=True):
+    """Fragment du compteur de places d'une épreuve très demandée"""
+    __tablename__ = "epreuve_shard"
+    
+    # Les places d'une épreuve fragmentée = epreuve.places_disponibles + somme des fragments
+    epreuve_id: int = Field(foreign_key="epreuve.id", primary_key=True)
+    shard: int = Field(primary_key=True)
+    places_disponibles: int = Field(default=0)
+
 class TicketEpreuve(SQLModel, table=True):
     """Table de liaison entre Ticket et Epreuve (many-to-many)"""
     # ⚠️ PAS de champ 'id' pour une table de liaison !
     ticket_id: int = Field(foreign_key="ticket.id", primary_key=True)
-    epreuve_id: int = Field(foreign_key="epreuve.id", primary_key=True)
+    # La clé primaire (ticket_id, epreuve_id) ne sert pas les recherches par épreuve
+    epreuve_id: int = Field(foreign_key="epreuve.id", primary_key=True, index=True)
     nombre_places: int = Field(default=1)
     
     # Relations (avec strings pour éviter imports circulaires)
@@ -1,4 +1,5 @@
 from typing import Optional, List, TYPE_CHECKING
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 from datetime import datetime
 
@@ -9,8 +10,11 @@ if TYPE_CHECKING:
 
 # Modèle ticket de billetterie
 class Ticket(SQLModel, table=True):
+    # Historique d'un utilisateur, paginé par id : servi par l'index (user_id, id)
+    __table_args__ = (Index("ix_ticket_user_id_id", "user_id", "id"),)
+    
     id: Optional[int] = Field(default=None, primary_key=True)
-    clef_achat: str  # Clé générée lors de l'achat
+    clef_achat: str = Field(unique=True, index=True)  # Clé générée lors de l'achat
     qr_code_content: str  # Concatenation de la clé d'achat et de l'ID du ticket
     date_achat: datetime = Field(default_factory=datetime.utcnow)
     prix_total: float = 0.0  # Prix total payé
@@ -0,0 +1,178 @@
+# backend/app/services/catalog_cache_service.py
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlmodel import Session, select
+from app.core.config import CATALOG_CACHE_TTL_SECONDS, CATALOG_SEATS_TTL_SECONDS, REPLICA_READ_YOUR_WRITES_SECONDS
+from app.db.session import DATABASE_REPLICA_URL
+from app.models.offer import Offer
+from app.models.sport import Sport, Epreuve
+from app.services.inventory_service import InventoryService
+
+
+class CatalogCache:
+    """
+    Cache en lecture du catalogue (sports, épreuves, offres), par processus.
+
+    Deux durées de vie : les champs statiques du catalogue ne changent qu'avec
+    les routes admin et vivent `ttl_catalogue` secondes ; les compteurs de
+    places bougent à chaque achat et vivent `ttl_places` secondes. Les routes
+    qui modifient ces données appellent les hooks d'invalidation après leur
+    commit, les TTL ne servent que de filet de sécurité.
+
+    Les places ne sont jamais écrites à partir des valeurs connues par les
+    transactions : les commits concurrents arrivent dans n'importe quel ordre
+    et une ancienne valeur écraserait la nouvelle. Une modification invalide
+    l'épreuve, la prochaine lecture relit la base.
+
+    Avec une réplique, une lecture faite moins de `delai_replica` secondes
+    après une invalidation peut encore renvoyer l'ancienne valeur : elle est
+    servie mais pas mise en cache.
+    """
+
+    def __init__(self, ttl_catalogue: float, ttl_places: float, delai_replica: float = 0):
+        self.ttl_catalogue = ttl_catalogue
+        self.ttl_places = ttl_places
+        self.delai_replica = delai_replica
+        self._catalogue: Dict[str, tuple] = {}
+        self._places: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        # Incrémentées à chaque invalidation : une lecture commencée avant ne remplit pas le cache
+        self._generation = {"catalogue": 0, "places": 0}
+        self._invalide_a = {"catalogue": float("-inf"), "places": float("-inf")}
+        # Même garde par épreuve : pendant une ouverture des ventes, les achats sur une
+        # épreuve n'empêchent pas de mettre en cache les places des autres
+        self._generation_epreuve: Dict[int, int] = {}
+        self._invalide_a_epreuve: Dict[int, float] = {}
+        self._hits = {"catalogue": 0, "places": 0}
+        self._misses = {"catalogue": 0, "places": 0}
+
+    # ===== LECTURES =====
+
+    def _lire(self, clef: str, charger: Callable[[], object]):
+        """Lecture à travers le cache des données statiques"""
+        maintenant = time.monotonic()
+        with self._lock:
+            entree = self._catalogue.get(clef)
+            if entree is not None and entree[1] > maintenant:
+                self._hits["catalogue"] += 1
+                return entree[0]
+            self._misses["catalogue"] += 1
+            generation = self._generation["catalogue"]
+
+        valeur = charger()
+        # Pas de cache négatif : des slugs inventés rempliraient la mémoire
+        if valeur is not None and self.ttl_catalogue > 0:
+            with self._lock:
+                if generation == self._generation["catalogue"] and self._hors_retard_replica("catalogue", maintenant):
+                    self._catalogue[clef] = (valeur, maintenant + self.ttl_catalogue)
+        return valeur
+
+    def get_sports(self, session: Session) -> List[dict]:
+        return self._lire("sports", lambda: [s.dict() for s in session.exec(select(Sport)).all()])
+
+    def get_offers(self, session: Session) -> List[dict]:
+        return self._lire("offers", lambda: [o.dict() for o in session.exec(select(Offer)).all()])
+
+    def get_sport_detail(self, session: Session, slug: str) -> Optional[dict]:
+        """Détail d'un sport avec ses épreuves et leurs places à jour (None si inconnu)"""
+
+        def charger():
+            sport = session.exec(select(Sport).where(Sport.slug == slug)).first()
+            if not sport:
+                return None
+            epreuves = session.exec(select(Epreuve).where(Epreuve.sport_id == sport.id)).all()
+            return {"sport": sport.dict(), "epreuves": [e.dict() for e in epreuves]}
+
+        statique = self._lire(f"sport:{slug}", charger)
+        if statique is None:
+            return None
+
+        places = self.get_places(session, [e["id"] for e in statique["epreuves"]])
+        return {
+            **statique["sport"],
+            "epreuves": [{**e, "places_disponibles": places.get(e["id"], 0)} for e in statique["epreuves"]]
+        }
+
+    def get_places(self, session: Session, epreuve_ids: Iterable[int]) -> Dict[int, int]:
+        """Places disponibles ; seules les épreuves absentes ou expirées sont relues, en une requête"""
+        maintenant = time.monotonic()
+        resultat = {}
+        manquantes = []
+        with self._lock:
+            for epreuve_id in epreuve_ids:
+                entree = self._places.get(epreuve_id)
+                if entree is not None and entree[1] > maintenant:
+                    resultat[epreuve_id] = entree[0]
+                    self._hits["places"] += 1
+                else:
+                    manquantes.append(epreuve_id)
+                    self._misses["places"] += 1
+            generation = self._generation["places"]
+            generations = {epreuve_id: self._generation_epreuve.get(epreuve_id, 0) for epreuve_id in manquantes}
+
+        if manquantes:
+            relues = InventoryService.places_disponibles(session, manquantes)
+            resultat.update(relues)
+            if self.ttl_places > 0:
+                with self._lock:
+                    if generation != self._generation["places"] or not self._hors_retard_replica("places", maintenant):
+                        return resultat
+                    for epreuve_id, places in relues.items():
+                        if (
+                            self._generation_epreuve.get(epreuve_id, 0) == generations[epreuve_id]
+                            and maintenant - self._invalide_a_epreuve.get(epreuve_id, float("-inf")) >= self.delai_replica
+                        ):
+                            self._places[epreuve_id] = (places, maintenant + self.ttl_places)
+        return resultat
+
+    def _hors_retard_replica(self, categorie: str, maintenant: float) -> bool:
+        return maintenant - self._invalide_a[categorie] >= self.delai_replica
+
+    # ===== HOOKS D'INVALIDATION =====
+
+    def invalider_catalogue(self):
+        """Tout le catalogue a changé (init_data, reset_data)"""
+        with self._lock:
+            self._generation["catalogue"] += 1
+            self._generation["places"] += 1
+            self._invalide_a["catalogue"] = self._invalide_a["places"] = time.monotonic()
+            self._catalogue.clear()
+            self._places.clear()
+
+    def invalider_places(self, epreuve_ids: Optional[Iterable[int]] = None):
+        """Les places de ces épreuves (toutes si None) seront relues à la prochaine lecture"""
+        maintenant = time.monotonic()
+        with self._lock:
+            if epreuve_ids is None:
+                self._generation["places"] += 1
+                self._invalide_a["places"] = maintenant
+                self._places.clear()
+                return
+            for epreuve_id in epreuve_ids:
+                self._generation_epreuve[epreuve_id] = self._generation_epreuve.get(epreuve_id, 0) + 1
+                self._invalide_a_epreuve[epreuve_id] = maintenant
+                self._places.pop(epreuve_id, None)
+
+    # ===== STATISTIQUES =====
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {}
+            for categorie in ("catalogue", "places"):
+                hits, misses = self._hits[categorie], self._misses[categorie]
+                stats[categorie] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                }
+            stats["entrees"] = {"catalogue": len(self._catalogue), "places": len(self._places)}
+            stats["ttl"] = {"catalogue": self.ttl_catalogue, "places": self.ttl_places}
+            return stats
+
+
+catalog_cache = CatalogCache(
+    CATALOG_CACHE_TTL_SECONDS,
+    CATALOG_SEATS_TTL_SECONDS,
+    delai_replica=REPLICA_READ_YOUR_WRITES_SECONDS if DATABASE_REPLICA_URL else 0,
+)
@@ -0,0 +1,164 @@
+# backend/app/services/checkout_service.py
+import secrets
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+from app.core.metriques import CHECKOUTS
+from app.models.offer import Offer
+from app.models.panier import PanierItem
+from app.models.sport import Epreuve, TicketEpreuve
+from app.models.ticket import Ticket
+from app.services.hold_service import HoldService
+from app.services.inventory_service import PlacesInsuffisantesError
+from app.services.invalidation_bus import InvalidationBus
+
+
+class CheckoutError(Exception):
+    """Échec de validation d'un panier, traduit en réponse HTTP par les routes"""
+    status_code = 400
+    raison = "erreur"
+
+    def __init__(self, detail: str):
+        self.detail = detail
+        super().__init__(detail)
+
+
+class PanierVideError(CheckoutError):
+    raison = "panier_vide"
+
+    def __init__(self):
+        super().__init__("Votre panier est vide")
+
+
+class ElementIntrouvableError(CheckoutError):
+    status_code = 404
+    raison = "introuvable"
+
+
+class PlacesEpuiseesError(CheckoutError):
+    raison = "complet"
+
+
+class CheckoutService:
+    """Service de validation des paniers"""
+
+    @staticmethod
+    def valider_panier(session: Session, user_id: int) -> Dict:
+        """
+        Valide le panier d'un utilisateur et crée ses billets, en une transaction.
+
+        Les épreuves et offres du panier sont chargées en une requête IN
+        chacune, les places réservées dans l'ordre croissant des épreuves
+        (blocages consommés d'abord), les prix calculés en mémoire, puis les
+        billets écrits en requêtes groupées et le tout commité une seule fois.
+        Lève une CheckoutError (après rollback) si le panier ne peut pas être validé.
+        """
+        try:
+            statement = select(PanierItem).where(PanierItem.user_id == user_id).order_by(PanierItem.id)
+            panier_items = session.exec(statement).all()
+            if not panier_items:
+                raise PanierVideError()
+
+            epreuve_ids = {item.epreuve_id for item in panier_items}
+            offer_ids = {item.offer_id for item in panier_items}
+            epreuves = {e.id: e for e in session.exec(select(Epreuve).where(Epreuve.id.in_(epreuve_ids))).all()}
+            offers = {o.id: o for o in session.exec(select(Offer).where(Offer.id.in_(offer_ids))).all()}
+
+            lignes = []
+            for item in panier_items:
+                if item.epreuve_id not in epreuves:
+                    raise ElementIntrouvableError(f"Épreuve {item.epreuve_id} non trouvée")
+                if item.offer_id not in offers:
+                    raise ElementIntrouvableError(f"Offre {item.offer_id} non trouvée")
+                lignes.append((item, epreuves[item.epreuve_id], offers[item.offer_id]))
+
+            # Consommer les blocages et réserver le reste (UPDATE conditionnel, épreuves triées par id)
+            try:
+                nouvelles_places = HoldService.reserver_pour_checkout(
+                    session,
+                    {item.id: (epreuve.id, item.nombre_places * offer.capacite_personne) for item, epreuve, offer in lignes},
+                    nb_shards={epreuve.id: epreuve.nb_shards for epreuve in epreuves.values()},
+                )
+            except PlacesInsuffisantesError as e:
+                raise PlacesEpuiseesError(
+                    f"Plus assez de places pour {epreuves[e.epreuve_id].nom_epreuve} "
+                    f"(disponibles: {e.places_disponibles}, demandées: {e.places_demandees})"
+                )
+
+            # Créer tous les billets et vider le panier en quelques requêtes groupées
+            tickets_crees = CheckoutService.ecrire_tickets(session, user_id, lignes)
+            # Caches du catalogue mis à jour dans tous les workers, une fois la transaction commitée
+            InvalidationBus.places_modifiees(session, nouvelles_places)
+            session.commit()
+        except CheckoutError as e:
+            session.rollback()
+            CHECKOUTS.labels("echec", e.raison).inc()
+            raise
+        except Exception:
+            session.rollback()
+            CHECKOUTS.labels("echec", "erreur").inc()
+            raise
+
+        CHECKOUTS.labels("succes", "").inc()
+        return {
+            "message": f"{len(tickets_crees)} billet(s) acheté(s) avec succès",
+            "tickets": tickets_crees,
+            "places_disponibles": nouvelles_places,
+        }
+
+    @staticmethod
+    def ecrire_tickets(
+        session: Session,
+        user_id: int,
+        lignes: Sequence[Tuple[PanierItem, Epreuve, Offer]],
+    ) -> List[dict]:
+        """
+        Crée les billets d'un panier et vide le panier, en trois requêtes.
+
+        Tous les tickets sont insérés par un seul INSERT multi-lignes avec
+        RETURNING id, tous les liens TicketEpreuve par un second INSERT, et
+        les articles du panier supprimés par un seul DELETE, quelle que soit
+        la taille du panier. Les places doivent déjà être réservées. Ne commit pas.
+        """
+        maintenant = datetime.utcnow()
+        tickets = []
+        for item, epreuve, offer in lignes:
+            # Générer clé d'achat unique
+            clef_achat = secrets.token_urlsafe(16)
+            tickets.append({
+                "user_id": user_id,
+                "offer_id": offer.id,
+                "clef_achat": clef_achat,
+                "qr_code_content": f"{clef_achat}-{int(maintenant.timestamp())}",
+                "date_achat": maintenant,
+                "prix_total": offer.prix * item.nombre_places,
+                "nombre_places": item.nombre_places,
+            })
+
+        # Les clés d'achat sont uniques : elles relient chaque id renvoyé à sa ligne
+        statement = insert(Ticket).returning(Ticket.id, Ticket.clef_achat)
+        ids = {clef_achat: ticket_id for ticket_id, clef_achat in session.exec(statement, params=tickets).all()}
+
+        session.exec(
+            insert(TicketEpreuve),
+            params=[
+                {
+                    "ticket_id": ids[ticket["clef_achat"]],
+                    "epreuve_id": epreuve.id,
+                    "nombre_places": item.nombre_places,
+                }
+                for ticket, (item, epreuve, _) in zip(tickets, lignes)
+            ],
+        )
+
+        session.exec(delete(PanierItem).where(PanierItem.id.in_([item.id for item, _, _ in lignes])))
+
+        return [
+            {
+                "ticket_id": ids[ticket["clef_achat"]],
+                "epreuve": epreuve.nom_epreuve,
+                "prix": ticket["prix_total"],
+            }
+            for ticket, (_, epreuve, _) in zip(tickets, lignes)
+        ]
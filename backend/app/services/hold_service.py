@@ -0,0 +1,152 @@
+# backend/app/services/hold_service.py
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import delete
+from sqlmodel import Session, select
+from app.core.config import SEAT_HOLD_TTL_SECONDS, SEAT_HOLD_SWEEP_BATCH_SIZE
+from app.db.session import engine
+from app.models.panier import PanierItem, SeatHold
+from app.services.inventory_service import InventoryService
+from app.services.invalidation_bus import InvalidationBus
+
+
+# Tâche de fond de longue durée : ses erreurs passent par logging (niveau, filtrage, traceback)
+logger = logging.getLogger(__name__)
+
+
+class HoldService:
+    """Blocage temporaire des places des articles du panier"""
+
+    @staticmethod
+    def bloquer(session: Session, panier_item: PanierItem, places: int) -> SeatHold:
+        """
+        Retire `places` places du stock de l'épreuve et les bloque pour l'article.
+
+        Lève PlacesInsuffisantesError si l'épreuve n'a plus assez de places,
+        ValueError si `places` n'est pas positif. L'article doit déjà avoir un
+        id (flush). Ne commit pas.
+        """
+        InventoryService.reserver_places(session, {panier_item.epreuve_id: places})
+        hold = SeatHold(
+            panier_item_id=panier_item.id,
+            epreuve_id=panier_item.epreuve_id,
+            places=places,
+            expire_le=datetime.utcnow() + timedelta(seconds=SEAT_HOLD_TTL_SECONDS),
+        )
+        session.add(hold)
+        return hold
+
+    @staticmethod
+    def convertir(session: Session, panier_item_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        """
+        Consomme les blocages des articles validés au checkout.
+
+        Les places bloquées sont déjà décomptées : elles deviennent simplement
+        vendues. Le DELETE ... RETURNING garantit qu'un blocage n'est consommé
+        qu'une fois, même si le libérateur passe en même temps. Retourne
+        {panier_item_id: (epreuve_id, places)} pour les blocages consommés.
+        Ne commit pas.
+        """
+        statement = (
+            delete(SeatHold)
+            .where(SeatHold.panier_item_id.in_(list(panier_item_ids)))
+            .returning(SeatHold.panier_item_id, SeatHold.epreuve_id, SeatHold.places)
+        )
+        return {item_id: (epreuve_id, places) for item_id, epreuve_id, places in session.exec(statement).all()}
+
+    @staticmethod
+    def reserver_pour_checkout(
+        session: Session,
+        besoins_par_article: Dict[int, Tuple[int, int]],
+        nb_shards: Optional[Dict[int, int]] = None,
+    ) -> Dict[int, int]:
+        """
+        Réserve les places d'un panier au checkout en tenant compte des blocages.
+
+        `besoins_par_article` associe un panier_item_id à (epreuve_id, places).
+        Les blocages encore actifs sont consommés ; seules les places non
+        couvertes (blocage expiré et libéré entre-temps) sont réservées par
+        UPDATE conditionnel, et un éventuel surplus bloqué est remis en vente.
+        Lève PlacesInsuffisantesError. Ne commit pas.
+        """
+        besoins = defaultdict(int)
+        for epreuve_id, places in besoins_par_article.values():
+            besoins[epreuve_id] += places
+        for epreuve_id, places in HoldService.convertir(session, besoins_par_article).values():
+            besoins[epreuve_id] -= places
+
+        a_reserver = {epreuve_id: places for epreuve_id, places in besoins.items() if places > 0}
+        a_rendre = {epreuve_id: -places for epreuve_id, places in besoins.items() if places < 0}
+
+        nouvelles_places = {}
+        if a_reserver:
+            nouvelles_places.update(InventoryService.reserver_places(session, a_reserver, nb_shards))
+        if a_rendre:
+            nouvelles_places.update(InventoryService.restituer_places(session, a_rendre))
+        return nouvelles_places
+
+    @staticmethod
+    def liberer(session: Session, panier_item_ids: Iterable[int]) -> Dict[int, int]:
+        """Libère les blocages d'articles retirés du panier et remet leurs places en vente. Ne commit pas."""
+        consommes = HoldService.convertir(session, panier_item_ids)
+        rendues = defaultdict(int)
+        for epreuve_id, places in consommes.values():
+            rendues[epreuve_id] += places
+        return InventoryService.restituer_places(session, dict(rendues)) if rendues else {}
+
+    @staticmethod
+    def liberer_expires(session: Session, limite: int = SEAT_HOLD_SWEEP_BATCH_SIZE) -> Dict[int, int]:
+        """
+        Libère en masse jusqu'à `limite` blocages expirés.
+
+        Les blocages sont verrouillés avec SKIP LOCKED pour que plusieurs
+        workers puissent balayer en parallèle sans se gêner. Retourne les
+        places rendues par épreuve. Ne commit pas.
+        """
+        expires = (
+            select(SeatHold.id)
+            .where(SeatHold.expire_le < datetime.utcnow())
+            .order_by(SeatHold.id)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            delete(SeatHold)
+            .where(SeatHold.id.in_(expires.scalar_subquery()))
+            .returning(SeatHold.epreuve_id, SeatHold.places)
+        )
+        rendues = defaultdict(int)
+        for epreuve_id, places in session.exec(statement).all():
+            rendues[epreuve_id] += places
+        if rendues:
+            InventoryService.restituer_places(session, dict(rendues))
+        return dict(rendues)
+
+
+def liberer_holds_expires() -> int:
+    """Un passage complet du libérateur, par lots ; retourne le nombre de places rendues"""
+    total = 0
+    while True:
+        with Session(engine) as session:
+            rendues = HoldService.liberer_expires(session)
+            InvalidationBus.places_invalides(session, rendues)
+            session.commit()
+        total += sum(rendues.values())
+        if not rendues:
+            return total
+
+
+async def boucle_liberation_holds(intervalle: int):
+    """Tâche de fond : libère les blocages expirés toutes les `intervalle` secondes"""
+    while True:
+        await asyncio.sleep(intervalle)
+        try:
+            places = await asyncio.to_thread(liberer_holds_expires)
+            if places:
+                logger.info("%d place(s) bloquée(s) remise(s) en vente", places)
+        except Exception:
+            # La boucle continue : le passage suivant reprendra les blocages restants
+            logger.exception("Erreur du libérateur de blocages")
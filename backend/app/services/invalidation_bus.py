@@ -0,0 +1,162 @@
+# backend/app/services/invalidation_bus.py
+import json
+import logging
+import os
+import select as select_io
+import threading
+import uuid
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, text
+from sqlmodel import Session
+from app.core.config import INVALIDATION_CHANNEL
+from app.db.session import engine
+from app.services.catalog_cache_service import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Identifiant de ce worker : il applique ses propres changements localement et ignore leur écho
+ORIGINE = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Postgres refuse les payloads NOTIFY de plus de 8000 octets
+TAILLE_MAX_PAYLOAD = 7900
+
+
+def _appliquer(evenement: Dict):
+    """Applique un événement d'invalidation aux caches locaux"""
+    type_evenement = evenement.get("type")
+    if type_evenement == "catalogue":
+        catalog_cache.invalider_catalogue()
+    elif type_evenement == "places":
+        # Ancien format (valeurs de places), encore publié par un worker pas encore redéployé
+        catalog_cache.invalider_places([int(k) for k in evenement["places"]])
+    elif type_evenement == "places_invalides":
+        ids = evenement.get("epreuve_ids")
+        catalog_cache.invalider_places(None if ids is None else [int(i) for i in ids])
+
+
+def _publier(session: Session, evenement: Dict):
+    """
+    Publie un événement lié à la transaction de `session`.
+
+    Le NOTIFY est envoyé dans la transaction : Postgres ne le délivre aux
+    autres workers qu'au commit, et jamais en cas de rollback. Les caches
+    de ce worker sont mis à jour par un hook after_commit, avec la même
+    garantie. Ne commit pas.
+    """
+    def apres_commit(_session):
+        event.remove(session, "after_rollback", apres_rollback)
+        _appliquer(evenement)
+
+    def apres_rollback(_session):
+        # Transaction annulée : rien à appliquer, même si la session est réutilisée ensuite
+        event.remove(session, "after_commit", apres_commit)
+
+    event.listen(session, "after_commit", apres_commit, once=True)
+    event.listen(session, "after_rollback", apres_rollback, once=True)
+
+    if not INVALIDATION_CHANNEL or session.get_bind().dialect.name != "postgresql":
+        return
+
+    payload = json.dumps({**evenement, "origine": ORIGINE}, separators=(",", ":"))
+    if len(payload) > TAILLE_MAX_PAYLOAD:
+        # Trop d'épreuves pour un seul message : les autres workers relisent toutes les places
+        payload = json.dumps({"type": "places_invalides", "epreuve_ids": None, "origine": ORIGINE})
+    session.exec(text("SELECT pg_notify(:canal, :payload)"), params={"canal": INVALIDATION_CHANNEL, "payload": payload})
+
+
+class InvalidationBus:
+    """Événements de modification du catalogue, appliqués dans tous les workers"""
+
+    @staticmethod
+    def catalogue_modifie(session: Session):
+        """Sports, épreuves ou offres modifiés : tout le catalogue est à relire"""
+        _publier(session, {"type": "catalogue"})
+
+    @staticmethod
+    def places_modifiees(session: Session, places: Dict[int, int]):
+        """
+        Places modifiées dans la transaction (nouvelles valeurs par épreuve).
+
+        Seules les épreuves sont diffusées, pas les valeurs : des commits
+        concurrents sont appliqués dans un ordre quelconque, et une valeur
+        plus ancienne écraserait la plus récente dans les caches.
+        """
+        InvalidationBus.places_invalides(session, places.keys())
+
+    @staticmethod
+    def places_invalides(session: Session, epreuve_ids: Optional[Iterable[int]] = None):
+        """Places modifiées sans valeur connue : à relire (toutes si None)"""
+        ids = None if epreuve_ids is None else list(epreuve_ids)
+        if ids is None or ids:
+            _publier(session, {"type": "places_invalides", "epreuve_ids": ids})
+
+
+class InvalidationListener:
+    """
+    Thread qui écoute le canal NOTIFY et applique les événements des autres workers.
+
+    Utilise une connexion psycopg2 dédiée en autocommit (hors du pool) :
+    une connexion en LISTEN doit rester ouverte en permanence. Après une
+    coupure, tout le catalogue est invalidé puisque des événements ont pu
+    être perdus, puis l'écoute reprend.
+    """
+
+    def __init__(self, canal: str, delai_reconnexion: float = 1.0):
+        self.canal = canal
+        self.delai_reconnexion = delai_reconnexion
+        self._arret = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def demarrer(self):
+        if not self.canal or engine.dialect.name != "postgresql":
+            return
+        self._thread = threading.Thread(target=self._boucle, name="invalidation-listener", daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _connecter(self):
+        import psycopg2
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        connexion = psycopg2.connect(dsn)
+        connexion.autocommit = True
+        with connexion.cursor() as curseur:
+            curseur.execute(f'LISTEN "{self.canal}"')
+        return connexion
+
+    def _boucle(self):
+        premiere_connexion = True
+        while not self._arret.is_set():
+            connexion = None
+            try:
+                connexion = self._connecter()
+                if not premiere_connexion:
+                    catalog_cache.invalider_catalogue()
+                premiere_connexion = False
+                logger.info("Écoute des invalidations du catalogue sur '%s'", self.canal)
+
+                while not self._arret.is_set():
+                    # Réveil dès qu'une notification arrive, sinon toutes les secondes pour vérifier l'arrêt
+                    if select_io.select([connexion], [], [], 1.0) == ([], [], []):
+                        continue
+                    connexion.poll()
+                    while connexion.notifies:
+                        notification = connexion.notifies.pop(0)
+                        evenement = json.loads(notification.payload)
+                        if evenement.get("origine") != ORIGINE:
+                            _appliquer(evenement)
+            except Exception:
+                logger.exception("Erreur de l'écoute des invalidations, reconnexion dans %ss", self.delai_reconnexion)
+                self._arret.wait(self.delai_reconnexion)
+            finally:
+                if connexion is not None:
+                    connexion.close()
+
+
+invalidation_listener = InvalidationListener(INVALIDATION_CHANNEL)
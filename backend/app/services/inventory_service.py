@@ -0,0 +1,228 @@
+# backend/app/services/inventory_service.py
+import random
+from typing import Dict, Iterable, Optional
+from sqlalchemy import update
+from sqlmodel import Session, select, func
+from app.models.sport import Epreuve, EpreuveShard
+
+
+class PlacesInsuffisantesError(Exception):
+    """Levée quand une épreuve n'a plus assez de places pour une réservation"""
+
+    def __init__(self, epreuve_id: int, places_demandees: int, places_disponibles: int):
+        self.epreuve_id = epreuve_id
+        self.places_demandees = places_demandees
+        self.places_disponibles = places_disponibles
+        super().__init__(
+            f"Plus assez de places pour l'épreuve {epreuve_id} "
+            f"(disponibles: {places_disponibles}, demandées: {places_demandees})"
+        )
+
+
+def places_disponibles_expr():
+    """
+    Expression SQL des places disponibles d'une épreuve : compteur de la ligne
+    epreuve plus la somme de ses fragments (0 si l'épreuve n'est pas fragmentée).
+    """
+    somme_shards = (
+        select(func.coalesce(func.sum(EpreuveShard.places_disponibles), 0))
+        .where(EpreuveShard.epreuve_id == Epreuve.id)
+        .correlate(Epreuve)
+        .scalar_subquery()
+    )
+    return (Epreuve.places_disponibles + somme_shards).label("places_disponibles")
+
+
+class InventoryService:
+    """Service de gestion des places disponibles des épreuves"""
+
+    @staticmethod
+    def places_disponibles(session: Session, epreuve_ids: Iterable[int]) -> Dict[int, int]:
+        """Places disponibles de plusieurs épreuves en une requête (fragments inclus)"""
+        statement = select(Epreuve.id, places_disponibles_expr()).where(Epreuve.id.in_(list(epreuve_ids)))
+        return {epreuve_id: places for epreuve_id, places in session.exec(statement).all()}
+
+    @staticmethod
+    def reserver_places(
+        session: Session,
+        besoins: Dict[int, int],
+        nb_shards: Optional[Dict[int, int]] = None,
+    ) -> Dict[int, int]:
+        """
+        Décrémente atomiquement les places de chaque épreuve.
+
+        `besoins` associe un epreuve_id au nombre de places à retirer. Chaque
+        épreuve est décrémentée par un UPDATE conditionnel (uniquement si assez
+        de places restent), dans l'ordre croissant des ids pour éviter les
+        deadlocks entre acheteurs concurrents. Les épreuves fragmentées prennent
+        leurs places dans un fragment tiré au hasard. `nb_shards` évite de relire
+        le mode de chaque épreuve quand l'appelant les a déjà chargées.
+        Retourne les nouvelles valeurs de places disponibles. Ne commit pas :
+        l'appelant reste maître de la transaction et doit faire un rollback en
+        cas d'erreur. Lève ValueError si un besoin n'est pas positif : l'UPDATE
+        conditionnel ajouterait alors des places au lieu d'en retirer.
+        """
+        invalides = {epreuve_id: places for epreuve_id, places in besoins.items() if places <= 0}
+        if invalides:
+            raise ValueError(f"Nombre de places à réserver invalide : {invalides}")
+
+        if nb_shards is None:
+            statement = select(Epreuve.id, Epreuve.nb_shards).where(Epreuve.id.in_(list(besoins)))
+            nb_shards = dict(session.exec(statement).all())
+
+        nouvelles_places = {}
+
+        for epreuve_id in sorted(besoins):
+            places = besoins[epreuve_id]
+            if nb_shards.get(epreuve_id, 1) > 1:
+                restantes = InventoryService._reserver_dans_shards(
+                    session, epreuve_id, places, nb_shards[epreuve_id]
+                )
+            else:
+                statement = (
+                    update(Epreuve)
+                    .where(Epreuve.id == epreuve_id, Epreuve.places_disponibles >= places)
+                    .values(places_disponibles=Epreuve.places_disponibles - places)
+                    .returning(Epreuve.places_disponibles)
+                )
+                restantes = session.exec(statement).scalar_one_or_none()
+
+            if restantes is None:
+                # Rien n'a été modifié : on relit la valeur pour un message d'erreur précis
+                disponibles = InventoryService.places_disponibles(session, [epreuve_id])
+                raise PlacesInsuffisantesError(epreuve_id, places, disponibles.get(epreuve_id, 0))
+
+            nouvelles_places[epreuve_id] = restantes
+
+        return nouvelles_places
+
+    @staticmethod
+    def _reserver_dans_shards(session: Session, epreuve_id: int, places: int, nb_shards: int) -> Optional[int]:
+        """Réserve des places sur une épreuve fragmentée, retourne le nouveau total ou None"""
+        # Chemin rapide : un seul fragment, en partant d'un fragment tiré au hasard.
+        # SKIP LOCKED : on ne fait jamais la queue derrière un fragment pris par un
+        # autre achat (un UPDATE qui attend garde le verrou même si sa condition
+        # échoue ensuite, et des rotations différentes finiraient en interblocage)
+        depart = random.randrange(nb_shards)
+        candidat = (
+            select(EpreuveShard.shard)
+            .where(EpreuveShard.epreuve_id == epreuve_id, EpreuveShard.places_disponibles >= places)
+            .order_by((EpreuveShard.shard + nb_shards - depart) % nb_shards)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            update(EpreuveShard)
+            .where(
+                EpreuveShard.epreuve_id == epreuve_id,
+                EpreuveShard.shard == candidat,
+                EpreuveShard.places_disponibles >= places,
+            )
+            .values(places_disponibles=EpreuveShard.places_disponibles - places)
+            .returning(EpreuveShard.places_disponibles)
+        )
+        if session.exec(statement).scalar_one_or_none() is not None:
+            return InventoryService.places_disponibles(session, [epreuve_id])[epreuve_id]
+
+        # Aucun fragment ne suffit seul : on verrouille tous les fragments (dans l'ordre)
+        # et on prend les places là où il en reste
+        statement = (
+            select(EpreuveShard)
+            .where(EpreuveShard.epreuve_id == epreuve_id)
+            .order_by(EpreuveShard.shard)
+            .with_for_update()
+        )
+        shards = session.exec(statement).all()
+        if sum(s.places_disponibles for s in shards) < places:
+            return None
+
+        reste = places
+        for s in shards:
+            prises = min(reste, s.places_disponibles)
+            s.places_disponibles -= prises
+            reste -= prises
+            if reste == 0:
+                break
+        session.flush()
+        return InventoryService.places_disponibles(session, [epreuve_id])[epreuve_id]
+
+    @staticmethod
+    def restituer_places(session: Session, rendues: Dict[int, int]) -> Dict[int, int]:
+        """
+        Remet en vente des places (blocages expirés, paniers supprimés).
+
+        Même ordre de verrouillage que reserver_places ; sur une épreuve
+        fragmentée les places reviennent dans un fragment tiré au hasard.
+        Retourne les nouvelles valeurs de places disponibles. Ne commit pas.
+        """
+        statement = select(Epreuve.id, Epreuve.nb_shards).where(Epreuve.id.in_(list(rendues)))
+        nb_shards = dict(session.exec(statement).all())
+
+        nouvelles_places = {}
+        for epreuve_id in sorted(rendues):
+            if epreuve_id not in nb_shards:
+                continue
+            places = rendues[epreuve_id]
+            if nb_shards[epreuve_id] > 1:
+                session.exec(
+                    update(EpreuveShard)
+                    .where(
+                        EpreuveShard.epreuve_id == epreuve_id,
+                        EpreuveShard.shard == random.randrange(nb_shards[epreuve_id]),
+                    )
+                    .values(places_disponibles=EpreuveShard.places_disponibles + places)
+                )
+                nouvelles_places.update(InventoryService.places_disponibles(session, [epreuve_id]))
+            else:
+                statement = (
+                    update(Epreuve)
+                    .where(Epreuve.id == epreuve_id)
+                    .values(places_disponibles=Epreuve.places_disponibles + places)
+                    .returning(Epreuve.places_disponibles)
+                )
+                nouvelles_places[epreuve_id] = session.exec(statement).scalar_one()
+
+        return nouvelles_places
+
+    @staticmethod
+    def configurer_shards(session: Session, epreuve_id: int, nb_shards: int) -> Optional[Dict[int, int]]:
+        """
+        Change le nombre de fragments d'une épreuve et rééquilibre ses places.
+
+        Le total (ligne epreuve + fragments) est conservé puis réparti
+        équitablement entre les `nb_shards` fragments. Avec nb_shards=1 les
+        fragments sont supprimés et tout revient sur la ligne epreuve.
+        Retourne la répartition par fragment, ou None si l'épreuve n'existe pas.
+        Ne commit pas.
+        """
+        epreuve = session.exec(select(Epreuve).where(Epreuve.id == epreuve_id).with_for_update()).first()
+        if not epreuve:
+            return None
+
+        shards = session.exec(
+            select(EpreuveShard)
+            .where(EpreuveShard.epreuve_id == epreuve_id)
+            .order_by(EpreuveShard.shard)
+            .with_for_update()
+        ).all()
+        total = epreuve.places_disponibles + sum(s.places_disponibles for s in shards)
+
+        for s in shards:
+            session.delete(s)
+        session.flush()
+
+        epreuve.nb_shards = nb_shards
+        if nb_shards <= 1:
+            epreuve.places_disponibles = total
+            session.add(epreuve)
+            return {0: total}
+
+        # Répartition équitable, le reste va aux premiers fragments
+        base, reste = divmod(total, nb_shards)
+        repartition = {shard: base + (1 if shard < reste else 0) for shard in range(nb_shards)}
+        for shard, places in repartition.items():
+            session.add(EpreuveShard(epreuve_id=epreuve_id, shard=shard, places_disponibles=places))
+        epreuve.places_disponibles = 0
+        session.add(epreuve)
+        return repartition
@@ -0,0 +1,229 @@
+# backend/app/services/pdf_cache_service.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import PDF_CACHE_MAX_BYTES, PDF_CACHE_DIR, PDF_CACHE_DISK_MAX_BYTES
+from app.services.ticket_pdf_service import TicketPDFService
+
+
+logger = logging.getLogger(__name__)
+
+# Les autres workers écrivent aussi dans le répertoire : chaque processus le remesure
+# après y avoir écrit cette part du plafond, ce qui borne le dépassement
+REMESURE_DISQUE = 0.1
+
+# Un élagage redescend à cette part du plafond, pour ne pas élaguer à chaque écriture
+CIBLE_ELAGAGE = 0.9
+
+
+class PDFCache:
+    """
+    Cache des PDF de billets adressé par contenu, sur deux niveaux.
+
+    La clé est le SHA-256 des données exactes du billet (et de la version du
+    gabarit) : deux appels avec les mêmes données produisent le même PDF, et
+    toute modification (nom, épreuve, offre...) donne une nouvelle clé, sans
+    invalidation explicite. Niveau 1 : LRU en mémoire borné en octets.
+    Niveau 2 : un fichier par clé dans `repertoire`, partagé entre workers,
+    borné à `max_octets_disque` : les anciennes clés (billet modifié, nouvelle
+    version du gabarit) ne sont plus lues et finissent élaguées, les moins
+    récemment servies d'abord (date de modification rafraîchie à chaque lecture).
+    """
+
+    def __init__(self, max_octets: int, repertoire: Optional[str], max_octets_disque: int):
+        self.max_octets = max_octets
+        self.repertoire = repertoire or None
+        self.max_octets_disque = max_octets_disque
+        self._memoire: "OrderedDict[str, bytes]" = OrderedDict()
+        self._octets = 0
+        self._lock = threading.Lock()
+        # Taille du répertoire à la dernière mesure (None : pas encore mesuré) et écritures depuis
+        self._octets_disque: Optional[int] = None
+        self._ecrits_depuis_mesure = 0
+        self._lock_disque = threading.Lock()
+        self.hits_memoire = 0
+        self.hits_disque = 0
+        self.misses = 0
+        self.fichiers_elagues = 0
+
+    @staticmethod
+    def clef(ticket_data: dict) -> str:
+        """Empreinte SHA-256 canonique des données d'un billet"""
+        contenu = json.dumps(
+            {"gabarit": TicketPDFService.VERSION_GABARIT, "billet": ticket_data},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+    def _chemin(self, clef: str) -> str:
+        # Un sous-répertoire par préfixe de clé pour ne pas avoir des millions de fichiers au même endroit
+        return os.path.join(self.repertoire, clef[:2], f"{clef}.pdf")
+
+    def get(self, clef: str) -> Optional[bytes]:
+        """PDF en cache pour cette clé (mémoire puis disque), ou None"""
+        with self._lock:
+            pdf_bytes = self._memoire.get(clef)
+            if pdf_bytes is not None:
+                self._memoire.move_to_end(clef)
+                self.hits_memoire += 1
+                return pdf_bytes
+
+        if self.repertoire:
+            chemin = self._chemin(clef)
+            try:
+                with open(chemin, "rb") as f:
+                    pdf_bytes = f.read()
+                # Servi à l'instant : dernier candidat à l'élagage
+                os.utime(chemin)
+            except FileNotFoundError:
+                pdf_bytes = None
+            if pdf_bytes is not None:
+                self._mettre_en_memoire(clef, pdf_bytes)
+                with self._lock:
+                    self.hits_disque += 1
+                return pdf_bytes
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, clef: str, pdf_bytes: bytes):
+        """Ajoute un PDF dans les deux niveaux du cache"""
+        self._mettre_en_memoire(clef, pdf_bytes)
+
+        if self.repertoire:
+            chemin = self._chemin(clef)
+            if os.path.exists(chemin):
+                return
+            # Écriture dans un fichier temporaire puis renommage atomique :
+            # un lecteur concurrent ne voit jamais de PDF tronqué
+            tmp = None
+            try:
+                os.makedirs(os.path.dirname(chemin), exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(pdf_bytes)
+                os.replace(tmp, chemin)
+            except OSError as e:
+                # Le cache disque est une optimisation : un disque plein ne doit pas faire échouer le téléchargement
+                logger.warning("Cache PDF disque indisponible : %s", e)
+                if tmp and os.path.exists(tmp):
+                    os.unlink(tmp)
+                return
+            self._compter_ecriture(len(pdf_bytes))
+
+    def _compter_ecriture(self, taille: int):
+        """Élague le cache disque s'il a pu dépasser son plafond depuis la dernière mesure"""
+        with self._lock_disque:
+            self._ecrits_depuis_mesure += taille
+            if (
+                self._octets_disque is not None
+                and self._octets_disque + self._ecrits_depuis_mesure <= self.max_octets_disque
+                and self._ecrits_depuis_mesure < REMESURE_DISQUE * self.max_octets_disque
+            ):
+                return
+            try:
+                self._elaguer_disque()
+            except OSError as e:
+                logger.warning("Élagage du cache PDF disque impossible : %s", e)
+
+    def _fichiers_disque(self) -> List[Tuple[float, int, str]]:
+        """(date de modification, taille, chemin) de chaque PDF du cache disque"""
+        fichiers = []
+        for sous_repertoire in os.scandir(self.repertoire):
+            if not sous_repertoire.is_dir():
+                continue
+            for entree in os.scandir(sous_repertoire.path):
+                if not entree.name.endswith(".pdf"):
+                    continue
+                try:
+                    stat = entree.stat()
+                except FileNotFoundError:
+                    # Élagué entre-temps par un autre worker
+                    continue
+                fichiers.append((stat.st_mtime, stat.st_size, entree.path))
+        return fichiers
+
+    def _elaguer_disque(self):
+        """
+        Mesure le cache disque et, au-delà du plafond, supprime les PDF les
+        moins récemment servis jusqu'à CIBLE_ELAGAGE du plafond. Appelé sous _lock_disque.
+        """
+        fichiers = self._fichiers_disque()
+        total = sum(taille for _, taille, _ in fichiers)
+        if total > self.max_octets_disque:
+            cible = CIBLE_ELAGAGE * self.max_octets_disque
+            for _, taille, chemin in sorted(fichiers):
+                if total <= cible:
+                    break
+                try:
+                    os.unlink(chemin)
+                    self.fichiers_elagues += 1
+                except FileNotFoundError:
+                    pass
+                total -= taille
+        self._octets_disque = total
+        self._ecrits_depuis_mesure = 0
+
+    def _mettre_en_memoire(self, clef: str, pdf_bytes: bytes):
+        taille = len(pdf_bytes)
+        if taille > self.max_octets:
+            return
+        with self._lock:
+            ancien = self._memoire.pop(clef, None)
+            if ancien is not None:
+                self._octets -= len(ancien)
+            self._memoire[clef] = pdf_bytes
+            self._octets += taille
+            # Éviction des moins récemment utilisés jusqu'à repasser sous la limite
+            while self._octets > self.max_octets:
+                _, evince = self._memoire.popitem(last=False)
+                self._octets -= len(evince)
+
+    def vider_memoire(self):
+        with self._lock:
+            self._memoire.clear()
+            self._octets = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits_memoire + self.hits_disque + self.misses
+            return {
+                "entrees_memoire": len(self._memoire),
+                "octets_memoire": self._octets,
+                "max_octets": self.max_octets,
+                # Dernière mesure du répertoire (écritures des autres workers comprises)
+                "octets_disque": self._octets_disque,
+                "max_octets_disque": self.max_octets_disque,
+                "fichiers_elagues": self.fichiers_elagues,
+                "hits_memoire": self.hits_memoire,
+                "hits_disque": self.hits_disque,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits_memoire + self.hits_disque) / total, 4) if total else 0.0,
+            }
+
+
+def etag_correspond(if_none_match: Optional[str], etag: str) -> bool:
+    """Vrai si l'en-tête If-None-Match désigne `etag` (comparaison faible, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidat in if_none_match.split(","):
+        candidat = candidat.strip()
+        if candidat.startswith("W/"):
+            candidat = candidat[2:]
+        if candidat == etag:
+            return True
+    return False
+
+
+pdf_cache = PDFCache(PDF_CACHE_MAX_BYTES, PDF_CACHE_DIR, PDF_CACHE_DISK_MAX_BYTES)
@@ -0,0 +1,161 @@
+# backend/app/services/pdf_executor.py
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional
+from app.core.config import PDF_EXECUTOR, PDF_WORKERS, PDF_MAX_QUEUE
+from app.core.metriques import DUREE_PDF
+from app.services.ticket_pdf_service import TicketPDFService
+
+logger = logging.getLogger(__name__)
+
+
+class PDFFileSatureeError(Exception):
+    """Levée quand trop de PDF sont déjà en cours ou en attente de génération"""
+
+
+class FluxPDF:
+    """
+    Itérateur d'une réponse PDF en streaming (portefeuille) qui occupe une place de la file du pool.
+
+    La place est rendue à la fin du flux, à la déconnexion du client ou si
+    l'itérateur n'est jamais parcouru. Chaque page est dessinée en tenant
+    un des `workers` jetons de rendu du pool.
+    """
+
+    def __init__(self, pool: "PDFRenderPool", generateur: Iterator[bytes], document: str):
+        self._pool = pool
+        self._generateur = generateur
+        self._document = document
+        self._debut = time.perf_counter()
+        self._termine = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            with self._pool._rendus:
+                return next(self._generateur)
+        except BaseException:
+            # StopIteration comprise : fin normale du flux
+            self.close()
+            raise
+
+    def close(self):
+        if self._termine:
+            return
+        self._termine = True
+        if hasattr(self._generateur, "close"):
+            self._generateur.close()
+        DUREE_PDF.labels(self._document).observe(time.perf_counter() - self._debut)
+        self._pool._liberer_place()
+
+    def __del__(self):
+        self.close()
+
+
+class PDFRenderPool:
+    """
+    Pool borné pour générer les PDF hors de la boucle d'événements.
+
+    reportlab, l'encodage du QR code et les écritures disque sont
+    synchrones : exécutés dans la boucle, ils bloqueraient toutes les autres
+    requêtes du worker. Au-delà de `max_en_attente` PDF en cours ou en
+    attente, la génération est refusée immédiatement plutôt que mise en file.
+    """
+
+    def __init__(self, mode: str, workers: int, max_en_attente: int):
+        self.mode = mode
+        self.workers = workers
+        self.max_en_attente = max_en_attente
+        self._executor: Optional[Executor] = None
+        self._en_cours = 0
+        self._lock = threading.Lock()
+        # Pages des flux (portefeuilles) dessinées en même temps, hors executor
+        self._rendus = threading.BoundedSemaphore(workers)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf")
+                else:
+                    # "spawn" : pas de fork d'un serveur qui a déjà des threads et des connexions ouvertes
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+            return self._executor
+
+    def _abandonner_executor(self, executor: Executor):
+        """
+        Pool de processus cassé (worker tué : OOM, segfault) : il refuserait
+        toutes les tâches suivantes. Il est abandonné et recréé à la demande,
+        une seule fois même si plusieurs PDF en cours l'ont vu casser.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        logger.warning("Pool de génération des PDF cassé (worker arrêté brutalement) : recréé")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def en_cours(self) -> int:
+        return self._en_cours
+
+    def _prendre_place(self):
+        with self._lock:
+            if self._en_cours >= self.max_en_attente:
+                raise PDFFileSatureeError()
+            self._en_cours += 1
+
+    def _liberer_place(self):
+        with self._lock:
+            self._en_cours -= 1
+
+    async def executer(self, fonction, *args, document: str = "autre"):
+        """Exécute `fonction(*args)` dans le pool ; lève PDFFileSatureeError si la file est pleine"""
+        self._prendre_place()
+        debut = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            try:
+                return await loop.run_in_executor(executor, fonction, *args)
+            except BrokenProcessPool:
+                # Une seule nouvelle tentative : un PDF qui tue son worker à chaque fois finit en erreur
+                self._abandonner_executor(executor)
+                return await loop.run_in_executor(self._get_executor(), fonction, *args)
+        finally:
+            # Mesuré ici : le rendu lui-même peut avoir lieu dans un autre processus
+            DUREE_PDF.labels(document).observe(time.perf_counter() - debut)
+            self._liberer_place()
+
+    def flux(self, generateur: Iterator[bytes], document: str = "autre") -> FluxPDF:
+        """
+        Réponse PDF en streaming comptée dans la file du pool ; lève
+        PDFFileSatureeError tout de suite (avant la réponse) si elle est pleine.
+
+        Un générateur ne passe pas d'un processus à l'autre : les pages sont
+        dessinées dans le thread qui parcourt la réponse, au plus `workers`
+        à la fois.
+        """
+        self._prendre_place()
+        return FluxPDF(self, generateur, document)
+
+    async def generer_ticket_pdf(self, ticket_data: dict) -> bytes:
+        return await self.executer(TicketPDFService.generate_ticket_pdf, ticket_data, document="billet")
+
+    def arreter(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+pdf_render_pool = PDFRenderPool(PDF_EXECUTOR, PDF_WORKERS, PDF_MAX_QUEUE)
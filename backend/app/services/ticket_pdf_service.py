@@ -1,154 +1,216 @@
 # backend/app/services/ticket_pdf_service.py
 import qrcode
 import io
-import tempfile
-import os
+import hashlib
+import zlib
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
 from reportlab.lib.colors import HexColor
 from datetime import datetime
 import json
 
 
+# Couleurs de la charte, construites une fois par processus
+BLEU_PARIS = HexColor("#0052CC")
+GRIS_TEXTE = HexColor("#666666")
+GRIS_FONCE = HexColor("#1F2937")
+GRIS_INFOS = HexColor("#4B5563")
+VERT_PRIX = HexColor("#059669")
+GRIS_LIGNE = HexColor("#CCCCCC")
+GRIS_FOOTER = HexColor("#999999")
+
+
 class TicketPDFService:
     """Service pour générer les PDF des billets avec QR code"""
-    
+
+    # À incrémenter à chaque changement de mise en page (invalide les PDF en cache)
+    VERSION_GABARIT = 2
+
+    # Nom de la form XObject contenant l'en-tête, les filets et le pied de page
+    CHROME_FORM = "billet_chrome"
+
     @staticmethod
     def generate_ticket_pdf(ticket_data: dict) -> bytes:
         """Génère un PDF de billet avec QR code"""
-        
-        # Créer un PDF en mémoire
+
+        # Créer un PDF en mémoire. invariant : ni date ni identifiant aléatoire,
+        # les mêmes données donnent octet pour octet le même PDF (ETag fort)
         pdf_buffer = io.BytesIO()
-        
-        # Créer le canvas
+        pdf = canvas.Canvas(pdf_buffer, pagesize=letter, invariant=1)
+
+        TicketPDFService.dessiner_billet(pdf, ticket_data)
+
+        # Sauvegarder le PDF
+        pdf.save()
+        return pdf_buffer.getvalue()
+
+    @staticmethod
+    def dessiner_billet(pdf: canvas.Canvas, ticket_data: dict):
+        """
+        Dessine un billet sur la page courante du canvas.
+
+        La partie statique (en-tête, filets, pied de page) est une form XObject
+        définie une seule fois par document puis réutilisée sur chaque page.
+        L'appelant gère showPage() s'il enchaîne plusieurs billets.
+        """
         page_width, page_height = letter
-        pdf = canvas.Canvas(pdf_buffer, pagesize=letter)
-        
-        # ===== HEADER =====
-        pdf.setFont("Helvetica-Bold", 28)
-        pdf.setFillColor(HexColor("#0052CC"))
-        pdf.drawString(0.75*inch, page_height - 0.75*inch, "PARIS 2024")
-        
-        pdf.setFont("Helvetica", 12)
-        pdf.setFillColor(HexColor("#666666"))
-        pdf.drawString(6*inch, page_height - 0.75*inch, "Billet Officiel")
-        
-        # Ligne séparatrice
-        pdf.setLineWidth(2)
-        pdf.setStrokeColor(HexColor("#0052CC"))
-        pdf.line(0.5*inch, page_height - 1.0*inch, 7.5*inch, page_height - 1.0*inch)
-        
+
+        # ===== HEADER / FOOTER =====
+        if not pdf.hasForm(TicketPDFService.CHROME_FORM):
+            TicketPDFService._definir_chrome(pdf)
+        pdf.doForm(TicketPDFService.CHROME_FORM)
+
         # ===== CONTENU PRINCIPAL =====
         y_position = page_height - 1.5*inch
-        
+
         # Titre de l'événement
         pdf.setFont("Helvetica-Bold", 20)
-        pdf.setFillColor(HexColor("#1F2937"))
+        pdf.setFillColor(GRIS_FONCE)
         event_name = ticket_data.get("epreuve_nom", "Evenement Olympique")
         pdf.drawString(0.75*inch, y_position, event_name)
         y_position -= 0.5*inch
-        
+
         # Infos événement
         pdf.setFont("Helvetica", 12)
-        pdf.setFillColor(HexColor("#4B5563"))
-        
+        pdf.setFillColor(GRIS_INFOS)
+
         # Sport
         sport = ticket_data.get("sport_nom", "N/A")
         pdf.drawString(0.75*inch, y_position, f"Sport: {sport}")
         y_position -= 0.3*inch
-        
+
         # Location
         location = ticket_data.get("lieu", "N/A")
         pdf.drawString(0.75*inch, y_position, f"Lieu: {location}")
         y_position -= 0.3*inch
-        
+
         # Date
         date_str = ticket_data.get("date_epreuve", "Date a venir")
         heure_str = ticket_data.get("heure", "")
         date_complete = f"{date_str} {heure_str}".strip()
         pdf.drawString(0.75*inch, y_position, f"Date: {date_complete}")
         y_position -= 0.3*inch
-        
+
         # Nombre de places et offre
         seats = ticket_data.get("nombre_places", 1)
         offer = ticket_data.get("offer_nom", "Standard")
         pdf.drawString(0.75*inch, y_position, f"{seats} place(s) - Offre {offer}")
         y_position -= 0.3*inch
-        
+
         # Prix
         price = ticket_data.get("prix_total", 0)
         pdf.setFont("Helvetica-Bold", 14)
-        pdf.setFillColor(HexColor("#059669"))
+        pdf.setFillColor(VERT_PRIX)
         pdf.drawString(0.75*inch, y_position, f"Prix: {price} EUR")
         y_position -= 0.7*inch
-        
+
         # ===== QR CODE =====
-        qr_data = {
-            "clef_achat": ticket_data.get("clef_achat", ""),
-            "epreuve": ticket_data.get("epreuve_nom", ""),
-            "user": ticket_data.get("user_name", ""),
-            "date": ticket_data.get("date_epreuve", ""),
-            "places": ticket_data.get("nombre_places", 1)
-        }
-        
-        qr_json = json.dumps(qr_data, ensure_ascii=False)
-        
-        # Générer le QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=2,
-        )
-        qr.add_data(qr_json)
-        qr.make(fit=True)
-        
-        # Convertir en image PIL
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Sauvegarder le QR code dans un fichier temporaire
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-            qr_img.save(tmp_file.name, format='PNG')
-            tmp_qr_path = tmp_file.name
-        
         # Dessiner le QR code sur le PDF (centré)
         qr_size = 3 * inch
         qr_x = (page_width - qr_size) / 2
         qr_y = y_position - qr_size
-        
-        pdf.drawImage(tmp_qr_path, qr_x, qr_y, width=qr_size, height=qr_size)
-        
-        # Supprimer le fichier temporaire
-        os.unlink(tmp_qr_path)
-        
+
+        TicketPDFService._dessiner_qr_code(pdf, ticket_data, qr_x, qr_y, qr_size)
+
         y_position = qr_y - 0.5*inch
-        
+
         # ===== INFOS BILLET =====
         pdf.setFont("Helvetica", 9)
-        pdf.setFillColor(HexColor("#666666"))
-        
+        pdf.setFillColor(GRIS_TEXTE)
+
         # Clé d'achat
         clef = ticket_data.get("clef_achat", "N/A")
         pdf.drawString(0.75*inch, y_position, f"Cle d'acces: {clef}")
         y_position -= 0.25*inch
-        
+
         # Nom du client
         client_name = ticket_data.get("user_name", "N/A")
         pdf.drawString(0.75*inch, y_position, f"Proprietaire: {client_name}")
-        
+
+    @staticmethod
+    def _definir_chrome(pdf: canvas.Canvas):
+        """Enregistre dans le document la form XObject de la partie statique du billet"""
+        page_width, page_height = letter
+
+        pdf.beginForm(TicketPDFService.CHROME_FORM)
+
+        # ===== HEADER =====
+        pdf.setFont("Helvetica-Bold", 28)
+        pdf.setFillColor(BLEU_PARIS)
+        pdf.drawString(0.75*inch, page_height - 0.75*inch, "PARIS 2024")
+
+        pdf.setFont("Helvetica", 12)
+        pdf.setFillColor(GRIS_TEXTE)
+        pdf.drawString(6*inch, page_height - 0.75*inch, "Billet Officiel")
+
+        # Ligne séparatrice
+        pdf.setLineWidth(2)
+        pdf.setStrokeColor(BLEU_PARIS)
+        pdf.line(0.5*inch, page_height - 1.0*inch, 7.5*inch, page_height - 1.0*inch)
+
         # ===== FOOTER =====
         pdf.setLineWidth(1)
-        pdf.setStrokeColor(HexColor("#CCCCCC"))
+        pdf.setStrokeColor(GRIS_LIGNE)
         pdf.line(0.5*inch, 0.7*inch, 7.5*inch, 0.7*inch)
-        
+
         pdf.setFont("Helvetica", 8)
-        pdf.setFillColor(HexColor("#999999"))
+        pdf.setFillColor(GRIS_FOOTER)
         pdf.drawString(0.75*inch, 0.4*inch, "Paris 2024 - Billet electronique officiel")
         pdf.drawString(4.5*inch, 0.4*inch, "Presentez ce QR code a l'entree")
-        
-        # Sauvegarder le PDF
-        pdf.save()
-        pdf_buffer.seek(0)
-        
-        return pdf_buffer.getvalue()
+
+        pdf.endForm()
+
+    @staticmethod
+    def generer_qr_code(ticket_data: dict):
+        """Génère l'image 1 bit du QR code d'un billet (un pixel par module)"""
+        qr_data = {
+            "clef_achat": ticket_data.get("clef_achat", ""),
+            "epreuve": ticket_data.get("epreuve_nom", ""),
+            "user": ticket_data.get("user_name", ""),
+            "date": ticket_data.get("date_epreuve", ""),
+            "places": ticket_data.get("nombre_places", 1)
+        }
+
+        qr_json = json.dumps(qr_data, ensure_ascii=False)
+
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_H,
+            box_size=1,
+            border=2,
+        )
+        qr.add_data(qr_json)
+        qr.make(fit=True)
+
+        # Image PIL en mode "1" : 1 bit par pixel, 1 = blanc
+        return qr.make_image(fill_color="black", back_color="white").get_image()
+
+    @staticmethod
+    def _dessiner_qr_code(pdf: canvas.Canvas, ticket_data: dict, x: float, y: float, size: float):
+        """
+        Dessine le QR code depuis la mémoire, encodé en image 1 bit.
+
+        drawImage convertirait l'image en RGB 8 bits : on construit donc
+        directement l'image XObject (DeviceGray, 1 bit par composante). Sans
+        interpolation, le lecteur PDF agrandit chaque pixel en module net.
+        """
+        qr_img = TicketPDFService.generer_qr_code(ticket_data)
+        bits = qr_img.tobytes()
+        name = "qr_" + hashlib.md5(bits).hexdigest()
+
+        if not pdf.hasForm(name):
+            img_obj = PDFImageXObject(name)
+            img_obj.width, img_obj.height = qr_img.size
+            img_obj.bitsPerComponent = 1
+            img_obj.colorSpace = "DeviceGray"
+            img_obj.streamContent = zlib.compress(bits)
+            img_obj._filters = ("FlateDecode",)
+            pdf._doc.addForm(name, img_obj)
+
+        pdf.saveState()
+        pdf.translate(x, y)
+        pdf.scale(size, size)
+        pdf.doForm(name)
+        pdf.restoreState()
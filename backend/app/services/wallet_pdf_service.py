@@ -0,0 +1,225 @@
+# backend/app/services/wallet_pdf_service.py
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+from reportlab.lib.pagesizes import letter
+from app.services.ticket_pdf_service import TicketPDFService
+
+
+def _nombre(valeur: float) -> str:
+    """Nombre au format PDF, sans zéros inutiles"""
+    texte = f"{valeur:.4f}".rstrip("0").rstrip(".")
+    return texte if texte not in ("", "-0") else "0"
+
+
+def _chaine(texte: str) -> bytes:
+    """Chaîne littérale PDF en WinAnsiEncoding (les polices standard n'ont pas d'Unicode)"""
+    brut = texte.encode("cp1252", errors="replace")
+    return b"(" + brut.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class FluxPDFCanvas:
+    """
+    Écrivain PDF incrémental avec le sous-ensemble de l'API canvas reportlab
+    utilisé par TicketPDFService.dessiner_billet.
+
+    reportlab construit tout le document en mémoire et ne l'écrit qu'à
+    save() : impossible de streamer un PDF de plusieurs centaines de pages.
+    Ici chaque objet (page, form, image) est sérialisé dès qu'il est
+    terminé et ses octets rendus par vider() ; seuls les offsets de la
+    table xref et les références des pages restent en mémoire. Les polices
+    sont les polices standard PDF, non embarquées, comme avec reportlab.
+    """
+
+    # Objets réservés : 1 = catalogue, 2 = arbre des pages (écrits à la fin)
+    CATALOGUE = 1
+    PAGES = 2
+
+    def __init__(self, pagesize=letter):
+        self.largeur, self.hauteur = pagesize
+        self._tampon = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._position = 0
+        self._offsets: Dict[int, int] = {}
+        self._prochain_objet = 3
+        self._pages: List[int] = []
+
+        # Polices et XObjects (forms, images) : nom PDF → numéro d'objet
+        self._polices: Dict[str, tuple] = {}
+        self._xobjects: Dict[str, int] = {}
+        self._police_courante: Optional[tuple] = None
+
+        self._code: List[bytes] = []
+        self._xobjects_page: Dict[str, int] = {}
+        self._form_en_cours: Optional[str] = None
+        self._code_page: List[bytes] = []
+
+        # Même interface que le document reportlab pour enregistrer une image déjà encodée
+        self._doc = self
+
+    # ===== ÉCRITURE DES OBJETS =====
+
+    def _nouvel_objet(self) -> int:
+        numero = self._prochain_objet
+        self._prochain_objet += 1
+        return numero
+
+    def _ecrire_objet(self, numero: int, dictionnaire: bytes, flux: Optional[bytes] = None):
+        self._offsets[numero] = self._position + len(self._tampon)
+        self._tampon += b"%d 0 obj\n<< " % numero + dictionnaire
+        if flux is None:
+            self._tampon += b" >>\nendobj\n"
+        else:
+            self._tampon += b" /Length %d >>\nstream\n" % len(flux) + flux + b"\nendstream\nendobj\n"
+
+    def vider(self) -> bytes:
+        """Retourne les octets produits depuis le dernier appel"""
+        morceau = bytes(self._tampon)
+        self._position += len(morceau)
+        self._tampon.clear()
+        return morceau
+
+    def _ressources(self, xobjects: Dict[str, int]) -> bytes:
+        polices = b" ".join(b"/%s %d 0 R" % (nom.encode(), numero) for nom, numero in self._polices.values())
+        ressources = b"/Font << " + polices + b" >> /ProcSet [/PDF /Text /ImageB]"
+        if xobjects:
+            refs = b" ".join(b"/%s %d 0 R" % (nom.encode(), numero) for nom, numero in xobjects.items())
+            ressources += b" /XObject << " + refs + b" >>"
+        return b"<< " + ressources + b" >>"
+
+    # ===== API CANVAS =====
+
+    def _op(self, operation: bytes):
+        self._code.append(operation)
+
+    def setFont(self, police: str, taille: float):
+        if police not in self._polices:
+            self._polices[police] = (f"F{len(self._polices) + 1}", self._nouvel_objet())
+        self._police_courante = (self._polices[police][0], taille)
+
+    def setFillColor(self, couleur):
+        self._op(b"%s %s %s rg" % tuple(_nombre(c).encode() for c in (couleur.red, couleur.green, couleur.blue)))
+
+    def setStrokeColor(self, couleur):
+        self._op(b"%s %s %s RG" % tuple(_nombre(c).encode() for c in (couleur.red, couleur.green, couleur.blue)))
+
+    def setLineWidth(self, largeur: float):
+        self._op(b"%s w" % _nombre(largeur).encode())
+
+    def line(self, x1: float, y1: float, x2: float, y2: float):
+        self._op(b"%s %s m %s %s l S" % tuple(_nombre(v).encode() for v in (x1, y1, x2, y2)))
+
+    def drawString(self, x: float, y: float, texte: str):
+        nom, taille = self._police_courante
+        self._op(
+            b"BT /%s %s Tf 1 0 0 1 %s %s Tm %s Tj ET"
+            % (nom.encode(), _nombre(taille).encode(), _nombre(x).encode(), _nombre(y).encode(), _chaine(texte))
+        )
+
+    def saveState(self):
+        self._op(b"q")
+
+    def restoreState(self):
+        self._op(b"Q")
+
+    def translate(self, dx: float, dy: float):
+        self._op(b"1 0 0 1 %s %s cm" % (_nombre(dx).encode(), _nombre(dy).encode()))
+
+    def scale(self, sx: float, sy: float):
+        self._op(b"%s 0 0 %s 0 0 cm" % (_nombre(sx).encode(), _nombre(sy).encode()))
+
+    def hasForm(self, nom: str) -> bool:
+        return nom in self._xobjects
+
+    def doForm(self, nom: str):
+        self._xobjects_page[nom] = self._xobjects[nom]
+        self._op(b"/%s Do" % nom.encode())
+
+    def beginForm(self, nom: str):
+        self._form_en_cours = nom
+        self._code_page, self._code = self._code, []
+
+    def endForm(self):
+        numero = self._nouvel_objet()
+        flux = zlib.compress(b"\n".join(self._code))
+        self._ecrire_objet(
+            numero,
+            b"/Type /XObject /Subtype /Form /BBox [0 0 %s %s] /Resources %s /Filter /FlateDecode"
+            % (_nombre(self.largeur).encode(), _nombre(self.hauteur).encode(), self._ressources({})),
+            flux,
+        )
+        self._xobjects[self._form_en_cours] = numero
+        self._code, self._code_page = self._code_page, []
+        self._form_en_cours = None
+
+    def addForm(self, nom: str, image):
+        """Enregistre une image déjà compressée (PDFImageXObject construit par TicketPDFService)"""
+        numero = self._nouvel_objet()
+        filtres = b" ".join(b"/" + f.encode() for f in image._filters)
+        self._ecrire_objet(
+            numero,
+            b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /%s /BitsPerComponent %d /Filter [%s]"
+            % (image.width, image.height, image.colorSpace.encode(), image.bitsPerComponent, filtres),
+            image.streamContent,
+        )
+        self._xobjects[nom] = numero
+
+    def showPage(self):
+        """Termine la page courante et l'écrit immédiatement"""
+        contenu = self._nouvel_objet()
+        self._ecrire_objet(contenu, b"/Filter /FlateDecode", zlib.compress(b"\n".join(self._code)))
+
+        page = self._nouvel_objet()
+        self._ecrire_objet(
+            page,
+            b"/Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] /Contents %d 0 R /Resources %s"
+            % (
+                self.PAGES,
+                _nombre(self.largeur).encode(),
+                _nombre(self.hauteur).encode(),
+                contenu,
+                self._ressources(self._xobjects_page),
+            ),
+        )
+        self._pages.append(page)
+        self._code = []
+        self._xobjects_page = {}
+
+    def save(self):
+        """Écrit les polices, l'arbre des pages, le catalogue, la table xref et le trailer"""
+        for police, (_, numero) in self._polices.items():
+            self._ecrire_objet(
+                numero,
+                b"/Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding" % police.encode(),
+            )
+        kids = b" ".join(b"%d 0 R" % page for page in self._pages)
+        self._ecrire_objet(self.PAGES, b"/Type /Pages /Kids [%s] /Count %d" % (kids, len(self._pages)))
+        self._ecrire_objet(self.CATALOGUE, b"/Type /Catalog /Pages %d 0 R" % self.PAGES)
+
+        debut_xref = self._position + len(self._tampon)
+        self._tampon += b"xref\n0 %d\n0000000000 65535 f \n" % self._prochain_objet
+        for numero in range(1, self._prochain_objet):
+            self._tampon += b"%010d 00000 n \n" % self._offsets[numero]
+        self._tampon += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            self._prochain_objet, self.CATALOGUE, debut_xref
+        )
+
+
+class WalletPDFService:
+    """Service de génération du portefeuille PDF (tous les billets d'un utilisateur)"""
+
+    @staticmethod
+    def generer_wallet(tickets_data: Iterable[dict]) -> Iterator[bytes]:
+        """
+        Génère un PDF d'une page par billet, morceau par morceau.
+
+        Chaque page est dessinée avec la mise en page de TicketPDFService,
+        écrite puis rendue immédiatement : le client reçoit la première page
+        pendant que les suivantes sont générées, et la mémoire utilisée ne
+        dépend pas du nombre de billets.
+        """
+        pdf = FluxPDFCanvas(pagesize=letter)
+        for ticket_data in tickets_data:
+            TicketPDFService.dessiner_billet(pdf, ticket_data)
+            pdf.showPage()
+            yield pdf.vider()
+        pdf.save()
+        yield pdf.vider()
@@ -0,0 +1,319 @@
+# backend/benchmarks/bench_api.py
+"""
+Benchmark de bout en bout de l'API de billetterie, résultats en JSON.
+
+Lance l'application (uvicorn) contre la base de DATABASE_URL (Postgres, ou
+SQLite pour un essai rapide), prépare ses données de test puis joue des
+scénarios scriptés, chacun pendant `--duree` secondes avec `--concurrence`
+clients :
+
+    catalogue    GET /api/sports, /api/sports/{slug}, /offers
+    panier       ajout au panier, lecture, suppression
+    checkout     ajout au panier puis achat, tous sur la même finale
+    historique   GET /api/tickets/user/{id}
+    pdf          GET /api/tickets/{id}/download-pdf
+
+Pour chaque étape : requêtes par seconde, latences p50/p95/p99 (ms), codes
+de statut et requêtes SQL par requête HTTP (en-tête X-DB-Queries, activé
+par DB_QUERY_COUNT_HEADER=1 sur le serveur lancé). Le JSON est écrit sur la
+sortie standard ou dans `--sortie`, le résumé lisible sur la sortie
+d'erreur ; deux fichiers de deux commits se comparent directement. À lancer
+depuis backend/, avec JWT_SECRET_KEY (ou JWT_INSECURE_DEV_KEY=1) : les
+jetons signés ici sont vérifiés par le serveur lancé.
+
+    python -m benchmarks.bench_api --concurrence 50 --duree 10 --sortie resultats.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+import httpx
+from sqlmodel import Session, select
+from app.core.tokens import creer_access_token
+from app.db.compteur_requetes import EN_TETE_REQUETES_SQL
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+from app.models.offer import Offer
+from app.models.panier import PanierItem
+from app.models.sport import Sport
+from app.models.user import User
+from app.services.checkout_service import CheckoutService
+from benchmarks.bench_async import attendre_serveur
+from benchmarks.stress_survente import creer_finale
+
+
+SCENARIOS = ["catalogue", "panier", "checkout", "historique", "pdf"]
+
+
+# ===== PRÉPARATION DES DONNÉES =====
+
+def preparer_donnees(nb_utilisateurs: int, billets_par_utilisateur: int, places_finale: int) -> dict:
+    """Acheteurs de test (un par client simulé) avec leurs billets, finale du checkout, slugs du catalogue"""
+    epreuve_billets = creer_finale(nb_utilisateurs * (billets_par_utilisateur + 10) * 4)
+    finale = creer_finale(places_finale)
+    suffixe = int(time.time() * 1000)
+
+    with Session(engine) as session:
+        offer = session.exec(select(Offer).order_by(Offer.capacite_personne)).first()
+        if not offer:
+            offer = Offer(nom_offre="Solo", prix=50.0, capacite_personne=1)
+            session.add(offer)
+            session.commit()
+        offer_id = offer.id
+        slugs = list(session.exec(select(Sport.slug).limit(20)).all())
+
+        utilisateurs = []
+        for n in range(nb_utilisateurs):
+            user = User(
+                email=f"bench-api-{suffixe}-{n}@olympic.com",
+                nom="Bench",
+                prenom="API",
+                hashed_password="!",
+                clef_compte=f"bench-api-{suffixe}-{n}",
+            )
+            session.add(user)
+            session.flush()
+            for _ in range(billets_par_utilisateur):
+                session.add(PanierItem(user_id=user.id, epreuve_id=epreuve_billets, offer_id=offer_id))
+            utilisateurs.append(user.id)
+        session.commit()
+
+    billets = {}
+    for user_id in utilisateurs:
+        with Session(engine) as session:
+            if billets_par_utilisateur:
+                resultat = CheckoutService.valider_panier(session, user_id)
+                billets[user_id] = [t["ticket_id"] for t in resultat["tickets"]]
+            else:
+                billets[user_id] = []
+
+    return {
+        "utilisateurs": [
+            {"id": user_id, "billets": billets[user_id], "headers": {"Authorization": f"Bearer {creer_access_token(user_id, 'client')}"}}
+            for user_id in utilisateurs
+        ],
+        "slugs": slugs,
+        "offer_id": offer_id,
+        "epreuve_panier": epreuve_billets,
+        "finale": finale,
+    }
+
+
+# ===== SCÉNARIOS =====
+
+class Mesures:
+    """(latence en ms, statut, requêtes SQL) de chaque requête HTTP, par étape"""
+
+    def __init__(self):
+        self.etapes = defaultdict(list)
+
+    async def requete(self, client: httpx.AsyncClient, etape: str, methode: str, url: str, **kwargs):
+        debut = time.perf_counter()
+        try:
+            reponse = await client.request(methode, url, **kwargs)
+        except httpx.HTTPError:
+            self.etapes[etape].append(((time.perf_counter() - debut) * 1000, "erreur", None))
+            return None
+        requetes_sql = reponse.headers.get(EN_TETE_REQUETES_SQL)
+        self.etapes[etape].append(((time.perf_counter() - debut) * 1000, reponse.status_code, int(requetes_sql) if requetes_sql else None))
+        return reponse
+
+
+async def scenario_catalogue(mesures: Mesures, client, donnees: dict, utilisateur: dict, i: int):
+    await mesures.requete(client, "liste_sports", "GET", "/api/sports")
+    if donnees["slugs"]:
+        await mesures.requete(client, "detail_sport", "GET", f"/api/sports/{donnees['slugs'][i % len(donnees['slugs'])]}")
+    await mesures.requete(client, "offres", "GET", "/offers")
+
+
+async def scenario_panier(mesures: Mesures, client, donnees: dict, utilisateur: dict, i: int):
+    chemin = f"/api/panier/user/{utilisateur['id']}"
+    headers = utilisateur["headers"]
+    params = {"epreuve_id": donnees["epreuve_panier"], "offer_id": donnees["offer_id"]}
+    reponse = await mesures.requete(client, "ajout", "POST", chemin, params=params, headers=headers)
+    await mesures.requete(client, "lecture", "GET", chemin, headers=headers)
+    if reponse is not None and reponse.status_code == 200:
+        await mesures.requete(client, "suppression", "DELETE", f"{chemin}/item/{reponse.json()['item_id']}", headers=headers)
+
+
+async def scenario_checkout(mesures: Mesures, client, donnees: dict, utilisateur: dict, i: int):
+    headers = utilisateur["headers"]
+    params = {"epreuve_id": donnees["finale"], "offer_id": donnees["offer_id"]}
+    reponse = await mesures.requete(client, "ajout", "POST", f"/api/panier/user/{utilisateur['id']}", params=params, headers=headers)
+    if reponse is not None and reponse.status_code == 200:
+        await mesures.requete(client, "achat", "POST", f"/api/tickets/acheter/{utilisateur['id']}", headers=headers)
+
+
+async def scenario_historique(mesures: Mesures, client, donnees: dict, utilisateur: dict, i: int):
+    await mesures.requete(client, "historique", "GET", f"/api/tickets/user/{utilisateur['id']}", params={"limit": 20}, headers=utilisateur["headers"])
+
+
+async def scenario_pdf(mesures: Mesures, client, donnees: dict, utilisateur: dict, i: int):
+    if utilisateur["billets"]:
+        ticket_id = utilisateur["billets"][i % len(utilisateur["billets"])]
+        await mesures.requete(client, "pdf", "GET", f"/api/tickets/{ticket_id}/download-pdf", headers=utilisateur["headers"])
+
+
+FONCTIONS_SCENARIOS = {
+    "catalogue": scenario_catalogue,
+    "panier": scenario_panier,
+    "checkout": scenario_checkout,
+    "historique": scenario_historique,
+    "pdf": scenario_pdf,
+}
+
+
+async def jouer(url: str, scenario, donnees: dict, concurrence: int, duree: float) -> tuple:
+    """Chaque client (un acheteur de test chacun) rejoue le scénario en boucle ; retourne (mesures, durée réelle)"""
+    mesures = Mesures()
+    limites = httpx.Limits(max_connections=concurrence, max_keepalive_connections=concurrence)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as client:
+        fin = time.perf_counter() + duree
+
+        async def client_charge(n: int):
+            utilisateur = donnees["utilisateurs"][n % len(donnees["utilisateurs"])]
+            i = n
+            while time.perf_counter() < fin:
+                await scenario(mesures, client, donnees, utilisateur, i)
+                i += 1
+
+        debut = time.perf_counter()
+        await asyncio.gather(*(client_charge(n) for n in range(concurrence)))
+        return mesures, time.perf_counter() - debut
+
+
+# ===== RÉSULTATS =====
+
+def percentile(valeurs_triees: list, p: float) -> float:
+    """Percentile au rang le plus proche"""
+    if not valeurs_triees:
+        return 0.0
+    return valeurs_triees[max(math.ceil(p / 100 * len(valeurs_triees)) - 1, 0)]
+
+
+def resumer(echantillons: list, ecoule: float) -> dict:
+    latences = sorted(e[0] for e in echantillons)
+    statuts = defaultdict(int)
+    for _latence, statut, _sql in echantillons:
+        statuts[str(statut)] += 1
+    requetes_sql = [e[2] for e in echantillons if e[2] is not None]
+    return {
+        "requetes": len(echantillons),
+        "rps": round(len(echantillons) / ecoule, 2) if ecoule else 0.0,
+        "latence_ms": {
+            "p50": round(percentile(latences, 50), 2),
+            "p95": round(percentile(latences, 95), 2),
+            "p99": round(percentile(latences, 99), 2),
+            "max": round(latences[-1], 2) if latences else 0.0,
+        },
+        "statuts": dict(sorted(statuts.items())),
+        # Erreurs serveur et de transport ; les 4xx (places épuisées...) sont des réponses attendues
+        "erreurs": sum(n for statut, n in statuts.items() if statut == "erreur" or int(statut) >= 500),
+        "requetes_sql_par_requete": {
+            "moyenne": round(sum(requetes_sql) / len(requetes_sql), 2),
+            "max": max(requetes_sql),
+        } if requetes_sql else None,
+    }
+
+
+def resultat_scenario(mesures: Mesures, ecoule: float) -> dict:
+    tous = [e for echantillons in mesures.etapes.values() for e in echantillons]
+    return {
+        **resumer(tous, ecoule),
+        "duree_s": round(ecoule, 2),
+        "etapes": {etape: resumer(echantillons, ecoule) for etape, echantillons in mesures.etapes.items()},
+    }
+
+
+def commit_courant() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnu"
+
+
+# ===== LANCEMENT =====
+
+def demarrer_serveur(args) -> subprocess.Popen:
+    env = {**os.environ, "DB_QUERY_COUNT_HEADER": "1", "DB_ASYNC": "0" if args.sync else "1"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+        # Les journaux du serveur ne se mêlent pas au JSON de la sortie standard
+        stdout=sys.stderr,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrence", type=int, default=50, help="Clients simultanés (un acheteur de test chacun)")
+    parser.add_argument("--duree", type=float, default=10, help="Durée de chaque scénario (secondes)")
+    parser.add_argument("--prechauffage", type=float, default=2, help="Durée du préchauffage non mesuré de chaque scénario")
+    parser.add_argument("--billets", type=int, default=20, help="Billets de chaque acheteur (historique, PDF)")
+    parser.add_argument("--places-finale", type=int, default=1_000_000, help="Places de la finale du checkout")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn")
+    parser.add_argument("--sync", action="store_true", help="Sessions synchrones dans le threadpool (DB_ASYNC=0)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--sortie", default="-", help="Fichier JSON des résultats ('-' : sortie standard)")
+    args = parser.parse_args()
+
+    engine.echo = False
+    appliquer_migrations()
+    print("📥 Préparation des données de test", file=sys.stderr)
+    donnees = preparer_donnees(args.concurrence, args.billets, args.places_finale)
+
+    resultats = {
+        "meta": {
+            "commit": commit_courant(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base": engine.dialect.name,
+            "db_async": not args.sync,
+            "workers": args.workers,
+            "concurrence": args.concurrence,
+            "duree_s": args.duree,
+            "billets_par_acheteur": args.billets,
+            "python": platform.python_version(),
+        },
+        "scenarios": {},
+    }
+
+    serveur = demarrer_serveur(args)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(attendre_serveur(url))
+        for nom in args.scenarios:
+            scenario = FONCTIONS_SCENARIOS[nom]
+            if args.prechauffage > 0:
+                asyncio.run(jouer(url, scenario, donnees, args.concurrence, args.prechauffage))
+            mesures, ecoule = asyncio.run(jouer(url, scenario, donnees, args.concurrence, args.duree))
+            r = resultats["scenarios"][nom] = resultat_scenario(mesures, ecoule)
+            sql = r["requetes_sql_par_requete"]
+            print(
+                f"{nom:<11} {r['rps']:8.1f} req/s  p50={r['latence_ms']['p50']:7.2f}  p95={r['latence_ms']['p95']:7.2f}  "
+                f"p99={r['latence_ms']['p99']:7.2f} ms  sql/req={sql['moyenne'] if sql else '-'}  erreurs={r['erreurs']}",
+                file=sys.stderr,
+            )
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+    contenu = json.dumps(resultats, indent=2, ensure_ascii=False)
+    if args.sortie == "-":
+        print(contenu)
+    else:
+        with open(args.sortie, "w", encoding="utf-8") as fichier:
+            fichier.write(contenu + "\n")
+        print(f"✅ Résultats écrits dans {args.sortie}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# backend/benchmarks/bench_async.py
+"""
+Benchmark : requêtes par seconde des routes selon la couche base de données.
+
+Lance le serveur deux fois sur la même machine, avec DB_ASYNC=1 (AsyncSession
+sur asyncpg) puis DB_ASYNC=0 (sessions synchrones dans le threadpool de
+Starlette, 40 threads), et envoie la même charge à forte concurrence sur des
+routes qui lisent la base à chaque appel. À lancer depuis backend/
+(DATABASE_URL, JWT_SECRET_KEY ou JWT_INSECURE_DEV_KEY=1) :
+
+    python -m benchmarks.bench_async --concurrence 200 --duree 15
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from sqlmodel import Session
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+from app.core.tokens import creer_access_token
+from app.services.checkout_service import CheckoutService
+from benchmarks.bench_checkout import preparer_panier
+
+
+def preparer_donnees(nb_billets: int) -> int:
+    """Crée un acheteur avec `nb_billets` billets, retourne son id"""
+    user_id = preparer_panier(nb_billets)
+    with Session(engine) as session:
+        CheckoutService.valider_panier(session, user_id)
+    return user_id
+
+
+def demarrer_serveur(db_async: bool, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "DB_ASYNC": "1" if db_async else "0"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+
+
+async def attendre_serveur(url: str, delai: float = 30):
+    limite = time.monotonic() + delai
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < limite:
+            try:
+                await client.get("/api/sports")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Serveur injoignable sur {url}")
+
+
+async def charger(url: str, chemins: list, concurrence: int, duree: float, headers: dict) -> dict:
+    """`concurrence` clients bouclent sur `chemins` pendant `duree` secondes"""
+    latences = []
+    erreurs = 0
+    limites = httpx.Limits(max_connections=concurrence, max_keepalive_connections=concurrence)
+
+    async with httpx.AsyncClient(base_url=url, limits=limites, headers=headers, timeout=60) as client:
+        fin = time.perf_counter() + duree
+
+        async def client_charge(decalage: int):
+            nonlocal erreurs
+            i = decalage
+            while time.perf_counter() < fin:
+                debut = time.perf_counter()
+                try:
+                    reponse = await client.get(chemins[i % len(chemins)])
+                    if reponse.status_code >= 400:
+                        erreurs += 1
+                    else:
+                        latences.append((time.perf_counter() - debut) * 1000)
+                except httpx.HTTPError:
+                    erreurs += 1
+                i += 1
+
+        debut = time.perf_counter()
+        await asyncio.gather(*(client_charge(n) for n in range(concurrence)))
+        ecoule = time.perf_counter() - debut
+
+    latences.sort()
+    return {
+        "rps": len(latences) / ecoule,
+        "p50": statistics.median(latences) if latences else 0.0,
+        "p99": latences[max(int(len(latences) * 0.99) - 1, 0)] if latences else 0.0,
+        "erreurs": erreurs,
+    }
+
+
+def mesurer(db_async: bool, args, chemins: list, headers: dict) -> dict:
+    serveur = demarrer_serveur(db_async, args.port, args.workers)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(attendre_serveur(url))
+        # Préchauffage : ouvre les connexions du pool
+        asyncio.run(charger(url, chemins, min(args.concurrence, 20), 1, headers))
+        return asyncio.run(charger(url, chemins, args.concurrence, args.duree, headers))
+    finally:
+        serveur.terminate()
+        serveur.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrence", type=int, default=200, help="Clients simultanés")
+    parser.add_argument("--duree", type=float, default=15, help="Durée de chaque mesure (secondes)")
+    parser.add_argument("--billets", type=int, default=10, help="Billets de l'acheteur de test")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    engine.echo = False
+    appliquer_migrations()
+    user_id = preparer_donnees(args.billets)
+
+    # Routes qui interrogent la base à chaque appel (pas de cache)
+    chemins = [f"/api/tickets/user/{user_id}", f"/api/panier/user/{user_id}", f"/api/tickets/user/{user_id}?limit=5"]
+    headers = {"Authorization": f"Bearer {creer_access_token(user_id, 'client')}"}
+
+    print(f"{args.concurrence} clients, {args.duree:.0f} s par mesure, {args.workers} worker(s)")
+    resultats = {}
+    for db_async in (True, False):
+        nom = "async (AsyncSession)" if db_async else "sync (threadpool)"
+        r = resultats[nom] = mesurer(db_async, args, chemins, headers)
+        print(f"{nom:<22} {r['rps']:8.1f} req/s  p50={r['p50']:7.2f} ms  p99={r['p99']:7.2f} ms  erreurs={r['erreurs']}")
+
+    rps_async, rps_sync = (r["rps"] for r in resultats.values())
+    if rps_sync:
+        print(f"Rapport async/sync : x{rps_async / rps_sync:.2f}")
+
+
+if __name__ == "__main__":
+    main()
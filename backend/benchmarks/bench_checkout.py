@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_checkout.py
+"""
+Benchmark : latence d'écriture du checkout selon la taille du panier.
+
+Compare CheckoutService.ecrire_tickets (INSERT groupés + DELETE unique) à
+l'ancienne boucle qui faisait un add + flush par article. Chaque mesure est
+annulée par un rollback pour repartir du même panier. À lancer depuis
+backend/ (DATABASE_URL) :
+
+    python -m benchmarks.bench_checkout --tailles 1 5 10 25 50 --repetitions 20
+"""
+import argparse
+import secrets
+import statistics
+import time
+from datetime import datetime
+from sqlmodel import Session, select
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+from app.models.offer import Offer
+from app.models.panier import PanierItem
+from app.models.sport import Epreuve, TicketEpreuve
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.services.checkout_service import CheckoutService
+from benchmarks.stress_survente import creer_finale
+
+
+def ecrire_tickets_unitaire(session: Session, user_id: int, lignes) -> list:
+    """Ancienne écriture du checkout : un flush par article pour obtenir l'id du ticket"""
+    tickets_crees = []
+    for item, epreuve, offer in lignes:
+        clef_achat = secrets.token_urlsafe(16)
+        ticket = Ticket(
+            user_id=user_id,
+            offer_id=offer.id,
+            clef_achat=clef_achat,
+            qr_code_content=f"{clef_achat}-{int(datetime.utcnow().timestamp())}",
+            prix_total=offer.prix * item.nombre_places,
+            nombre_places=item.nombre_places,
+        )
+        session.add(ticket)
+        session.flush()
+        session.add(TicketEpreuve(ticket_id=ticket.id, epreuve_id=epreuve.id, nombre_places=item.nombre_places))
+        session.delete(item)
+        tickets_crees.append({"ticket_id": ticket.id, "epreuve": epreuve.nom_epreuve, "prix": ticket.prix_total})
+    session.flush()
+    return tickets_crees
+
+
+def preparer_panier(taille: int) -> int:
+    """Crée un acheteur et un panier de `taille` articles, retourne l'id de l'acheteur"""
+    epreuve_id = creer_finale(taille * 10)
+    with Session(engine) as session:
+        offer = session.exec(select(Offer)).first()
+        if not offer:
+            offer = Offer(nom_offre="Solo", prix=50.0, capacite_personne=1)
+            session.add(offer)
+        user = User(
+            email=f"bench-{secrets.token_hex(6)}@olympic.com",
+            nom="Bench",
+            prenom="Checkout",
+            hashed_password="!",
+            clef_compte=secrets.token_urlsafe(32),
+        )
+        session.add(user)
+        session.flush()
+        for _ in range(taille):
+            session.add(PanierItem(user_id=user.id, epreuve_id=epreuve_id, offer_id=offer.id))
+        session.commit()
+        return user.id
+
+
+def mesurer(ecrire, user_id: int, repetitions: int) -> list:
+    """Latences (ms) de `ecrire` sur le panier de l'acheteur, annulées par rollback"""
+    latences = []
+    for _ in range(repetitions):
+        with Session(engine) as session:
+            items = session.exec(select(PanierItem).where(PanierItem.user_id == user_id)).all()
+            lignes = [(item, session.get(Epreuve, item.epreuve_id), session.get(Offer, item.offer_id)) for item in items]
+            debut = time.perf_counter()
+            ecrire(session, user_id, lignes)
+            session.flush()
+            latences.append((time.perf_counter() - debut) * 1000)
+            session.rollback()
+    return latences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tailles", type=int, nargs="+", default=[1, 5, 10, 25, 50], help="Tailles de panier")
+    parser.add_argument("--repetitions", type=int, default=20)
+    args = parser.parse_args()
+
+    engine.echo = False
+    appliquer_migrations()
+
+    print(f"{'articles':>8} | {'unitaire (ms)':>14} | {'groupé (ms)':>12} | gain")
+    for taille in args.tailles:
+        user_id = preparer_panier(taille)
+        unitaire = statistics.median(mesurer(ecrire_tickets_unitaire, user_id, args.repetitions))
+        groupe = statistics.median(mesurer(CheckoutService.ecrire_tickets, user_id, args.repetitions))
+        print(f"{taille:>8} | {unitaire:>14.2f} | {groupe:>12.2f} | x{unitaire / groupe:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# backend/benchmarks/bench_pdf.py
+"""
+Micro-benchmark : débit (PDF/s) et taille (octets/PDF) de la génération de billets.
+
+Compare TicketPDFService (QR en mémoire en image 1 bit, partie statique en
+form XObject) à l'ancienne implémentation, reproduite ci-dessous : QR PNG
+8 bits écrit dans un fichier temporaire puis relu par drawImage, page entière
+redessinée à chaque appel. Aucune base de données n'est nécessaire :
+
+    python -m benchmarks.bench_pdf --iterations 200
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import qrcode
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from app.services.ticket_pdf_service import TicketPDFService
+
+
+TICKET_DATA = {
+    "clef_achat": "Zk3v9Qm1xP7rT2bN8sLw4A",
+    "epreuve_nom": "Finale 100m hommes",
+    "sport_nom": "Athlétisme",
+    "lieu": "Stade de France",
+    "date_epreuve": "2024-08-04",
+    "heure": "21:50",
+    "nombre_places": 2,
+    "offer_nom": "Duo",
+    "prix_total": 250.0,
+    "user_name": "Jean Dupont",
+}
+
+
+def generer_ancien(ticket_data: dict) -> bytes:
+    """Ancienne génération : QR PNG via fichier temporaire, tout redessiné à chaque appel"""
+    pdf_buffer = io.BytesIO()
+    page_width, page_height = letter
+    pdf = canvas.Canvas(pdf_buffer, pagesize=letter)
+
+    pdf.setFont("Helvetica-Bold", 28)
+    pdf.setFillColor(HexColor("#0052CC"))
+    pdf.drawString(0.75*inch, page_height - 0.75*inch, "PARIS 2024")
+    pdf.setFont("Helvetica", 12)
+    pdf.setFillColor(HexColor("#666666"))
+    pdf.drawString(6*inch, page_height - 0.75*inch, "Billet Officiel")
+    pdf.setLineWidth(2)
+    pdf.setStrokeColor(HexColor("#0052CC"))
+    pdf.line(0.5*inch, page_height - 1.0*inch, 7.5*inch, page_height - 1.0*inch)
+
+    y_position = page_height - 1.5*inch
+    pdf.setFont("Helvetica-Bold", 20)
+    pdf.setFillColor(HexColor("#1F2937"))
+    pdf.drawString(0.75*inch, y_position, ticket_data.get("epreuve_nom", "Evenement Olympique"))
+    y_position -= 0.5*inch
+    pdf.setFont("Helvetica", 12)
+    pdf.setFillColor(HexColor("#4B5563"))
+    pdf.drawString(0.75*inch, y_position, f"Sport: {ticket_data.get('sport_nom', 'N/A')}")
+    y_position -= 0.3*inch
+    pdf.drawString(0.75*inch, y_position, f"Lieu: {ticket_data.get('lieu', 'N/A')}")
+    y_position -= 0.3*inch
+    date_complete = f"{ticket_data.get('date_epreuve', 'Date a venir')} {ticket_data.get('heure', '')}".strip()
+    pdf.drawString(0.75*inch, y_position, f"Date: {date_complete}")
+    y_position -= 0.3*inch
+    pdf.drawString(
+        0.75*inch, y_position,
+        f"{ticket_data.get('nombre_places', 1)} place(s) - Offre {ticket_data.get('offer_nom', 'Standard')}",
+    )
+    y_position -= 0.3*inch
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.setFillColor(HexColor("#059669"))
+    pdf.drawString(0.75*inch, y_position, f"Prix: {ticket_data.get('prix_total', 0)} EUR")
+    y_position -= 0.7*inch
+
+    qr_data = {
+        "clef_achat": ticket_data.get("clef_achat", ""),
+        "epreuve": ticket_data.get("epreuve_nom", ""),
+        "user": ticket_data.get("user_name", ""),
+        "date": ticket_data.get("date_epreuve", ""),
+        "places": ticket_data.get("nombre_places", 1)
+    }
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=2)
+    qr.add_data(json.dumps(qr_data, ensure_ascii=False))
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
+        qr_img.save(tmp_file.name, format='PNG')
+        tmp_qr_path = tmp_file.name
+    qr_size = 3 * inch
+    qr_x = (page_width - qr_size) / 2
+    qr_y = y_position - qr_size
+    pdf.drawImage(tmp_qr_path, qr_x, qr_y, width=qr_size, height=qr_size)
+    os.unlink(tmp_qr_path)
+
+    y_position = qr_y - 0.5*inch
+    pdf.setFont("Helvetica", 9)
+    pdf.setFillColor(HexColor("#666666"))
+    pdf.drawString(0.75*inch, y_position, f"Cle d'acces: {ticket_data.get('clef_achat', 'N/A')}")
+    y_position -= 0.25*inch
+    pdf.drawString(0.75*inch, y_position, f"Proprietaire: {ticket_data.get('user_name', 'N/A')}")
+
+    pdf.setLineWidth(1)
+    pdf.setStrokeColor(HexColor("#CCCCCC"))
+    pdf.line(0.5*inch, 0.7*inch, 7.5*inch, 0.7*inch)
+    pdf.setFont("Helvetica", 8)
+    pdf.setFillColor(HexColor("#999999"))
+    pdf.drawString(0.75*inch, 0.4*inch, "Paris 2024 - Billet electronique officiel")
+    pdf.drawString(4.5*inch, 0.4*inch, "Presentez ce QR code a l'entree")
+
+    pdf.save()
+    return pdf_buffer.getvalue()
+
+
+def mesurer(nom: str, generer, iterations: int) -> dict:
+    """Génère `iterations` PDF (clés d'achat distinctes) et retourne débit et taille moyenne"""
+    generer(TICKET_DATA)  # échauffement : polices et imports chargés
+
+    tailles = []
+    debut = time.perf_counter()
+    for i in range(iterations):
+        tailles.append(len(generer({**TICKET_DATA, "clef_achat": f"{TICKET_DATA['clef_achat']}{i}"})))
+    duree = time.perf_counter() - debut
+
+    resultat = {
+        "implementation": nom,
+        "pdf_par_seconde": round(iterations / duree, 1),
+        "ms_par_pdf": round(duree / iterations * 1000, 2),
+        "octets_par_pdf": round(sum(tailles) / len(tailles)),
+    }
+    print(
+        f"{nom:<10} {resultat['pdf_par_seconde']:>8} PDF/s  "
+        f"{resultat['ms_par_pdf']:>7} ms/PDF  {resultat['octets_par_pdf']:>7} octets/PDF"
+    )
+    return resultat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    ancien = mesurer("ancien", generer_ancien, args.iterations)
+    actuel = mesurer("actuel", TicketPDFService.generate_ticket_pdf, args.iterations)
+
+    print(
+        f"Gain : x{actuel['pdf_par_seconde'] / ancien['pdf_par_seconde']:.2f} en débit, "
+        f"{100 * (1 - actuel['octets_par_pdf'] / ancien['octets_par_pdf']):.0f}% d'octets en moins"
+    )
+
+
+if __name__ == "__main__":
+    main()
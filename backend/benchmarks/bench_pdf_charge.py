@@ -0,0 +1,100 @@
+# backend/benchmarks/bench_pdf_charge.py
+"""
+Test de charge : latence du catalogue pendant des téléchargements de PDF.
+
+Mesure /api/sports seul, puis pendant que des clients téléchargent des
+billets en boucle. Avec la génération hors de la boucle d'événements, la
+latence du catalogue doit rester stable. À lancer depuis backend/
+(DATABASE_URL, PDF_EXECUTOR=process|thread) :
+
+    python -m benchmarks.bench_pdf_charge --requetes 200 --clients-pdf 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+from sqlmodel import Session
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+from app.core.tokens import creer_access_token
+from app.main import app
+from app.services.checkout_service import CheckoutService
+from app.services.pdf_executor import pdf_render_pool
+from benchmarks.bench_checkout import preparer_panier
+
+
+def creer_billet() -> tuple:
+    """Crée un panier d'un article et le valide, retourne (id de l'acheteur, id du billet)"""
+    user_id = preparer_panier(1)
+    with Session(engine) as session:
+        return user_id, CheckoutService.valider_panier(session, user_id)["tickets"][0]["ticket_id"]
+
+
+async def mesurer_catalogue(client: httpx.AsyncClient, requetes: int, concurrence: int) -> list:
+    """Latences (ms) de GET /api/sports avec `concurrence` clients en parallèle"""
+    latences = []
+
+    async def client_catalogue(n):
+        for _ in range(n):
+            debut = time.perf_counter()
+            reponse = await client.get("/api/sports")
+            reponse.raise_for_status()
+            latences.append((time.perf_counter() - debut) * 1000)
+
+    await asyncio.gather(*(client_catalogue(requetes // concurrence) for _ in range(concurrence)))
+    return latences
+
+
+async def telecharger_en_boucle(client: httpx.AsyncClient, ticket_id: int, arret: asyncio.Event, compteur: dict):
+    while not arret.is_set():
+        reponse = await client.get(f"/api/tickets/{ticket_id}/download-pdf")
+        compteur[reponse.status_code] = compteur.get(reponse.status_code, 0) + 1
+
+
+def resumer(nom: str, latences: list):
+    latences = sorted(latences)
+    p95 = latences[int(len(latences) * 0.95) - 1]
+    print(f"{nom:<22} p50={statistics.median(latences):7.2f} ms  p95={p95:7.2f} ms  max={latences[-1]:7.2f} ms")
+
+
+async def scenario(args):
+    user_id, ticket_id = creer_billet()
+    headers = {"Authorization": f"Bearer {creer_access_token(user_id, 'client')}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+        # Préchauffage : démarre le pool de génération
+        await client.get(f"/api/tickets/{ticket_id}/download-pdf")
+
+        resumer("catalogue seul", await mesurer_catalogue(client, args.requetes, args.concurrence))
+
+        arret = asyncio.Event()
+        compteur = {}
+        telechargements = [
+            asyncio.create_task(telecharger_en_boucle(client, ticket_id, arret, compteur))
+            for _ in range(args.clients_pdf)
+        ]
+        await asyncio.sleep(0.5)
+        resumer("catalogue + PDF", await mesurer_catalogue(client, args.requetes, args.concurrence))
+        arret.set()
+        await asyncio.gather(*telechargements)
+        print(f"PDF pendant la mesure : {compteur}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requetes", type=int, default=200, help="Requêtes catalogue par mesure")
+    parser.add_argument("--concurrence", type=int, default=4, help="Clients catalogue en parallèle")
+    parser.add_argument("--clients-pdf", type=int, default=8, help="Clients qui téléchargent des PDF en boucle")
+    args = parser.parse_args()
+
+    engine.echo = False
+    appliquer_migrations()
+    try:
+        asyncio.run(scenario(args))
+    finally:
+        pdf_render_pool.arreter()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# backend/benchmarks/bench_shards.py
+"""
+Benchmark : débit d'achat sur une finale, compteur unique vs compteur fragmenté.
+
+Chaque acheteur réserve des places dans sa propre transaction, comme au
+checkout. À lancer depuis backend/ contre une base Postgres (DATABASE_URL) :
+
+    python -m benchmarks.bench_shards --achats 5000 --threads 64 --shards 16
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlmodel import Session
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+from app.services.inventory_service import InventoryService, PlacesInsuffisantesError
+from benchmarks.stress_survente import creer_finale
+
+
+def mesurer(epreuve_id: int, nb_shards: int, achats: int, threads: int, places_par_achat: int) -> float:
+    """Lance `achats` réservations concurrentes, retourne le nombre d'achats par seconde"""
+    def acheter(_):
+        with Session(engine) as session:
+            try:
+                InventoryService.reserver_places(
+                    session, {epreuve_id: places_par_achat}, nb_shards={epreuve_id: nb_shards}
+                )
+                session.commit()
+            except PlacesInsuffisantesError:
+                session.rollback()
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(acheter, range(achats)))
+    return achats / (time.perf_counter() - debut)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--achats", type=int, default=5000, help="Nombre total d'achats")
+    parser.add_argument("--threads", type=int, default=64, help="Acheteurs simultanés")
+    parser.add_argument("--shards", type=int, default=16, help="Nombre de fragments du compteur")
+    parser.add_argument("--places-par-achat", type=int, default=2)
+    args = parser.parse_args()
+
+    engine.echo = False
+    appliquer_migrations()
+    # Assez de places pour que personne ne tombe sur une finale complète
+    places = args.achats * args.places_par_achat * 2
+
+    resultats = {}
+    for nb_shards in (1, args.shards):
+        epreuve_id = creer_finale(places)
+        if nb_shards > 1:
+            with Session(engine) as session:
+                InventoryService.configurer_shards(session, epreuve_id, nb_shards)
+                session.commit()
+        resultats[nb_shards] = mesurer(epreuve_id, nb_shards, args.achats, args.threads, args.places_par_achat)
+        print(f"{nb_shards:>3} fragment(s) : {resultats[nb_shards]:.0f} achats/s")
+
+    print(f"Gain : x{resultats[args.shards] / resultats[1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# backend/benchmarks/generer_donnees.py
+"""
+Génère un jeu de données synthétique à l'échelle réelle pour les tests de charge.
+
+Sports, épreuves, utilisateurs, billets (avec leurs liens TicketEpreuve) et
+articles de panier sont écrits par COPY, par lots générés à la volée : la
+mémoire reste bornée quel que soit le volume. La demande est biaisée vers
+les sports populaires et les phases finales, et vers une minorité
+d'acheteurs très actifs. Postgres uniquement. À lancer depuis backend/
+(DATABASE_URL) :
+
+    python -m benchmarks.generer_donnees --sports 50 --epreuves 5000 \\
+        --utilisateurs 1000000 --billets 20000000 --paniers 200000
+
+Tous les utilisateurs générés ont le mot de passe `--mot-de-passe`
+(emails charge<id>@paris2024.test), pour les scénarios de connexion.
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import random
+import secrets
+import sys
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import SQLModel
+from app.core.config import INVALIDATION_CHANNEL
+from app.core.security import get_password_hash
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+
+
+SPORTS = [
+    ("Athlétisme", "Stade de France"), ("Natation", "Paris La Défense Arena"), ("Gymnastique", "Bercy Arena"),
+    ("Basketball", "Bercy Arena"), ("Football", "Parc des Princes"), ("Tennis", "Roland-Garros"),
+    ("Judo", "Champ-de-Mars Arena"), ("Escrime", "Grand Palais"), ("Cyclisme sur piste", "Vélodrome national"),
+    ("BMX", "Saint-Quentin-en-Yvelines"), ("Boxe", "Paris Arena Nord"), ("Escalade", "Le Bourget"),
+    ("Volleyball", "Paris Expo Porte de Versailles"), ("Handball", "Stade Pierre-Mauroy"),
+    ("Rugby à sept", "Stade de France"), ("Aviron", "Vaires-sur-Marne"), ("Canoë-kayak", "Vaires-sur-Marne"),
+    ("Plongeon", "Centre aquatique olympique"), ("Water-polo", "Paris La Défense Arena"),
+    ("Tennis de table", "Paris Expo Porte de Versailles"), ("Badminton", "Arena Porte de la Chapelle"),
+    ("Haltérophilie", "Paris Expo Porte de Versailles"), ("Lutte", "Champ-de-Mars Arena"),
+    ("Taekwondo", "Grand Palais"), ("Tir à l'arc", "Esplanade des Invalides"), ("Équitation", "Château de Versailles"),
+    ("Golf", "Golf National"), ("Hockey sur gazon", "Stade Yves-du-Manoir"), ("Pentathlon moderne", "Château de Versailles"),
+    ("Skateboard", "Place de la Concorde"), ("Surf", "Teahupo'o"), ("Triathlon", "Pont Alexandre III"),
+    ("Voile", "Marina de Marseille"), ("Breaking", "Place de la Concorde"),
+]
+
+# Phase : (part des épreuves, poids de la demande, capacité relative de la salle)
+PHASES = {
+    "Qualifications": (0.35, 1.0, 0.4),
+    "Premier tour": (0.25, 1.5, 0.5),
+    "Quart de finale": (0.15, 3.0, 0.7),
+    "Demi-finale": (0.15, 6.0, 0.9),
+    "Finale": (0.10, 15.0, 1.0),
+}
+
+PRENOMS = ["Camille", "Léa", "Hugo", "Louis", "Chloé", "Lucas", "Manon", "Nathan", "Inès", "Jules", "Emma", "Gabriel"]
+NOMS = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau", "Simon"]
+
+DEBUT_JEUX = datetime(2024, 7, 26)
+DEBUT_VENTES = datetime(2023, 5, 11)
+
+
+def _format_date(valeur: datetime) -> str:
+    return valeur.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ChargeurCOPY:
+    """Envoie des lignes à une table par COPY, un lot de `taille_lot` lignes à la fois"""
+
+    def __init__(self, curseur, table: str, colonnes, taille_lot: int):
+        self.curseur = curseur
+        self.sql = f'COPY "{table}" ({", ".join(colonnes)}) FROM STDIN WITH (FORMAT csv)'
+        self.taille_lot = taille_lot
+        self.tampon = io.StringIO()
+        self.ecrivain = csv.writer(self.tampon, lineterminator="\n")
+        self.en_attente = 0
+        self.total = 0
+
+    def ajouter(self, ligne):
+        self.ecrivain.writerow(ligne)
+        self.en_attente += 1
+        if self.en_attente >= self.taille_lot:
+            self.vider()
+
+    def vider(self):
+        if not self.en_attente:
+            return
+        self.tampon.seek(0)
+        self.curseur.copy_expert(self.sql, self.tampon)
+        self.total += self.en_attente
+        self.en_attente = 0
+        self.tampon.seek(0)
+        self.tampon.truncate()
+
+
+def _prochain_id(curseur, table: str) -> int:
+    curseur.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM "{table}"')
+    return curseur.fetchone()[0]
+
+
+def _slugs_uniques(curseur, nb: int):
+    """(nom, lieu, slug) des sports à créer, sans collision avec les slugs déjà en base"""
+    curseur.execute("SELECT slug FROM sport")
+    pris = {slug for (slug,) in curseur.fetchall()}
+    for i in range(nb):
+        nom, lieu = SPORTS[i % len(SPORTS)]
+        if i >= len(SPORTS):
+            nom = f"{nom} {i // len(SPORTS) + 1}"
+        ascii_ = unicodedata.normalize("NFKD", nom.lower()).encode("ascii", "ignore").decode()
+        base = "".join(c if c.isalnum() else "-" for c in ascii_).strip("-")
+        slug, n = base, 2
+        while slug in pris:
+            slug, n = f"{base}-{n}", n + 1
+        pris.add(slug)
+        yield nom, lieu, slug
+
+
+def generer_catalogue(curseur, args, rng: random.Random):
+    """Sports et épreuves ; retourne (ids des épreuves, poids cumulés de la demande, capacités)"""
+    sport_id = _prochain_id(curseur, "sport")
+    epreuve_id = _prochain_id(curseur, "epreuve")
+    sports = ChargeurCOPY(curseur, "sport", ["id", "slug", "nom", "image_url", "description", "lieu", "dates_competition", "histoire"], args.lot)
+    epreuves = ChargeurCOPY(curseur, "epreuve", ["id", "nom_epreuve", "date_epreuve", "heure", "places_disponibles", "sport_id", "nb_shards"], args.lot)
+
+    noms_phases = list(PHASES)
+    parts_phases = [PHASES[p][0] for p in noms_phases]
+    ids, poids, capacites = [], [], {}
+
+    for rang, (nom, lieu, slug) in enumerate(_slugs_uniques(curseur, args.sports)):
+        sports.ajouter([sport_id + rang, slug, nom, f"/images/{slug}.jpg", f"Épreuves de {nom.lower()}", lieu, "26 Juillet - 11 Août 2024", f"Histoire olympique : {nom}."])
+
+    # Popularité des sports en loi de Zipf : quelques sports concentrent la demande
+    popularites = [1 / (rang + 1) ** 0.8 for rang in range(args.sports)]
+    for i in range(args.epreuves):
+        rang = i % args.sports
+        phase = rng.choices(noms_phases, weights=parts_phases)[0]
+        _part, demande, capacite_relative = PHASES[phase]
+        # Les finales ont lieu en fin de quinzaine, dans les plus grandes configurations de salle
+        jour = int(rng.random() * 6) + noms_phases.index(phase) * 2
+        date_epreuve = DEBUT_JEUX + timedelta(days=jour, hours=rng.choice([10, 14, 17, 19, 21]))
+        capacite = int(rng.randint(5_000, 80_000) * capacite_relative)
+        identifiant = epreuve_id + i
+        epreuves.ajouter([identifiant, f"{phase} n°{i // args.sports + 1}", _format_date(date_epreuve), date_epreuve.strftime("%H:%M"), capacite, sport_id + rang, 1])
+        ids.append(identifiant)
+        poids.append(popularites[rang] * demande)
+        capacites[identifiant] = capacite
+
+    sports.vider()
+    epreuves.vider()
+    print(f"   - {sports.total} sports, {epreuves.total} épreuves")
+    return ids, list(itertools.accumulate(poids)), capacites
+
+
+def generer_utilisateurs(curseur, args, rng: random.Random) -> tuple:
+    """Utilisateurs clients ; retourne l'intervalle [premier, premier + nb) de leurs ids"""
+    premier = _prochain_id(curseur, "user")
+    # Un seul hachage pour tous : bcrypt coûte des centaines de millisecondes par appel
+    hashed_password = get_password_hash(args.mot_de_passe)
+    utilisateurs = ChargeurCOPY(curseur, "user", ["id", "email", "nom", "prenom", "is_active", "role", "hashed_password", "clef_compte"], args.lot)
+    for user_id in range(premier, premier + args.utilisateurs):
+        utilisateurs.ajouter([user_id, f"charge{user_id}@paris2024.test", rng.choice(NOMS), rng.choice(PRENOMS), "t", "CLIENT", hashed_password, secrets.token_urlsafe(32)])
+        if utilisateurs.total and utilisateurs.en_attente == 0 and utilisateurs.total % (args.lot * 10) == 0:
+            print(f"   … {utilisateurs.total} utilisateurs")
+    utilisateurs.vider()
+    print(f"   - {utilisateurs.total} utilisateurs")
+    return premier, args.utilisateurs
+
+
+def _acheteur(rng: random.Random, premier: int, nb: int) -> int:
+    # Biais vers une minorité d'acheteurs très actifs (densité en 1/sqrt)
+    return premier + int(nb * rng.random() ** 2)
+
+
+def _offres(curseur):
+    curseur.execute("SELECT id, prix, capacite_personne FROM offer ORDER BY capacite_personne")
+    offres = curseur.fetchall()
+    if not offres:
+        curseur.execute(
+            "INSERT INTO offer (nom_offre, description, prix, capacite_personne) VALUES "
+            "('Solo', 'Billet individuel', 50, 1), ('Duo', 'Billet pour 2', 90, 2), ('Famille', 'Billet famille', 150, 4) "
+            "RETURNING id, prix, capacite_personne"
+        )
+        offres = curseur.fetchall()
+    return offres
+
+
+def generer_billets(curseur, args, rng: random.Random, epreuves: list, poids_cumules: list, utilisateurs: tuple) -> dict:
+    """Billets et leurs liens TicketEpreuve ; retourne les places vendues par épreuve"""
+    premier_user, nb_users = utilisateurs
+    offres = _offres(curseur)
+    # Les petites offres se vendent le plus
+    poids_offres = [6, 3, 1][:len(offres)] + [1] * max(len(offres) - 3, 0)
+    ticket_id = _prochain_id(curseur, "ticket")
+    billets = ChargeurCOPY(curseur, "ticket", ["id", "clef_achat", "qr_code_content", "date_achat", "prix_total", "nombre_places", "user_id", "offer_id"], args.lot)
+    liens = ChargeurCOPY(curseur, "ticketepreuve", ["ticket_id", "epreuve_id", "nombre_places"], args.lot)
+    vendues = dict.fromkeys(epreuves, 0)
+    duree_ventes = (DEBUT_JEUX - DEBUT_VENTES).total_seconds()
+
+    restants = args.billets
+    while restants:
+        taille = min(args.lot, restants)
+        choix_epreuves = rng.choices(epreuves, cum_weights=poids_cumules, k=taille)
+        choix_offres = rng.choices(offres, weights=poids_offres, k=taille)
+        for epreuve_id, (offer_id, prix, capacite) in zip(choix_epreuves, choix_offres):
+            nombre_places = 1 if rng.random() < 0.8 else 2
+            # Les ventes s'accélèrent à l'approche des Jeux
+            date_achat = DEBUT_VENTES + timedelta(seconds=duree_ventes * rng.random() ** 0.5)
+            clef_achat = secrets.token_urlsafe(16)
+            billets.ajouter([ticket_id, clef_achat, f"{clef_achat}-{int(date_achat.timestamp())}", _format_date(date_achat), prix * nombre_places, nombre_places, _acheteur(rng, premier_user, nb_users), offer_id])
+            liens.ajouter([ticket_id, epreuve_id, nombre_places])
+            vendues[epreuve_id] += nombre_places * capacite
+            ticket_id += 1
+        restants -= taille
+        if (args.billets - restants) % (args.lot * 10) == 0 or not restants:
+            print(f"   … {args.billets - restants} billets")
+
+    billets.vider()
+    liens.vider()
+    print(f"   - {billets.total} billets, {liens.total} liens billet-épreuve")
+    return vendues
+
+
+def generer_paniers(curseur, args, rng: random.Random, epreuves: list, poids_cumules: list, utilisateurs: tuple):
+    """Articles de panier en cours (sans blocage de places : blocages expirés)"""
+    premier_user, nb_users = utilisateurs
+    offres = _offres(curseur)
+    item_id = _prochain_id(curseur, "panier_item")
+    items = ChargeurCOPY(curseur, "panier_item", ["id", "user_id", "epreuve_id", "offer_id", "nombre_places", "date_ajout"], args.lot)
+    maintenant = datetime.utcnow()
+    for i in range(args.paniers):
+        epreuve_id = rng.choices(epreuves, cum_weights=poids_cumules)[0]
+        offer_id = rng.choice(offres)[0]
+        date_ajout = maintenant - timedelta(minutes=rng.randint(0, 60 * 24))
+        items.ajouter([item_id + i, _acheteur(rng, premier_user, nb_users), epreuve_id, offer_id, rng.randint(1, 2), _format_date(date_ajout)])
+    items.vider()
+    print(f"   - {items.total} articles de panier")
+
+
+def mettre_a_jour_places(curseur, capacites: dict, vendues: dict, taille_lot: int):
+    """places_disponibles = capacité - places vendues (jamais négatif)"""
+    curseur.execute("CREATE TEMP TABLE places_generees (epreuve_id integer PRIMARY KEY, places integer) ON COMMIT DROP")
+    places = ChargeurCOPY(curseur, "places_generees", ["epreuve_id", "places"], taille_lot)
+    for epreuve_id, capacite in capacites.items():
+        places.ajouter([epreuve_id, max(capacite - vendues.get(epreuve_id, 0), 0)])
+    places.vider()
+    curseur.execute("UPDATE epreuve SET places_disponibles = p.places FROM places_generees p WHERE epreuve.id = p.epreuve_id")
+
+
+def _index_secondaires(tables):
+    return [index for table in tables for index in SQLModel.metadata.tables[table].indexes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sports", type=int, default=50)
+    parser.add_argument("--epreuves", type=int, default=5000)
+    parser.add_argument("--utilisateurs", type=int, default=100_000)
+    parser.add_argument("--billets", type=int, default=1_000_000)
+    parser.add_argument("--paniers", type=int, default=20_000, help="Articles de panier en cours")
+    parser.add_argument("--lot", type=int, default=50_000, help="Lignes par COPY")
+    parser.add_argument("--graine", type=int, default=2024, help="Graine du générateur (jeu reproductible)")
+    parser.add_argument("--mot-de-passe", default="charge2024", help="Mot de passe de tous les utilisateurs générés")
+    parser.add_argument("--garder-index", action="store_true",
+                        help="Ne pas supprimer puis recréer les index secondaires autour du chargement")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("❌ Le chargement par COPY nécessite Postgres (DATABASE_URL)")
+    if args.sports < 1 or args.epreuves < args.sports:
+        sys.exit("❌ Il faut au moins un sport et au moins une épreuve par sport")
+
+    appliquer_migrations()
+    rng = random.Random(args.graine)
+    debut = time.perf_counter()
+
+    # Une seule transaction : en cas d'erreur, la base reste telle qu'avant
+    connexion = engine.raw_connection()
+    try:
+        curseur = connexion.cursor()
+
+        # Maintenir les index ligne par ligne coûte plus cher que les reconstruire une fois à la fin
+        index = [] if args.garder_index else _index_secondaires(["user", "ticket", "ticketepreuve", "panier_item", "epreuve"])
+        for idx in index:
+            curseur.execute(f'DROP INDEX IF EXISTS "{idx.name}"')
+
+        print("🏅 Catalogue")
+        epreuves, poids_cumules, capacites = generer_catalogue(curseur, args, rng)
+        print("👥 Utilisateurs")
+        utilisateurs = generer_utilisateurs(curseur, args, rng)
+        print("🎫 Billets")
+        vendues = generer_billets(curseur, args, rng, epreuves, poids_cumules, utilisateurs)
+        print("🛒 Paniers")
+        generer_paniers(curseur, args, rng, epreuves, poids_cumules, utilisateurs)
+        mettre_a_jour_places(curseur, capacites, vendues, args.lot)
+
+        if index:
+            print(f"🔧 Reconstruction de {len(index)} index")
+            for idx in index:
+                curseur.execute(str(CreateIndex(idx).compile(dialect=postgresql.dialect())))
+
+        # Les id ont été fixés par le générateur : les séquences reprennent après
+        for table in ("sport", "epreuve", "user", "ticket", "panier_item", "offer"):
+            curseur.execute(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), (SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))")
+
+        # Les caches du catalogue des API en cours d'exécution sont à relire
+        if INVALIDATION_CHANNEL:
+            for evenement in ({"type": "catalogue"}, {"type": "places_invalides", "epreuve_ids": None}):
+                curseur.execute("SELECT pg_notify(%s, %s)", (INVALIDATION_CHANNEL, json.dumps({**evenement, "origine": "generer_donnees"})))
+
+        connexion.commit()
+    except BaseException:
+        connexion.rollback()
+        raise
+    finally:
+        connexion.close()
+
+    # Statistiques à jour pour le planificateur (hors transaction)
+    with engine.connect() as connexion_analyse:
+        connexion_analyse.exec_driver_sql("ANALYZE")
+        connexion_analyse.commit()
+
+    print(f"✅ Données générées en {time.perf_counter() - debut:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# backend/benchmarks/stress_survente.py
+"""
+Test de charge : des centaines d'acheteurs simultanés sur une même finale.
+
+Chaque acheteur suit le parcours réel : ajout au panier (blocage des places
+par HoldService.bloquer) puis validation par CheckoutService.valider_panier.
+Une partie des blocages expire avant la validation pendant que le libérateur
+tourne. Vérifie qu'aucune place n'est survendue. À lancer depuis backend/
+contre une base Postgres (DATABASE_URL) :
+
+    python -m benchmarks.stress_survente --acheteurs 500 --places 300
+"""
+import argparse
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+from app.models.offer import Offer
+from app.models.panier import PanierItem, SeatHold
+from app.models.sport import Sport, Epreuve
+from app.models.ticket import Ticket  # noqa: F401 (tables référencées)
+from app.models.user import User
+from app.services.checkout_service import CheckoutService, PlacesEpuiseesError
+from app.services.hold_service import HoldService, liberer_holds_expires
+from app.services.inventory_service import InventoryService, PlacesInsuffisantesError
+
+
+def creer_finale(places: int) -> int:
+    """Crée un sport et une finale de test, retourne l'id de l'épreuve"""
+    with Session(engine) as session:
+        sport = Sport(
+            slug=f"stress-{int(time.time() * 1000)}",
+            nom="Stress",
+            image_url="",
+            description="Sport de test de charge",
+            lieu="Stade de France",
+            dates_competition="",
+        )
+        session.add(sport)
+        session.flush()
+        epreuve = Epreuve(
+            nom_epreuve="Stress - Finale Hommes",
+            date_epreuve=datetime(2024, 8, 5, 20, 0),
+            heure="20:00",
+            places_disponibles=places,
+            sport_id=sport.id,
+        )
+        session.add(epreuve)
+        session.commit()
+        return epreuve.id
+
+
+def creer_acheteurs(nombre: int) -> tuple:
+    """Crée `nombre` acheteurs et une offre individuelle, retourne (ids des acheteurs, id de l'offre)"""
+    with Session(engine) as session:
+        offer = Offer(nom_offre="Stress - Solo", prix=50.0, capacite_personne=1)
+        users = [
+            User(
+                email=f"stress-{secrets.token_hex(6)}@olympic.com",
+                nom="Stress",
+                prenom="Acheteur",
+                hashed_password="",
+                clef_compte=secrets.token_urlsafe(16),
+            )
+            for _ in range(nombre)
+        ]
+        session.add(offer)
+        session.add_all(users)
+        session.commit()
+        return [user.id for user in users], offer.id
+
+
+def acheter(user_id: int, epreuve_id: int, offer_id: int, places: int, expirer: bool) -> str:
+    """
+    Un acheteur : ajout au panier puis validation, chacun dans sa transaction.
+
+    Retourne "ok", "complet" (refusé à l'ajout), "epuise" (refusé à la
+    validation, après expiration du blocage) ou "erreur".
+    """
+    try:
+        with Session(engine) as session:
+            item = PanierItem(user_id=user_id, epreuve_id=epreuve_id, offer_id=offer_id, nombre_places=places)
+            session.add(item)
+            session.flush()
+            try:
+                HoldService.bloquer(session, item, places)
+            except PlacesInsuffisantesError:
+                session.rollback()
+                return "complet"
+            if expirer:
+                # Acheteur trop lent : son blocage expire avant la validation
+                session.exec(
+                    update(SeatHold)
+                    .where(SeatHold.panier_item_id == item.id)
+                    .values(expire_le=datetime.utcnow() - timedelta(seconds=1))
+                )
+            session.commit()
+
+        with Session(engine) as session:
+            try:
+                CheckoutService.valider_panier(session, user_id)
+            except PlacesEpuiseesError:
+                return "epuise"
+        return "ok"
+    except Exception:
+        return "erreur"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--acheteurs", type=int, default=500, help="Nombre d'acheteurs simultanés")
+    parser.add_argument("--places", type=int, default=300, help="Places disponibles sur la finale")
+    parser.add_argument("--places-par-achat", type=int, default=2, help="Places demandées par acheteur")
+    parser.add_argument("--expires", type=float, default=0.2, help="Part des acheteurs dont le blocage expire avant la validation")
+    parser.add_argument("--shards", type=int, default=1, help="Fragments du compteur de places de la finale")
+    parser.add_argument("--threads", type=int, default=100, help="Taille du pool de threads")
+    args = parser.parse_args()
+
+    engine.echo = False
+    appliquer_migrations()
+    epreuve_id = creer_finale(args.places)
+    if args.shards > 1:
+        with Session(engine) as session:
+            InventoryService.configurer_shards(session, epreuve_id, args.shards)
+            session.commit()
+    acheteurs, offer_id = creer_acheteurs(args.acheteurs)
+    lents = set(range(0, args.acheteurs, max(1, round(1 / args.expires)))) if args.expires > 0 else set()
+
+    # Le libérateur tourne pendant les achats, comme en production
+    fin = threading.Event()
+
+    def liberer():
+        while not fin.wait(0.05):
+            liberer_holds_expires()
+
+    liberateur = threading.Thread(target=liberer)
+    liberateur.start()
+    debut = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            resultats = list(pool.map(
+                lambda rang: acheter(acheteurs[rang], epreuve_id, offer_id, args.places_par_achat, rang in lents),
+                range(args.acheteurs),
+            ))
+    finally:
+        duree = time.perf_counter() - debut
+        fin.set()
+        liberateur.join()
+    liberer_holds_expires()
+
+    with Session(engine) as session:
+        restantes = InventoryService.places_disponibles(session, [epreuve_id])[epreuve_id]
+        bloquees = session.exec(
+            select(func.coalesce(func.sum(SeatHold.places), 0)).where(SeatHold.epreuve_id == epreuve_id)
+        ).one()
+
+    ventes = resultats.count("ok")
+    vendues = ventes * args.places_par_achat
+    epuises_rapides = sum(1 for rang, resultat in enumerate(resultats) if resultat == "epuise" and rang not in lents)
+
+    print(f"Acheteurs: {args.acheteurs} en {duree:.2f}s ({len(lents)} blocages expirés, {args.shards} fragment(s))")
+    print(
+        f"Achats réussis: {ventes}, complets: {resultats.count('complet')}, "
+        f"épuisés à la validation: {resultats.count('epuise')}, erreurs: {resultats.count('erreur')}"
+    )
+    print(f"Places vendues: {vendues}, restantes: {restantes}, bloquées: {bloquees} (initiales: {args.places})")
+
+    if restantes < 0 or vendues + restantes + bloquees != args.places:
+        print("❌ SURVENTE détectée")
+        sys.exit(1)
+    if bloquees:
+        print(f"❌ {bloquees} places encore bloquées après le passage du libérateur")
+        sys.exit(1)
+    if epuises_rapides:
+        print(f"❌ {epuises_rapides} acheteurs refusés à la validation malgré un blocage actif")
+        sys.exit(1)
+    print("✅ Aucune survente")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,11 +24,13 @@ with Session(engine) as session:
     print(f"\n🏅 Nombre de sports : {len(sports)}")
     for s in sports:
         print(f"   - {s.nom} ({s.slug}) - {s.lieu}")
+    sports_par_id = {s.id: s for s in sports}
     
     # ========== ÉPREUVES (NOUVEAU) ==========
     epreuves = session.exec(select(Epreuve)).all()
     print(f"\n🎯 Nombre d'épreuves : {len(epreuves)}")
     for e in epreuves:
-        sport = session.get(Sport, e.sport_id)
+        # Sports déjà chargés ci-dessus : pas de requête par épreuve
+        sport = sports_par_id.get(e.sport_id)
         print(f"   - {e.nom_epreuve} ({sport.nom if sport else 'N/A'}) - {e.date_epreuve.strftime('%d/%m/%Y')} à {e.heure}")
         print(f"     Places disponibles: {e.places_disponibles}")
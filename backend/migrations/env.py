@@ -0,0 +1,81 @@
+# backend/migrations/env.py
+"""
+Environnement Alembic : la base vient de DATABASE_URL (app.db.session),
+les tables de SQLModel.metadata.
+
+Sur Postgres, la migration prend un verrou consultatif : si plusieurs
+conteneurs lancent `alembic upgrade head` en même temps, ils s'exécutent
+l'un après l'autre et les suivants n'ont plus rien à faire. C'est un verrou
+de session, pas de transaction : les migrations qui créent des index en
+CONCURRENTLY commitent au milieu de leur exécution.
+"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import text
+from sqlmodel import SQLModel
+from app.db.session import DATABASE_URL, creer_engine
+
+# Import des modèles : toutes les tables doivent être dans les métadonnées
+from app.models import offer, panier, sport, ticket, user  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None:
+    # Migrations lancées dans le processus (tests, benchmarks) : les loggers de l'application restent actifs
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = SQLModel.metadata
+
+# Clé du verrou consultatif des migrations (arbitraire, propre à cette application)
+VERROU_MIGRATIONS = 2024_0726
+
+
+def run_migrations_offline():
+    """Génère le SQL des migrations sans se connecter (alembic upgrade head --sql)"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = config.attributes.get("connection") or creer_engine(DATABASE_URL)
+
+    def migrer(connexion):
+        context.configure(
+            connection=connexion,
+            target_metadata=target_metadata,
+            # SQLite ne sait pas modifier une table en place
+            render_as_batch=connexion.dialect.name == "sqlite",
+            # Une transaction par migration : un bloc autocommit ne valide que la migration en cours
+            transaction_per_migration=True,
+        )
+        if connexion.dialect.name != "postgresql":
+            with context.begin_transaction():
+                context.run_migrations()
+            return
+
+        connexion.execute(text("SELECT pg_advisory_lock(:clef)"), {"clef": VERROU_MIGRATIONS})
+        connexion.commit()
+        try:
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connexion.rollback()
+            connexion.execute(text("SELECT pg_advisory_unlock(:clef)"), {"clef": VERROU_MIGRATIONS})
+            connexion.commit()
+
+    if hasattr(connectable, "connect"):
+        with connectable.connect() as connexion:
+            migrer(connexion)
+    else:
+        migrer(connectable)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,148 @@
+"""Schéma initial (tables créées jusqu'ici par create_all au démarrage)
+
+Les bases déjà créées par create_all gardent leurs tables : seules les
+tables absentes sont créées, et la colonne epreuve.nb_shards est ajoutée
+si la table date d'avant les compteurs fragmentés (create_all n'ajoute
+jamais de colonne à une table existante).
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-07-26
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _creer_si_absente(existantes, nom, *colonnes, index=()):
+    if nom in existantes:
+        return
+    op.create_table(nom, *colonnes)
+    for nom_index, champs, unique in index:
+        op.create_index(nom_index, nom, champs, unique=unique)
+
+
+def upgrade():
+    # En mode --sql (hors connexion), le script complet est généré pour une base vide
+    hors_connexion = op.get_context().as_sql
+    inspecteur = None if hors_connexion else sa.inspect(op.get_bind())
+    existantes = set() if hors_connexion else set(inspecteur.get_table_names())
+
+    _creer_si_absente(
+        existantes, "offer",
+        sa.Column("nom_offre", sqlmodel.AutoString(), nullable=False),
+        sa.Column("description", sqlmodel.AutoString(), nullable=True),
+        sa.Column("prix", sa.Float(), nullable=False),
+        sa.Column("capacite_personne", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _creer_si_absente(
+        existantes, "sport",
+        sa.Column("slug", sqlmodel.AutoString(), nullable=False),
+        sa.Column("nom", sqlmodel.AutoString(), nullable=False),
+        sa.Column("image_url", sqlmodel.AutoString(), nullable=False),
+        sa.Column("description", sqlmodel.AutoString(), nullable=False),
+        sa.Column("lieu", sqlmodel.AutoString(), nullable=False),
+        sa.Column("dates_competition", sqlmodel.AutoString(), nullable=False),
+        sa.Column("histoire", sqlmodel.AutoString(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        index=[("ix_sport_slug", ["slug"], True)],
+    )
+    _creer_si_absente(
+        existantes, "user",
+        sa.Column("email", sqlmodel.AutoString(), nullable=False),
+        sa.Column("nom", sqlmodel.AutoString(), nullable=False),
+        sa.Column("prenom", sqlmodel.AutoString(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("role", sa.Enum("CLIENT", "ADMIN", name="userrole"), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("hashed_password", sqlmodel.AutoString(), nullable=False),
+        sa.Column("clef_compte", sqlmodel.AutoString(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        index=[("ix_user_email", ["email"], True)],
+    )
+    _creer_si_absente(
+        existantes, "epreuve",
+        sa.Column("nom_epreuve", sqlmodel.AutoString(), nullable=False),
+        sa.Column("date_epreuve", sa.DateTime(), nullable=False),
+        sa.Column("heure", sqlmodel.AutoString(), nullable=False),
+        sa.Column("places_disponibles", sa.Integer(), nullable=False),
+        sa.Column("sport_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("nb_shards", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["sport_id"], ["sport.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    if "epreuve" in existantes and "nb_shards" not in {c["name"] for c in inspecteur.get_columns("epreuve")}:
+        op.add_column("epreuve", sa.Column("nb_shards", sa.Integer(), nullable=False, server_default="1"))
+    _creer_si_absente(
+        existantes, "ticket",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("clef_achat", sqlmodel.AutoString(), nullable=False),
+        sa.Column("qr_code_content", sqlmodel.AutoString(), nullable=False),
+        sa.Column("date_achat", sa.DateTime(), nullable=False),
+        sa.Column("prix_total", sa.Float(), nullable=False),
+        sa.Column("nombre_places", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("offer_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["offer_id"], ["offer.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _creer_si_absente(
+        existantes, "epreuve_shard",
+        sa.Column("epreuve_id", sa.Integer(), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("places_disponibles", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["epreuve_id"], ["epreuve.id"]),
+        sa.PrimaryKeyConstraint("epreuve_id", "shard"),
+    )
+    _creer_si_absente(
+        existantes, "panier_item",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("epreuve_id", sa.Integer(), nullable=False),
+        sa.Column("offer_id", sa.Integer(), nullable=False),
+        sa.Column("nombre_places", sa.Integer(), nullable=False),
+        sa.Column("date_ajout", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["epreuve_id"], ["epreuve.id"]),
+        sa.ForeignKeyConstraint(["offer_id"], ["offer.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _creer_si_absente(
+        existantes, "ticketepreuve",
+        sa.Column("ticket_id", sa.Integer(), nullable=False),
+        sa.Column("epreuve_id", sa.Integer(), nullable=False),
+        sa.Column("nombre_places", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["epreuve_id"], ["epreuve.id"]),
+        sa.ForeignKeyConstraint(["ticket_id"], ["ticket.id"]),
+        sa.PrimaryKeyConstraint("ticket_id", "epreuve_id"),
+    )
+    _creer_si_absente(
+        existantes, "seat_hold",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("panier_item_id", sa.Integer(), nullable=False),
+        sa.Column("epreuve_id", sa.Integer(), nullable=False),
+        sa.Column("places", sa.Integer(), nullable=False),
+        sa.Column("expire_le", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["epreuve_id"], ["epreuve.id"]),
+        sa.ForeignKeyConstraint(["panier_item_id"], ["panier_item.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("panier_item_id"),
+        index=[("ix_seat_hold_expire_le", ["expire_le"], False)],
+    )
+
+
+def downgrade():
+    for nom in ("seat_hold", "ticketepreuve", "panier_item", "epreuve_shard", "ticket", "epreuve", "user", "sport", "offer"):
+        op.drop_table(nom)
+    sa.Enum(name="userrole").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,70 @@
+"""Index des colonnes filtrées sur les chemins chauds
+
+- ticket (user_id, id) : historique d'un utilisateur paginé par id
+- ticket.clef_achat (unique) : recherche d'un billet par sa clé, et le
+  checkout associe les id insérés aux billets par cette clé
+- panier_item (user_id, id) : panier d'un utilisateur dans l'ordre d'ajout
+- ticketepreuve.epreuve_id : la clé primaire (ticket_id, epreuve_id) ne
+  sert pas les recherches par épreuve
+- epreuve.sport_id : épreuves d'un sport (détail du sport)
+
+Les index composites couvrent aussi les recherches sur leur première
+colonne seule : pas d'index séparé sur user_id.
+
+Sur Postgres, les index de ticket, ticketepreuve et panier_item sont
+construits en CONCURRENTLY, hors transaction : ces tables sont déjà
+grosses sur une base en production et un CREATE INDEX classique y
+bloquerait les achats pendant toute la construction.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-07-27
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEX = [
+    ("ix_ticket_user_id_id", "ticket", ["user_id", "id"], False),
+    ("ix_ticket_clef_achat", "ticket", ["clef_achat"], True),
+    ("ix_panier_item_user_id_id", "panier_item", ["user_id", "id"], False),
+    ("ix_ticketepreuve_epreuve_id", "ticketepreuve", ["epreuve_id"], False),
+    ("ix_epreuve_sport_id", "epreuve", ["sport_id"], False),
+]
+
+# Tables écrites à chaque achat : index construits sans bloquer les écritures (Postgres)
+TABLES_CONCURRENTES = {"ticket", "ticketepreuve", "panier_item"}
+
+
+def _concurrent(table: str) -> bool:
+    return op.get_context().dialect.name == "postgresql" and table in TABLES_CONCURRENTES
+
+
+def upgrade():
+    for nom, table, colonnes, unique in INDEX:
+        if not _concurrent(table):
+            op.create_index(nom, table, colonnes, unique=unique)
+
+    # CREATE INDEX CONCURRENTLY est refusé dans une transaction
+    with op.get_context().autocommit_block():
+        for nom, table, colonnes, unique in INDEX:
+            if _concurrent(table):
+                # Une construction interrompue laisse un index INVALID : il est reconstruit
+                op.drop_index(nom, table_name=table, postgresql_concurrently=True, if_exists=True)
+                op.create_index(nom, table, colonnes, unique=unique, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nom, table, _colonnes, _unique in reversed(INDEX):
+            if _concurrent(table):
+                op.drop_index(nom, table_name=table, postgresql_concurrently=True)
+
+    for nom, table, _colonnes, _unique in reversed(INDEX):
+        if not _concurrent(table):
+            op.drop_index(nom, table_name=table)
@@ -0,0 +1,131 @@
+# backend/tests/conftest.py
+"""
+Tests de l'API, à lancer depuis backend/ : `python -m pytest`.
+
+Base SQLite jetable par défaut. TEST_DATABASE_URL=postgresql://... vise une
+base Postgres dédiée (nécessaire aux tests marqués `postgres`) ; jamais
+celle de DATABASE_URL, puisque les tests y écrivent.
+"""
+import os
+import secrets
+import tempfile
+from datetime import datetime
+
+# La configuration est lue à l'import de l'application : à poser avant tout import de app.*
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_urlsafe(32))
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PDF_EXECUTOR", "thread")
+os.environ["PDF_CACHE_DIR"] = tempfile.mkdtemp()
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from app.core.tokens import creer_access_token
+from app.db.schema import appliquer_migrations
+from app.db.session import engine
+from app.main import app
+from app.models.offer import Offer
+from app.models.panier import PanierItem
+from app.models.sport import Epreuve, Sport, TicketEpreuve
+from app.models.ticket import Ticket
+from app.models.user import User, UserRole
+
+# Budgets de requêtes SQL et détection des N+1 (fixture requetes_sql, marqueur budget_requetes) ;
+# pytester : tests du marqueur lui-même
+pytest_plugins = ["app.db.pytest_requetes", "pytester"]
+
+
+def pytest_collection_modifyitems(config, items):
+    if engine.dialect.name == "postgresql":
+        return
+    ignorer = pytest.mark.skip(reason="nécessite Postgres (TEST_DATABASE_URL)")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(ignorer)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Application démarrée (événements startup compris) sur la base de test migrée"""
+    appliquer_migrations()
+    with TestClient(app) as client:
+        yield client
+
+
+class Donnees:
+    """Jeu de données de test, écrit directement en base (hors des requêtes SQL mesurées)"""
+
+    def utilisateur(self, role: UserRole = UserRole.CLIENT) -> int:
+        with Session(engine) as session:
+            user = User(
+                email=f"test-{secrets.token_hex(6)}@example.com",
+                nom="Test",
+                prenom="Client",
+                role=role,
+                hashed_password="",
+                clef_compte=secrets.token_urlsafe(16),
+            )
+            session.add(user)
+            session.commit()
+            return user.id
+
+    def epreuve(self, places: int = 1000) -> int:
+        with Session(engine) as session:
+            sport = Sport(
+                slug=f"test-{secrets.token_hex(6)}",
+                nom="Sport de test",
+                image_url="",
+                description="",
+                lieu="Stade de test",
+                dates_competition="",
+            )
+            session.add(sport)
+            session.flush()
+            epreuve = Epreuve(
+                nom_epreuve="Finale de test",
+                date_epreuve=datetime(2024, 8, 5, 20, 0),
+                heure="20:00",
+                places_disponibles=places,
+                sport_id=sport.id,
+            )
+            session.add(epreuve)
+            session.commit()
+            return epreuve.id
+
+    def offre(self, capacite_personne: int = 1) -> int:
+        with Session(engine) as session:
+            offer = Offer(nom_offre="Solo", prix=50.0, capacite_personne=capacite_personne)
+            session.add(offer)
+            session.commit()
+            return offer.id
+
+    def billets(self, user_id: int, nombre: int, epreuve_id: int, offer_id: int) -> list:
+        """Billets déjà achetés (historique), une épreuve chacun ; retourne leurs ids"""
+        ids = []
+        with Session(engine) as session:
+            for _ in range(nombre):
+                clef_achat = secrets.token_urlsafe(16)
+                ticket = Ticket(user_id=user_id, offer_id=offer_id, clef_achat=clef_achat, qr_code_content=clef_achat, prix_total=50.0)
+                session.add(ticket)
+                session.flush()
+                session.add(TicketEpreuve(ticket_id=ticket.id, epreuve_id=epreuve_id))
+                ids.append(ticket.id)
+            session.commit()
+        return ids
+
+    def panier(self, user_id: int, epreuve_id: int, offer_id: int, articles: int = 1, nombre_places: int = 1):
+        """Articles du panier sans blocage de places (blocage expiré et libéré)"""
+        with Session(engine) as session:
+            for _ in range(articles):
+                session.add(PanierItem(user_id=user_id, epreuve_id=epreuve_id, offer_id=offer_id, nombre_places=nombre_places))
+            session.commit()
+
+    @staticmethod
+    def entetes(user_id: int, role: UserRole = UserRole.CLIENT) -> dict:
+        return {"Authorization": f"Bearer {creer_access_token(user_id, role.value)}"}
+
+
+@pytest.fixture
+def donnees(client) -> Donnees:
+    return Donnees()
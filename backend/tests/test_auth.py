@@ -0,0 +1,111 @@
+# backend/tests/test_auth.py
+import asyncio
+import secrets
+import threading
+import pytest
+from sqlmodel import Session, select
+from app.core.security import HachageSatureError, PasswordHashPool, needs_rehash, password_hash_pool, verify_password
+from app.db.session import engine
+from app.models.user import User
+
+MOT_DE_PASSE = "mot de passe"
+
+
+def _inscrire(client) -> str:
+    email = f"auth-{secrets.token_hex(6)}@example.com"
+    response = client.post(
+        "/api/auth/register", params={"email": email, "nom": "Test", "prenom": "Client", "password": MOT_DE_PASSE}
+    )
+    assert response.status_code == 200
+    return email
+
+
+def _connecter(client, email: str):
+    return client.post("/api/auth/login", params={"email": email, "password": MOT_DE_PASSE})
+
+
+def _hachage(email: str) -> str:
+    with Session(engine) as session:
+        return session.exec(select(User.hashed_password).where(User.email == email)).one()
+
+
+def _cout(hachage: str) -> int:
+    return int(hachage.split("$")[2])
+
+
+def test_rehachage_apres_changement_de_cout(client, monkeypatch):
+    email = _inscrire(client)
+    assert _cout(_hachage(email)) == 4
+
+    monkeypatch.setattr("app.core.security.BCRYPT_ROUNDS", 5)
+    assert _connecter(client, email).status_code == 200
+
+    hachage = _hachage(email)
+    assert _cout(hachage) == 5
+    assert verify_password(MOT_DE_PASSE, hachage)
+    # Coût à jour : pas de nouveau calcul à la connexion suivante
+    assert _connecter(client, email).status_code == 200
+    assert _hachage(email) == hachage
+
+
+def test_rehachage_reporte_si_pool_sature(client, monkeypatch):
+    email = _inscrire(client)
+    hachage = _hachage(email)
+
+    async def sature(password):
+        raise HachageSatureError()
+
+    monkeypatch.setattr("app.core.security.BCRYPT_ROUNDS", 5)
+    monkeypatch.setattr(password_hash_pool, "hacher", sature)
+
+    assert _connecter(client, email).status_code == 200
+    assert _hachage(email) == hachage
+
+
+def test_needs_rehash(monkeypatch):
+    monkeypatch.setattr("app.core.security.BCRYPT_ROUNDS", 12)
+
+    assert not needs_rehash("$2b$12$" + "a" * 53)
+    assert needs_rehash("$2b$10$" + "a" * 53)
+    assert needs_rehash("pas un hachage bcrypt")
+
+
+@pytest.mark.parametrize("route", ["register", "login"])
+def test_pool_de_hachage_plein_503(client, monkeypatch, route):
+    email = _inscrire(client)
+    monkeypatch.setattr(password_hash_pool, "max_en_attente", password_hash_pool.en_cours)
+
+    if route == "register":
+        email = f"auth-{secrets.token_hex(6)}@example.com"
+        params = {"email": email, "nom": "Test", "prenom": "Client", "password": MOT_DE_PASSE}
+    else:
+        params = {"email": email, "password": MOT_DE_PASSE}
+    response = client.post(f"/api/auth/{route}", params=params)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    if route == "register":
+        with Session(engine) as session:
+            assert session.exec(select(User).where(User.email == email)).first() is None
+
+
+def test_pool_borne_refuse_au_dela_de_la_file():
+    pool = PasswordHashPool(workers=1, max_en_attente=2)
+    libere = threading.Event()
+
+    async def scenario():
+        # Un calcul en cours et un en attente : la file est pleine
+        taches = [asyncio.ensure_future(pool.executer(libere.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert pool.en_cours == 2
+        with pytest.raises(HachageSatureError):
+            await pool.executer(libere.wait, 5)
+
+        libere.set()
+        assert await asyncio.gather(*taches) == [True, True]
+        assert pool.en_cours == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.arreter()
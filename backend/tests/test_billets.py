@@ -0,0 +1,27 @@
+# backend/tests/test_billets.py
+def _historique(client, requetes_sql, donnees, nb_billets: int):
+    """Requêtes SQL de GET /api/tickets/user/{id} pour un acheteur de `nb_billets` billets"""
+    user_id = donnees.utilisateur()
+    donnees.billets(user_id, nb_billets, donnees.epreuve(), donnees.offre())
+
+    with requetes_sql() as compteur:
+        response = client.get(f"/api/tickets/user/{user_id}", headers=donnees.entetes(user_id))
+
+    assert response.status_code == 200
+    assert len(response.json()) == nb_billets
+    return compteur.total
+
+
+def test_historique_nombre_de_requetes_constant(client, requetes_sql, donnees):
+    """Une requête jointe quel que soit le nombre de billets (pas de requête par billet)"""
+    requetes_un_billet = _historique(client, requetes_sql, donnees, 1)
+    requetes_plusieurs_billets = _historique(client, requetes_sql, donnees, 25)
+
+    assert requetes_plusieurs_billets == requetes_un_billet == 1
+
+
+def test_historique_reserve_au_titulaire(client, donnees):
+    user_id, autre_id = donnees.utilisateur(), donnees.utilisateur()
+
+    assert client.get(f"/api/tickets/user/{user_id}").status_code == 401
+    assert client.get(f"/api/tickets/user/{user_id}", headers=donnees.entetes(autre_id)).status_code == 403
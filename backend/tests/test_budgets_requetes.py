@@ -0,0 +1,63 @@
+# backend/tests/test_budgets_requetes.py
+"""
+Budgets de requêtes SQL des routes les plus appelées.
+
+Le marqueur budget_requetes fait échouer le test (donc la CI) si la route
+dépasse son budget ou répète une requête (N+1). Les données sont créées
+par les fixtures : seules les requêtes de la route sont comptées. Budgets
+mesurés sur Postgres, qui ajoute un NOTIFY aux écritures du stock.
+"""
+import pytest
+
+
+@pytest.fixture
+def acheteur(donnees) -> dict:
+    """Acheteur avec 10 billets et un panier de 5 articles"""
+    user_id = donnees.utilisateur()
+    epreuve_id, offer_id = donnees.epreuve(), donnees.offre()
+    donnees.billets(user_id, 10, epreuve_id, offer_id)
+    donnees.panier(user_id, epreuve_id, offer_id, articles=5)
+    return {"id": user_id, "epreuve_id": epreuve_id, "offer_id": offer_id, "entetes": donnees.entetes(user_id)}
+
+
+@pytest.mark.budget_requetes(1)
+def test_budget_historique_des_billets(client, acheteur):
+    response = client.get(f"/api/tickets/user/{acheteur['id']}", headers=acheteur["entetes"])
+
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+
+
+@pytest.mark.budget_requetes(1)
+def test_budget_lecture_du_panier(client, acheteur):
+    response = client.get(f"/api/panier/user/{acheteur['id']}", headers=acheteur["entetes"])
+
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+
+@pytest.mark.budget_requetes(8)
+def test_budget_ajout_au_panier(client, acheteur):
+    response = client.post(
+        f"/api/panier/user/{acheteur['id']}",
+        params={"epreuve_id": acheteur["epreuve_id"], "offer_id": acheteur["offer_id"], "nombre_places": 2},
+        headers=acheteur["entetes"],
+    )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.budget_requetes(9)
+def test_budget_validation_du_panier(client, acheteur):
+    response = client.post(f"/api/panier/user/{acheteur['id']}/valider", headers=acheteur["entetes"])
+
+    assert response.status_code == 200
+    assert len(response.json()["tickets"]) == 5
+
+
+@pytest.mark.xfail(strict=True, raises=pytest.fail.Exception, reason="au-delà du budget, le marqueur fait échouer le test")
+@pytest.mark.budget_requetes(5)
+def test_validation_du_panier_au_dela_du_budget(client, acheteur):
+    response = client.post(f"/api/panier/user/{acheteur['id']}/valider", headers=acheteur["entetes"])
+
+    assert response.status_code == 200
@@ -0,0 +1,164 @@
+# backend/tests/test_cache_catalogue.py
+import time
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+from app.core.config import INVALIDATION_CHANNEL
+from app.db.session import engine
+from app.models.sport import Epreuve, Sport
+from app.services.catalog_cache_service import CatalogCache, catalog_cache
+from app.services.invalidation_bus import InvalidationBus, _appliquer
+from app.services.inventory_service import InventoryService
+
+
+def _places(cache: CatalogCache, requetes_sql, epreuve_ids: list) -> tuple:
+    """(places lues, nombre de requêtes SQL de la lecture)"""
+    with Session(engine) as session, requetes_sql() as compteur:
+        places = cache.get_places(session, epreuve_ids)
+    return places, compteur.total
+
+
+def _fixer_places(epreuve_id: int, places: int):
+    with Session(engine) as session:
+        epreuve = session.get(Epreuve, epreuve_id)
+        epreuve.places_disponibles = places
+        session.add(epreuve)
+        session.commit()
+
+
+def test_lectures_servies_par_le_cache(donnees, requetes_sql):
+    cache = CatalogCache(ttl_catalogue=60, ttl_places=60)
+    a, b = donnees.epreuve(places=10), donnees.epreuve(places=20)
+
+    assert _places(cache, requetes_sql, [a, b]) == ({a: 10, b: 20}, 1)
+    assert _places(cache, requetes_sql, [a, b]) == ({a: 10, b: 20}, 0)
+
+    with Session(engine) as session, requetes_sql() as compteur:
+        sports = cache.get_sports(session)
+        assert cache.get_sports(session) == sports
+    assert compteur.total == 1
+
+    stats = cache.stats()
+    assert stats["places"] == {"hits": 2, "misses": 2, "hit_ratio": 0.5}
+    assert stats["catalogue"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_expiration_des_places(donnees, requetes_sql):
+    cache = CatalogCache(ttl_catalogue=60, ttl_places=0.05)
+    epreuve_id = donnees.epreuve(places=10)
+    _places(cache, requetes_sql, [epreuve_id])
+    _fixer_places(epreuve_id, 7)
+
+    # Valeur en cache jusqu'à l'expiration, relue ensuite
+    assert _places(cache, requetes_sql, [epreuve_id]) == ({epreuve_id: 10}, 0)
+    time.sleep(0.1)
+    assert _places(cache, requetes_sql, [epreuve_id]) == ({epreuve_id: 7}, 1)
+
+
+def test_lecture_du_catalogue_pendant_une_invalidation_non_mise_en_cache():
+    cache = CatalogCache(ttl_catalogue=60, ttl_places=60)
+    chargements = []
+
+    def charger():
+        chargements.append(1)
+        # Modification du catalogue commitée pendant la lecture
+        cache.invalider_catalogue()
+        return ["ancienne valeur"]
+
+    cache._lire("sports", charger)
+    cache._lire("sports", lambda: ["nouvelle valeur"])
+
+    assert cache._lire("sports", charger) == ["nouvelle valeur"]
+    assert len(chargements) == 1
+
+
+def test_garde_des_places_par_epreuve(donnees, requetes_sql, monkeypatch):
+    cache = CatalogCache(ttl_catalogue=60, ttl_places=60)
+    a, b = donnees.epreuve(places=10), donnees.epreuve(places=20)
+    lire = InventoryService.places_disponibles
+
+    def lire_pendant_un_achat(session, epreuve_ids):
+        places = lire(session, epreuve_ids)
+        # Achat commité sur `a` entre la lecture et la mise en cache
+        cache.invalider_places([a])
+        return places
+
+    monkeypatch.setattr(InventoryService, "places_disponibles", staticmethod(lire_pendant_un_achat))
+    _places(cache, requetes_sql, [a, b])
+    monkeypatch.setattr(InventoryService, "places_disponibles", staticmethod(lire))
+
+    # `a` sera relue, `b` (non concernée par l'achat) reste en cache
+    _fixer_places(a, 9)
+    _fixer_places(b, 19)
+    assert _places(cache, requetes_sql, [a, b]) == ({a: 9, b: 20}, 1)
+
+
+def test_evenements_dans_le_desordre_sans_valeur_perimee(donnees, requetes_sql):
+    """Les valeurs de deux commits concurrents, appliquées à l'envers, ne sont jamais mises en cache"""
+    epreuve_id = donnees.epreuve(places=8)
+    _places(catalog_cache, requetes_sql, [epreuve_id])
+
+    # Le commit qui a laissé 8 places est notifié avant celui qui en a laissé 9
+    _appliquer({"type": "places_invalides", "epreuve_ids": [epreuve_id]})
+    _appliquer({"type": "places", "places": {str(epreuve_id): 9}})
+
+    assert _places(catalog_cache, requetes_sql, [epreuve_id]) == ({epreuve_id: 8}, 1)
+
+
+def test_invalidation_appliquee_au_commit_seulement(donnees, requetes_sql):
+    epreuve_id = donnees.epreuve(places=10)
+    _places(catalog_cache, requetes_sql, [epreuve_id])
+
+    with Session(engine) as session:
+        InvalidationBus.places_modifiees(session, {epreuve_id: 5})
+        # Pas encore commité : le cache garde sa valeur
+        assert _places(catalog_cache, requetes_sql, [epreuve_id]) == ({epreuve_id: 10}, 0)
+        session.rollback()
+    assert _places(catalog_cache, requetes_sql, [epreuve_id]) == ({epreuve_id: 10}, 0)
+
+    _fixer_places(epreuve_id, 5)
+    with Session(engine) as session:
+        InvalidationBus.places_modifiees(session, {epreuve_id: 5})
+        session.commit()
+    assert _places(catalog_cache, requetes_sql, [epreuve_id]) == ({epreuve_id: 5}, 1)
+
+
+def test_detail_du_sport_a_jour_apres_un_ajout_au_panier(client, donnees):
+    user_id, epreuve_id, offer_id = donnees.utilisateur(), donnees.epreuve(places=10), donnees.offre()
+    with Session(engine) as session:
+        slug = session.get(Sport, session.get(Epreuve, epreuve_id).sport_id).slug
+
+    def places():
+        epreuves = client.get(f"/api/sports/{slug}").json()["epreuves"]
+        return {e["id"]: e["places_disponibles"] for e in epreuves}[epreuve_id]
+
+    assert places() == 10
+    response = client.post(
+        f"/api/panier/user/{user_id}",
+        params={"epreuve_id": epreuve_id, "offer_id": offer_id, "nombre_places": 3},
+        headers=donnees.entetes(user_id),
+    )
+    assert response.status_code == 200
+    assert places() == 7
+
+
+@pytest.mark.postgres
+def test_invalidation_recue_d_un_autre_worker(client, donnees, requetes_sql):
+    epreuve_id = donnees.epreuve(places=10)
+    _places(catalog_cache, requetes_sql, [epreuve_id])
+
+    # NOTIFY publié par un autre worker (autre origine), reçu par le thread d'écoute
+    with Session(engine) as session:
+        session.exec(
+            text("SELECT pg_notify(:canal, :payload)"),
+            params={
+                "canal": INVALIDATION_CHANNEL,
+                "payload": f'{{"type":"places_invalides","epreuve_ids":[{epreuve_id}],"origine":"autre-worker"}}',
+            },
+        )
+        session.commit()
+
+    limite = time.monotonic() + 5
+    while _places(catalog_cache, requetes_sql, [epreuve_id])[1] == 0:
+        assert time.monotonic() < limite, "invalidation non reçue"
+        time.sleep(0.05)
@@ -0,0 +1,100 @@
+# backend/tests/test_checkout.py
+import pytest
+from sqlmodel import Session, select
+from app.db.session import engine
+from app.models.panier import PanierItem
+from app.models.sport import TicketEpreuve
+from app.models.ticket import Ticket
+from app.services.checkout_service import CheckoutService
+from app.services.inventory_service import InventoryService
+
+# Les deux routes de validation passent par CheckoutService et traduisent ses erreurs de la même façon
+ROUTES_VALIDATION = ["/api/panier/user/{user_id}/valider", "/api/tickets/acheter/{user_id}"]
+
+
+def test_chaque_billet_relie_a_son_article(donnees):
+    """Les ids renvoyés par l'INSERT groupé sont rattachés au bon article (épreuve, offre, places)"""
+    user_id = donnees.utilisateur()
+    articles = [
+        (donnees.epreuve(), donnees.offre(), 1),
+        (donnees.epreuve(), donnees.offre(capacite_personne=2), 3),
+        (donnees.epreuve(), donnees.offre(), 2),
+    ]
+    for epreuve_id, offer_id, nombre_places in articles:
+        donnees.panier(user_id, epreuve_id, offer_id, nombre_places=nombre_places)
+
+    with Session(engine) as session:
+        resultat = CheckoutService.valider_panier(session, user_id)
+
+    billets = resultat["tickets"]
+    assert len({billet["ticket_id"] for billet in billets}) == len(articles)
+    with Session(engine) as session:
+        # Billets renvoyés dans l'ordre du panier
+        for billet, (epreuve_id, offer_id, nombre_places) in zip(billets, articles):
+            ticket = session.get(Ticket, billet["ticket_id"])
+            lien = session.exec(select(TicketEpreuve).where(TicketEpreuve.ticket_id == ticket.id)).one()
+            assert (ticket.user_id, ticket.offer_id, ticket.nombre_places) == (user_id, offer_id, nombre_places)
+            assert ticket.prix_total == billet["prix"] == 50.0 * nombre_places
+            assert (lien.epreuve_id, lien.nombre_places) == (epreuve_id, nombre_places)
+        # Panier vidé
+        assert session.exec(select(PanierItem).where(PanierItem.user_id == user_id)).all() == []
+
+
+def _valider(client, donnees, route: str, user_id: int):
+    return client.post(route.format(user_id=user_id), headers=donnees.entetes(user_id))
+
+
+def _articles(user_id: int) -> list:
+    with Session(engine) as session:
+        return session.exec(select(PanierItem.id).where(PanierItem.user_id == user_id)).all()
+
+
+@pytest.mark.parametrize("route", ROUTES_VALIDATION)
+def test_validation_ok(client, donnees, route):
+    user_id = donnees.utilisateur()
+    donnees.panier(user_id, donnees.epreuve(), donnees.offre(), articles=2)
+
+    response = _valider(client, donnees, route, user_id)
+
+    assert response.status_code == 200
+    assert len(response.json()["tickets"]) == 2
+
+
+@pytest.mark.parametrize("route", ROUTES_VALIDATION)
+def test_validation_panier_vide(client, donnees, route):
+    user_id = donnees.utilisateur()
+
+    response = _valider(client, donnees, route, user_id)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Votre panier est vide"
+
+
+@pytest.mark.parametrize("route", ROUTES_VALIDATION)
+def test_validation_places_epuisees(client, donnees, route):
+    user_id, epreuve_id = donnees.utilisateur(), donnees.epreuve(places=1)
+    donnees.panier(user_id, epreuve_id, donnees.offre(), nombre_places=2)
+    articles = _articles(user_id)
+
+    response = _valider(client, donnees, route, user_id)
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Plus assez de places")
+    # Transaction annulée : stock et panier intacts
+    assert _articles(user_id) == articles
+    with Session(engine) as session:
+        assert InventoryService.places_disponibles(session, [epreuve_id]) == {epreuve_id: 1}
+
+
+@pytest.mark.parametrize("route", ROUTES_VALIDATION)
+def test_validation_element_introuvable(client, donnees, route):
+    if engine.dialect.name != "sqlite":
+        pytest.skip("les clés étrangères interdisent un article orphelin hors SQLite")
+    user_id = donnees.utilisateur()
+    donnees.panier(user_id, donnees.epreuve(), 999_999_999)
+
+    response = _valider(client, donnees, route, user_id)
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Offre 999999999 non trouvée"
+    assert len(_articles(user_id)) == 1
@@ -0,0 +1,146 @@
+# backend/tests/test_detection_n_plus_1.py
+import pytest
+from sqlalchemy import text
+from app.db.compteur_requetes import CompteurRequetes
+from app.db.detection_n_plus_1 import (
+    RequetesExcessivesError,
+    empreinte,
+    problemes,
+    regrouper,
+    repetitions,
+    surveiller_requetes,
+)
+from app.db.session import engine
+
+
+def _compteur(*requetes: str) -> CompteurRequetes:
+    compteur = CompteurRequetes(detail=True)
+    compteur.total = len(requetes)
+    compteur.requetes = [(requete, None) for requete in requetes]
+    return compteur
+
+
+def _executer(*requetes: str):
+    with engine.connect() as connexion:
+        for requete in requetes:
+            connexion.execute(text(requete))
+
+
+# ===== EMPREINTE =====
+
+def test_empreinte_remplace_les_valeurs_litterales():
+    assert empreinte("SELECT * FROM ticket WHERE id = 42 AND prix_total > 9.5 AND clef_achat = 'l''abc'") == (
+        "SELECT * FROM ticket WHERE id = ? AND prix_total > ? AND clef_achat = ?"
+    )
+
+
+def test_empreinte_garde_les_chiffres_des_identifiants_et_parametres():
+    assert empreinte("SELECT t1.id FROM ticket AS t1 WHERE t1.user_id = $1") == "SELECT t1.id FROM ticket AS t1 WHERE t1.user_id = $1"
+
+
+def test_empreinte_normalise_les_espaces():
+    assert empreinte("SELECT id\n    FROM ticket\tWHERE id = 1") == "SELECT id FROM ticket WHERE id = ?"
+
+
+@pytest.mark.parametrize("liste_courte, liste_longue", [
+    ("($1::INTEGER, $2::INTEGER)", "($1::INTEGER, $2::INTEGER, $3::INTEGER, $4::INTEGER)"),  # asyncpg
+    ("(%(id_1_1)s, %(id_1_2)s)", "(%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"),  # psycopg2
+    ("(?, ?)", "(?, ?, ?, ?, ?)"),  # SQLite
+    ("(1, 2)", "(1, 2, 3, 4)"),  # valeurs littérales
+])
+def test_empreinte_reduit_les_listes_in(liste_courte, liste_longue):
+    courte = empreinte(f"SELECT * FROM epreuve WHERE id IN {liste_courte}")
+    assert courte == empreinte(f"SELECT * FROM epreuve WHERE id IN {liste_longue}") == "SELECT * FROM epreuve WHERE id IN (?)"
+
+
+# ===== RÉPÉTITIONS ET BUDGET =====
+
+def test_regrouper_par_empreinte_les_plus_frequentes_d_abord():
+    compteur = _compteur(
+        "SELECT * FROM panier_item WHERE user_id = 1",
+        "SELECT * FROM offer WHERE id = 1",
+        "SELECT * FROM offer WHERE id = 2",
+        "SELECT * FROM offer WHERE id = 3",
+    )
+
+    groupes = regrouper(compteur)
+
+    assert [(groupe.empreinte, groupe.nombre) for groupe in groupes] == [
+        ("SELECT * FROM offer WHERE id = ?", 3),
+        ("SELECT * FROM panier_item WHERE user_id = ?", 1),
+    ]
+
+
+def test_repetitions_a_partir_du_seuil():
+    compteur = _compteur(*[f"SELECT * FROM epreuve WHERE id = {i}" for i in range(3)])
+
+    assert [repetition.nombre for repetition in repetitions(compteur, seuil=3)] == [3]
+    assert repetitions(compteur, seuil=4) == []
+
+
+def test_problemes_budget_depasse_liste_les_requetes():
+    compteur = _compteur("SELECT * FROM ticket WHERE id = 1", "SELECT * FROM offer WHERE id = 1")
+
+    messages = problemes(compteur, budget=1, seuil=0)
+
+    assert len(messages) == 1
+    assert messages[0].startswith("2 requêtes SQL pour un budget de 1")
+    assert "1 x SELECT * FROM offer WHERE id = ?" in messages[0]
+
+
+def test_problemes_dans_le_budget_et_sans_repetition():
+    assert problemes(_compteur("SELECT 1", "SELECT 2 FROM offer"), budget=2, seuil=2) == []
+
+
+def test_surveiller_requetes_signale_un_n_plus_1_avec_sa_ligne(client):
+    with pytest.raises(RequetesExcessivesError) as erreur:
+        with surveiller_requetes(seuil=3):
+            _executer(*[f"SELECT id FROM epreuve WHERE id = {i}" for i in range(3)])
+
+    message = str(erreur.value)
+    assert "Requête répétée (N+1) : 3 x SELECT id FROM epreuve WHERE id = ?" in message
+    assert "test_detection_n_plus_1.py" in message
+
+
+def test_surveiller_requetes_dans_le_budget(client):
+    with surveiller_requetes(budget=2) as compteur:
+        _executer("SELECT id FROM epreuve", "SELECT id FROM offer")
+
+    assert compteur.total == 2
+
+
+# ===== MARQUEUR PYTEST =====
+
+def test_marqueur_fait_echouer_un_test_au_dela_du_budget(client, pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+        from sqlalchemy import text
+        from app.db.session import engine
+
+        @pytest.mark.budget_requetes(2)
+        def test_dans_le_budget():
+            with engine.connect() as connexion:
+                connexion.execute(text("SELECT id FROM offer"))
+
+        @pytest.mark.budget_requetes(2)
+        def test_au_dela_du_budget():
+            with engine.connect() as connexion:
+                for table in ("offer", "sport", "epreuve"):
+                    connexion.execute(text(f"SELECT id FROM {table}"))
+
+        @pytest.mark.budget_requetes(seuil=3)
+        def test_n_plus_1():
+            with engine.connect() as connexion:
+                for i in range(3):
+                    connexion.execute(text(f"SELECT id FROM offer WHERE id = {i}"))
+        """
+    )
+
+    resultat = pytester.runpytest_inprocess("-p", "app.db.pytest_requetes")
+
+    resultat.assert_outcomes(passed=1, failed=2)
+    resultat.stdout.fnmatch_lines([
+        "*3 requêtes SQL pour un budget de 2*",
+        "*Requête répétée (N+1) : 3 x SELECT id FROM offer WHERE id = ?*",
+    ])
@@ -0,0 +1,125 @@
+# backend/tests/test_inventaire.py
+import pytest
+from sqlmodel import Session, select
+from app.db.session import engine
+from app.models.sport import Epreuve, EpreuveShard
+from app.models.user import UserRole
+from app.services.inventory_service import InventoryService, PlacesInsuffisantesError
+
+
+def _fragmenter(epreuve_id: int, nb_shards: int) -> dict:
+    with Session(engine) as session:
+        repartition = InventoryService.configurer_shards(session, epreuve_id, nb_shards)
+        session.commit()
+    return repartition
+
+
+def _fragments(epreuve_id: int) -> dict:
+    """Places de chaque fragment et de la ligne epreuve (clé None)"""
+    with Session(engine) as session:
+        shards = session.exec(select(EpreuveShard).where(EpreuveShard.epreuve_id == epreuve_id)).all()
+        places = {s.shard: s.places_disponibles for s in shards}
+        places[None] = session.get(Epreuve, epreuve_id).places_disponibles
+    return places
+
+
+def _reserver(epreuve_id: int, places: int) -> int:
+    with Session(engine) as session:
+        restantes = InventoryService.reserver_places(session, {epreuve_id: places})[epreuve_id]
+        session.commit()
+    return restantes
+
+
+def test_fragmentation_repartit_le_stock(donnees):
+    epreuve_id = donnees.epreuve(places=102)
+
+    assert _fragmenter(epreuve_id, 4) == {0: 26, 1: 26, 2: 25, 3: 25}
+    assert _fragments(epreuve_id) == {0: 26, 1: 26, 2: 25, 3: 25, None: 0}
+
+
+def test_chemin_rapide_un_seul_fragment(donnees):
+    epreuve_id = donnees.epreuve(places=100)
+    _fragmenter(epreuve_id, 4)
+
+    assert _reserver(epreuve_id, 10) == 90
+
+    fragments = _fragments(epreuve_id)
+    # Un seul fragment touché, de toutes les places demandées
+    assert sorted(fragments[shard] for shard in range(4)) == [15, 25, 25, 25]
+
+
+def test_chemin_lent_plusieurs_fragments(donnees):
+    epreuve_id = donnees.epreuve(places=100)
+    _fragmenter(epreuve_id, 4)
+
+    # Aucun fragment n'a 60 places : elles sont prises dans plusieurs
+    assert _reserver(epreuve_id, 60) == 40
+
+    fragments = _fragments(epreuve_id)
+    assert sum(fragments[shard] for shard in range(4)) == 40
+    assert min(fragments.values()) >= 0
+
+
+def test_fragments_insuffisants(donnees):
+    epreuve_id = donnees.epreuve(places=100)
+    _fragmenter(epreuve_id, 4)
+
+    with Session(engine) as session:
+        with pytest.raises(PlacesInsuffisantesError) as erreur:
+            InventoryService.reserver_places(session, {epreuve_id: 101})
+        session.rollback()
+
+    assert erreur.value.places_disponibles == 100
+    assert _fragments(epreuve_id) == {0: 25, 1: 25, 2: 25, 3: 25, None: 0}
+
+
+def test_restitution_sur_un_fragment(donnees):
+    epreuve_id = donnees.epreuve(places=100)
+    _fragmenter(epreuve_id, 4)
+    _reserver(epreuve_id, 60)
+
+    with Session(engine) as session:
+        assert InventoryService.restituer_places(session, {epreuve_id: 20}) == {epreuve_id: 60}
+        session.commit()
+
+
+def test_reequilibrage_conserve_le_total(client, donnees):
+    epreuve_id = donnees.epreuve(places=100)
+    _fragmenter(epreuve_id, 4)
+    _reserver(epreuve_id, 60)
+    admin_id = donnees.utilisateur(UserRole.ADMIN)
+
+    response = client.post(
+        f"/api/admin/epreuves/{epreuve_id}/shards/reequilibrer", headers=donnees.entetes(admin_id, UserRole.ADMIN)
+    )
+
+    assert response.status_code == 200
+    assert response.json()["places_disponibles"] == 40
+    assert _fragments(epreuve_id) == {0: 10, 1: 10, 2: 10, 3: 10, None: 0}
+
+
+def test_retour_au_compteur_unique(client, donnees):
+    epreuve_id = donnees.epreuve(places=100)
+    _fragmenter(epreuve_id, 4)
+    _reserver(epreuve_id, 30)
+    admin_id = donnees.utilisateur(UserRole.ADMIN)
+
+    response = client.post(
+        f"/api/admin/epreuves/{epreuve_id}/shards", params={"nb_shards": 1}, headers=donnees.entetes(admin_id, UserRole.ADMIN)
+    )
+
+    assert response.status_code == 200
+    assert _fragments(epreuve_id) == {None: 70}
+    assert _reserver(epreuve_id, 70) == 0
+
+
+def test_fragmentation_reservee_aux_administrateurs(client, donnees):
+    epreuve_id = donnees.epreuve()
+    user_id = donnees.utilisateur()
+
+    response = client.post(
+        f"/api/admin/epreuves/{epreuve_id}/shards", params={"nb_shards": 4}, headers=donnees.entetes(user_id)
+    )
+
+    assert response.status_code == 403
+    assert _fragments(epreuve_id) == {None: 1000}
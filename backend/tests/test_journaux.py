@@ -0,0 +1,34 @@
+# backend/tests/test_journaux.py
+"""Erreurs des threads de fond remontées par le module logging (et non sur stdout)"""
+import logging
+from app.db.requetes_lentes import JournalRequetesLentes
+from app.services.invalidation_bus import InvalidationListener
+
+
+def test_ecriture_du_journal_des_requetes_lentes_impossible(tmp_path, caplog):
+    journal = JournalRequetesLentes(seuil_ms=1, taille=10, fichier=str(tmp_path / "absent" / "lentes.jsonl"))
+
+    with caplog.at_level(logging.WARNING, logger="app.db.requetes_lentes"):
+        journal.enregistrer({"requete": "SELECT 1", "duree_ms": 5})
+        journal.arreter()
+
+    assert journal.stats()["non_ecrites"] == 1
+    (enregistrement,) = caplog.records
+    assert enregistrement.name == "app.db.requetes_lentes"
+    assert "lentes.jsonl" in enregistrement.getMessage()
+
+
+def test_erreur_de_l_ecoute_des_invalidations_journalisee(monkeypatch, caplog):
+    ecoute = InvalidationListener("canal", delai_reconnexion=0)
+
+    def connecter():
+        # Une seule tentative : l'écoute s'arrête pendant la reconnexion
+        ecoute._arret.set()
+        raise ConnectionError("base injoignable")
+
+    monkeypatch.setattr(ecoute, "_connecter", connecter)
+    with caplog.at_level(logging.ERROR, logger="app.services.invalidation_bus"):
+        ecoute._boucle()
+
+    (enregistrement,) = caplog.records
+    assert enregistrement.exc_info[0] is ConnectionError
@@ -0,0 +1,54 @@
+# backend/tests/test_migrations.py
+import io
+import pytest
+from alembic import command
+from sqlalchemy import text
+from app.db.schema import _config_alembic, version_attendue, version_base
+from app.db.session import engine
+
+INDEX_CONCURRENTS = {"ix_ticket_user_id_id", "ix_ticket_clef_achat", "ix_panier_item_user_id_id", "ix_ticketepreuve_epreuve_id"}
+
+
+def _migrer(commande, revision: str, **options):
+    config = _config_alembic()
+    with engine.connect() as connexion:
+        config.attributes["connection"] = connexion
+        commande(config, revision, **options)
+
+
+def _index_valides() -> dict:
+    with engine.connect() as connexion:
+        lignes = connexion.execute(text(
+            "SELECT indexrelid::regclass::text, indisvalid FROM pg_index WHERE indexrelid::regclass::text LIKE 'ix_%'"
+        )).all()
+    return dict(lignes)
+
+
+@pytest.mark.postgres
+def test_index_crees_en_concurrently_et_verrou_libere(client):
+    _migrer(command.downgrade, "0001")
+    assert INDEX_CONCURRENTS.isdisjoint(_index_valides())
+
+    _migrer(command.upgrade, "head")
+
+    index = _index_valides()
+    assert all(index[nom] for nom in INDEX_CONCURRENTS)
+    assert version_base() == version_attendue()
+    # Verrou consultatif de session rendu à la fin de la migration
+    with engine.connect() as connexion:
+        assert connexion.execute(text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'")).scalar() == 0
+
+
+@pytest.mark.postgres
+def test_sql_des_index_concurrents_hors_transaction():
+    config = _config_alembic()
+    config.output_buffer = io.StringIO()
+
+    command.upgrade(config, "0001:0002", sql=True)
+
+    sql = config.output_buffer.getvalue()
+    for nom in INDEX_CONCURRENTS:
+        creation = sql.index(f"INDEX CONCURRENTLY {nom} ")
+        # Dernière instruction de transaction avant la création : un COMMIT
+        assert sql.rfind("COMMIT;", 0, creation) > sql.rfind("BEGIN;", 0, creation)
+    assert "CREATE INDEX ix_epreuve_sport_id ON epreuve (sport_id)" in sql
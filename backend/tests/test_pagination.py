@@ -0,0 +1,114 @@
+# backend/tests/test_pagination.py
+import base64
+import json
+import pytest
+from sqlmodel import Session, select
+from app.api.pagination import EN_TETE_CURSEUR, LIMITE_DEFAUT, LIMITE_MAX, encoder_curseur
+from app.db.session import engine
+from app.models.offer import Offer
+from app.models.sport import Sport
+from app.services.catalog_cache_service import catalog_cache
+
+
+def _parcourir(client, url: str, headers: dict = None, **params) -> list:
+    """Toutes les pages d'une liste, en suivant X-Next-Cursor"""
+    lignes, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= params["limit"]
+        lignes += page
+        cursor = response.headers.get(EN_TETE_CURSEUR)
+        if cursor is None:
+            return lignes
+        assert len(page) == params["limit"]
+
+
+def _ids(modele) -> list:
+    with Session(engine) as session:
+        return sorted(session.exec(select(modele.id)).all())
+
+
+@pytest.mark.parametrize("url, modele, champ", [("/api/sports", Sport, "nom"), ("/offers", Offer, "nom_offre")])
+@pytest.mark.parametrize("colonnes", [False, True])
+def test_parcours_complet_par_curseur(client, donnees, url, modele, champ, colonnes):
+    """Chaque ligne exactement une fois, dans l'ordre des ids, depuis le cache comme depuis la table"""
+    for _ in range(3):
+        donnees.epreuve()
+        donnees.offre()
+    catalog_cache.invalider_catalogue()
+
+    lignes = _parcourir(client, url, limit=2, **({"fields": champ} if colonnes else {}))
+
+    assert [ligne["id"] for ligne in lignes] == _ids(modele)
+    if colonnes:
+        assert all(set(ligne) == {"id", champ} for ligne in lignes)
+
+
+def test_parcours_des_billets_par_curseur(client, donnees):
+    user_id = donnees.utilisateur()
+    epreuve_id, offer_id = donnees.epreuve(), donnees.offre()
+    ticket_ids = donnees.billets(user_id, 5, epreuve_id, offer_id)
+
+    lignes = _parcourir(
+        client, f"/api/tickets/user/{user_id}", headers=donnees.entetes(user_id), limit=2, fields="epreuve_nom"
+    )
+
+    assert [ligne["id"] for ligne in lignes] == ticket_ids
+    # La clé du curseur est toujours renvoyée avec les champs demandés
+    assert all(set(ligne) == {"id", "epreuve_id", "epreuve_nom"} for ligne in lignes)
+
+
+def test_taille_de_page_par_defaut(client, donnees):
+    user_id = donnees.utilisateur()
+    donnees.billets(user_id, LIMITE_DEFAUT + 1, donnees.epreuve(), donnees.offre())
+    url, entetes = f"/api/tickets/user/{user_id}", donnees.entetes(user_id)
+
+    premiere = client.get(url, headers=entetes)
+    assert len(premiere.json()) == LIMITE_DEFAUT
+    derniere = client.get(url, params={"cursor": premiere.headers[EN_TETE_CURSEUR]}, headers=entetes)
+    assert len(derniere.json()) == 1
+    assert EN_TETE_CURSEUR not in derniere.headers
+
+
+def _base64(valeur) -> str:
+    return base64.urlsafe_b64encode(json.dumps(valeur).encode()).decode()
+
+
+@pytest.mark.parametrize("cursor", ["!!!", _base64({"id": 1}), _base64(["1"]), _base64([1, 2]), "e30"])
+def test_curseur_invalide(client, cursor):
+    assert client.get("/api/sports", params={"cursor": cursor}).status_code == 400
+    assert client.get("/api/sports", params={"cursor": cursor, "fields": "nom"}).status_code == 400
+
+
+def test_curseur_d_une_autre_liste_refuse(client, donnees):
+    user_id = donnees.utilisateur()
+
+    # Clé (billet, épreuve) attendue : un curseur de liste du catalogue ne convient pas
+    response = client.get(
+        f"/api/tickets/user/{user_id}", params={"cursor": encoder_curseur(1)}, headers=donnees.entetes(user_id)
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("url", ["/api/sports", "/offers"])
+def test_champ_inconnu(client, url):
+    response = client.get(url, params={"fields": "id,mot_de_passe"})
+
+    assert response.status_code == 400
+    assert "mot_de_passe" in response.json()["detail"]
+
+
+def test_champ_inconnu_des_billets(client, donnees):
+    user_id = donnees.utilisateur()
+
+    response = client.get(f"/api/tickets/user/{user_id}", params={"fields": "epreuve_nom,user_id"}, headers=donnees.entetes(user_id))
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("limit", [0, LIMITE_MAX + 1])
+def test_limite_hors_bornes(client, limit):
+    assert client.get("/api/sports", params={"limit": limit}).status_code == 422
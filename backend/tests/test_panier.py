@@ -0,0 +1,65 @@
+# backend/tests/test_panier.py
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from sqlmodel import Session
+from app.db.session import engine
+from app.models.panier import PanierItem, SeatHold
+from app.services.hold_service import HoldService
+from app.services.inventory_service import InventoryService
+
+
+def _ajouter(client, donnees, user_id: int, epreuve_id: int, offer_id: int, nombre_places=1):
+    return client.post(
+        f"/api/panier/user/{user_id}",
+        params={"epreuve_id": epreuve_id, "offer_id": offer_id, "nombre_places": nombre_places},
+        headers=donnees.entetes(user_id),
+    )
+
+
+def test_panier_sans_fin_de_blocage_une_fois_expire(client, donnees):
+    user_id = donnees.utilisateur()
+    response = _ajouter(client, donnees, user_id, donnees.epreuve(), donnees.offre())
+    assert response.status_code == 200
+
+    panier = client.get(f"/api/panier/user/{user_id}", headers=donnees.entetes(user_id)).json()
+    assert panier[0]["expire_le"] == response.json()["expire_le"]
+
+    # Blocage expiré mais pas encore libéré par le balayeur
+    with Session(engine) as session:
+        session.exec(
+            update(SeatHold)
+            .where(SeatHold.panier_item_id == response.json()["item_id"])
+            .values(expire_le=datetime.utcnow() - timedelta(seconds=1))
+        )
+        session.commit()
+
+    panier = client.get(f"/api/panier/user/{user_id}", headers=donnees.entetes(user_id)).json()
+    assert panier[0]["expire_le"] is None
+
+
+@pytest.mark.parametrize("nombre_places", [0, -5])
+def test_quantite_non_positive_refusee(client, donnees, nombre_places):
+    user_id, epreuve_id = donnees.utilisateur(), donnees.epreuve(places=100)
+
+    response = _ajouter(client, donnees, user_id, epreuve_id, donnees.offre(), nombre_places)
+
+    assert response.status_code == 422
+    # Ni places ajoutées au stock, ni article dans le panier
+    with Session(engine) as session:
+        assert InventoryService.places_disponibles(session, [epreuve_id]) == {epreuve_id: 100}
+    assert client.get(f"/api/panier/user/{user_id}", headers=donnees.entetes(user_id)).json() == []
+
+
+def test_blocage_non_positif_refuse(donnees):
+    user_id, epreuve_id, offer_id = donnees.utilisateur(), donnees.epreuve(places=100), donnees.offre()
+
+    with Session(engine) as session:
+        item = PanierItem(user_id=user_id, epreuve_id=epreuve_id, offer_id=offer_id, nombre_places=1)
+        session.add(item)
+        session.flush()
+        with pytest.raises(ValueError):
+            HoldService.bloquer(session, item, -3)
+        session.rollback()
+
+        assert InventoryService.places_disponibles(session, [epreuve_id]) == {epreuve_id: 100}
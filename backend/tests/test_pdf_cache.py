@@ -0,0 +1,129 @@
+# backend/tests/test_pdf_cache.py
+import os
+import time
+from app.services.pdf_cache_service import PDFCache, etag_correspond, pdf_cache
+
+
+def _pdf(octet: bytes, taille: int = 300) -> bytes:
+    return octet * taille
+
+
+def _vieillir(cache: PDFCache, clef: str, age: float):
+    """Date de dernière lecture du fichier de `clef` reculée de `age` secondes"""
+    horodatage = time.time() - age
+    os.utime(cache._chemin(clef), (horodatage, horodatage))
+
+
+def test_lecture_disque_apres_eviction_memoire(tmp_path):
+    cache = PDFCache(max_octets=500, repertoire=str(tmp_path), max_octets_disque=10_000)
+    cache.put("a" * 64, _pdf(b"a"))
+    # Le second PDF évince le premier du niveau mémoire (600 octets > 500)
+    cache.put("b" * 64, _pdf(b"b"))
+
+    assert cache.get("b" * 64) == _pdf(b"b")
+    assert cache.get("a" * 64) == _pdf(b"a")
+    assert cache.get("c" * 64) is None
+
+    stats = cache.stats()
+    assert (stats["hits_disque"], stats["hits_memoire"], stats["misses"]) == (1, 1, 1)
+
+
+def test_cache_disque_borne_elague_les_moins_recemment_servis(tmp_path):
+    cache = PDFCache(max_octets=10_000, repertoire=str(tmp_path), max_octets_disque=1000)
+    for age, octet in ((30, b"a"), (20, b"b"), (10, b"c")):
+        cache.put(octet.decode() * 64, _pdf(octet))
+        _vieillir(cache, octet.decode() * 64, age)
+
+    # Le plus ancien est relu depuis le disque : il redevient le plus récent
+    cache.vider_memoire()
+    assert cache.get("a" * 64) == _pdf(b"a")
+
+    # 1200 octets > 1000 : retour sous 900 en supprimant le moins récemment servi ("b")
+    cache.put("d" * 64, _pdf(b"d"))
+
+    presents = {clef for clef in ("a", "b", "c", "d") if os.path.exists(cache._chemin(clef * 64))}
+    assert presents == {"a", "c", "d"}
+    stats = cache.stats()
+    assert (stats["octets_disque"], stats["fichiers_elagues"]) == (900, 1)
+
+
+def test_cache_disque_mesure_les_fichiers_existants(tmp_path):
+    """Fichiers laissés par un redémarrage ou un autre worker : comptés dès la première écriture"""
+    ancien = PDFCache(max_octets=10_000, repertoire=str(tmp_path), max_octets_disque=10_000)
+    for octet in (b"a", b"b", b"c"):
+        ancien.put(octet.decode() * 64, _pdf(octet))
+        _vieillir(ancien, octet.decode() * 64, 100)
+
+    cache = PDFCache(max_octets=10_000, repertoire=str(tmp_path), max_octets_disque=1000)
+    cache.put("d" * 64, _pdf(b"d"))
+
+    assert cache.stats()["octets_disque"] <= 900
+    assert os.path.exists(cache._chemin("d" * 64))
+
+
+def test_etag_correspond():
+    etag = '"abc"'
+
+    assert etag_correspond('"abc"', etag)
+    assert etag_correspond('W/"abc"', etag)
+    assert etag_correspond('"xyz", "abc"', etag)
+    assert etag_correspond("*", etag)
+    assert not etag_correspond('"xyz"', etag)
+    assert not etag_correspond(None, etag)
+
+
+def _telecharger(client, donnees, ticket_id: int, user_id: int, **entetes):
+    return client.get(f"/api/tickets/{ticket_id}/download-pdf", headers={**donnees.entetes(user_id), **entetes})
+
+
+def test_telechargement_repete_meme_etag_fort(client, donnees):
+    user_id = donnees.utilisateur()
+    (ticket_id,) = donnees.billets(user_id, 1, donnees.epreuve(), donnees.offre())
+
+    premier = _telecharger(client, donnees, ticket_id, user_id)
+    hits = pdf_cache.stats()["hits_memoire"]
+    second = _telecharger(client, donnees, ticket_id, user_id)
+
+    assert premier.status_code == second.status_code == 200
+    assert premier.headers["content-type"] == "application/pdf"
+    assert premier.content.startswith(b"%PDF")
+    etag = premier.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert second.headers["etag"] == etag
+    assert second.content == premier.content
+    # Second téléchargement servi par le cache, sans nouveau rendu
+    assert pdf_cache.stats()["hits_memoire"] == hits + 1
+
+
+def test_if_none_match_repond_304(client, donnees):
+    user_id = donnees.utilisateur()
+    (ticket_id,) = donnees.billets(user_id, 1, donnees.epreuve(), donnees.offre())
+    etag = _telecharger(client, donnees, ticket_id, user_id).headers["etag"]
+
+    response = _telecharger(client, donnees, ticket_id, user_id, **{"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert _telecharger(client, donnees, ticket_id, user_id, **{"If-None-Match": '"autre"'}).status_code == 200
+
+
+def test_telechargement_lu_sur_disque_apres_eviction_memoire(client, donnees):
+    user_id = donnees.utilisateur()
+    (ticket_id,) = donnees.billets(user_id, 1, donnees.epreuve(), donnees.offre())
+    premier = _telecharger(client, donnees, ticket_id, user_id)
+
+    pdf_cache.vider_memoire()
+    hits = pdf_cache.stats()["hits_disque"]
+    second = _telecharger(client, donnees, ticket_id, user_id)
+
+    assert second.status_code == 200
+    assert second.content == premier.content
+    assert pdf_cache.stats()["hits_disque"] == hits + 1
+
+
+def test_pdf_d_un_autre_utilisateur_introuvable(client, donnees):
+    user_id, autre_id = donnees.utilisateur(), donnees.utilisateur()
+    (ticket_id,) = donnees.billets(user_id, 1, donnees.epreuve(), donnees.offre())
+
+    assert _telecharger(client, donnees, ticket_id, autre_id).status_code == 404
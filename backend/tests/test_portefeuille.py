@@ -0,0 +1,145 @@
+# backend/tests/test_portefeuille.py
+"""
+Portefeuille PDF (GET /api/tickets/user/{id}/wallet-pdf).
+
+FluxPDFCanvas écrit le PDF à la main à partir d'objets reportlab : le flux
+est relu ici objet par objet (table xref, trailer, arbre des pages, contenu
+de chaque page) pour qu'une mise à jour de reportlab qui le casserait fasse
+échouer les tests.
+"""
+import re
+import zlib
+from sqlmodel import Session, select
+from app.db.session import engine
+from app.models.ticket import Ticket
+from app.services.pdf_executor import pdf_render_pool
+
+
+def _objets(contenu: bytes) -> tuple:
+    """Vérifie la table xref et le trailer ; retourne ({numéro: corps de l'objet}, numéro du catalogue)"""
+    assert contenu.startswith(b"%PDF-1.4\n")
+    debut_xref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", contenu).group(1))
+    entete = re.match(rb"xref\n0 (\d+)\n", contenu[debut_xref:])
+    assert entete, "startxref ne pointe pas sur la table xref"
+    taille = int(entete.group(1))
+
+    # Entrées de 20 octets : offset sur 10 chiffres, génération sur 5, type
+    table = contenu[debut_xref + entete.end():debut_xref + entete.end() + 20 * taille]
+    entrees = [table[i:i + 20] for i in range(0, len(table), 20)]
+    assert entrees[0] == b"0000000000 65535 f \n"
+
+    objets = {}
+    for numero, entree in enumerate(entrees[1:], start=1):
+        offset, generation, type_entree = int(entree[:10]), entree[11:16], entree[17:18]
+        assert (generation, type_entree) == (b"00000", b"n")
+        assert contenu.startswith(b"%d 0 obj\n" % numero, offset), f"offset de l'objet {numero} invalide"
+        fin = contenu.index(b"endobj\n", offset)
+        objets[numero] = contenu[offset:fin]
+
+    trailer = re.search(rb"trailer\n<< /Size (\d+) /Root (\d+) 0 R >>", contenu[debut_xref:])
+    assert int(trailer.group(1)) == taille
+    return objets, int(trailer.group(2))
+
+
+def _flux(objet: bytes) -> bytes:
+    longueur = int(re.search(rb"/Length (\d+)", objet).group(1))
+    debut = objet.index(b"stream\n") + len(b"stream\n")
+    assert objet[debut + longueur:].startswith(b"\nendstream")
+    return objet[debut:debut + longueur]
+
+
+def _pages(contenu: bytes) -> list:
+    """Code de dessin décompressé de chaque page, dans l'ordre de l'arbre des pages"""
+    objets, catalogue = _objets(contenu)
+    assert b"/Type /Catalog" in objets[catalogue]
+    arbre = objets[int(re.search(rb"/Pages (\d+) 0 R", objets[catalogue]).group(1))]
+    kids = [int(n) for n in re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[([^\]]*)\]", arbre).group(1))]
+    assert int(re.search(rb"/Count (\d+)", arbre).group(1)) == len(kids)
+
+    pages = []
+    for kid in kids:
+        page = objets[kid]
+        assert b"/Type /Page " in page
+        # Parent, contenu, polices et XObjects (gabarit, QR code) référencés par la page existent
+        for reference in re.findall(rb"(\d+) 0 R", page):
+            assert int(reference) in objets
+        contenu_page = objets[int(re.search(rb"/Contents (\d+) 0 R", page).group(1))]
+        pages.append(zlib.decompress(_flux(contenu_page)))
+    return pages
+
+
+def _clefs(ticket_ids: list) -> list:
+    with Session(engine) as session:
+        clefs = dict(session.exec(select(Ticket.id, Ticket.clef_achat).where(Ticket.id.in_(ticket_ids))).all())
+    return [clefs[ticket_id] for ticket_id in ticket_ids]
+
+
+def _portefeuille(client, donnees, user_id: int, **params):
+    return client.get(f"/api/tickets/user/{user_id}/wallet-pdf", params=params, headers=donnees.entetes(user_id))
+
+
+def test_une_page_par_billet(client, donnees):
+    user_id = donnees.utilisateur()
+    ticket_ids = donnees.billets(user_id, 3, donnees.epreuve(), donnees.offre())
+    en_cours = pdf_render_pool.en_cours
+
+    response = _portefeuille(client, donnees, user_id)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    pages = _pages(response.content)
+    assert len(pages) == 3
+    for page, clef in zip(pages, _clefs(ticket_ids)):
+        assert b"(Cle d'acces: %s) Tj" % clef.encode() in page
+        # Le gabarit commun et le QR code sont dessinés sur chaque page
+        assert page.count(b" Do") >= 2
+    # Place de la file des PDF rendue à la fin du flux
+    assert pdf_render_pool.en_cours == en_cours
+
+
+def test_selection_limitee_aux_billets_du_titulaire(client, donnees):
+    user_id, autre_id = donnees.utilisateur(), donnees.utilisateur()
+    epreuve_id, offer_id = donnees.epreuve(), donnees.offre()
+    mes_billets = donnees.billets(user_id, 3, epreuve_id, offer_id)
+    autres_billets = donnees.billets(autre_id, 2, epreuve_id, offer_id)
+
+    response = _portefeuille(client, donnees, user_id, ticket_ids=[mes_billets[2], autres_billets[0], mes_billets[0]])
+
+    assert response.status_code == 200
+    pages = _pages(response.content)
+    assert len(pages) == 2
+    for page, clef in zip(pages, _clefs([mes_billets[0], mes_billets[2]])):
+        assert clef.encode() in page
+
+    # Uniquement des billets d'un autre : rien à générer
+    assert _portefeuille(client, donnees, user_id, ticket_ids=autres_billets).status_code == 404
+
+
+def test_portefeuille_d_un_autre_utilisateur_refuse(client, donnees):
+    user_id, autre_id = donnees.utilisateur(), donnees.utilisateur()
+    donnees.billets(autre_id, 1, donnees.epreuve(), donnees.offre())
+
+    response = client.get(f"/api/tickets/user/{autre_id}/wallet-pdf", headers=donnees.entetes(user_id))
+
+    assert response.status_code == 403
+
+
+def test_trop_de_billets(client, donnees, monkeypatch):
+    monkeypatch.setattr("app.api.routes.tickets.PDF_WALLET_MAX_TICKETS", 3)
+    user_id = donnees.utilisateur()
+    ticket_ids = donnees.billets(user_id, 4, donnees.epreuve(), donnees.offre())
+
+    assert _portefeuille(client, donnees, user_id).status_code == 413
+    assert _portefeuille(client, donnees, user_id, ticket_ids=ticket_ids).status_code == 413
+    assert _portefeuille(client, donnees, user_id, ticket_ids=ticket_ids[:3]).status_code == 200
+
+
+def test_file_des_pdf_pleine(client, donnees, monkeypatch):
+    user_id = donnees.utilisateur()
+    donnees.billets(user_id, 1, donnees.epreuve(), donnees.offre())
+    monkeypatch.setattr(pdf_render_pool, "max_en_attente", pdf_render_pool.en_cours)
+
+    response = _portefeuille(client, donnees, user_id)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
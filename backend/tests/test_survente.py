@@ -0,0 +1,118 @@
+# backend/tests/test_survente.py
+"""
+Pas de survente quand des centaines d'acheteurs se disputent une même finale.
+
+Chaque acheteur passe par les vraies routes : ajout au panier (blocage des
+places) puis validation (CheckoutService.valider_panier). Un acheteur sur
+trois laisse expirer son blocage pendant que le libérateur tourne : sa
+validation doit alors réserver à nouveau des places, en concurrence avec les
+autres. Sur Postgres uniquement : SQLite sérialise toutes les écritures et
+ne dirait rien des UPDATE conditionnels concurrents.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from sqlmodel import Session, func, select
+from app.db.session import engine
+from app.models.panier import SeatHold
+from app.models.sport import TicketEpreuve
+from app.models.ticket import Ticket
+from app.services.hold_service import liberer_holds_expires
+from app.services.inventory_service import InventoryService
+
+STOCK = 200
+ACHETEURS = 300
+# Requêtes HTTP en vol en même temps : bien au-delà du pool, comme un serveur à l'ouverture des ventes
+REQUETES_SIMULTANEES = 100
+
+
+def _expirer_blocage(item_id: int):
+    with Session(engine) as session:
+        session.exec(
+            update(SeatHold)
+            .where(SeatHold.panier_item_id == item_id)
+            .values(expire_le=datetime.utcnow() - timedelta(seconds=1))
+        )
+        session.commit()
+
+
+def _acheter(client, donnees, user_id: int, epreuve_id: int, offer_id: int, rang: int) -> str:
+    """
+    Un acheteur : ajout au panier puis validation. Retourne "ok", "complet"
+    (refusé à l'ajout), "epuise" (refusé à la validation) ou le code d'erreur.
+    """
+    entetes = donnees.entetes(user_id)
+    response = client.post(
+        f"/api/panier/user/{user_id}",
+        params={"epreuve_id": epreuve_id, "offer_id": offer_id, "nombre_places": 1 + rang % 2},
+        headers=entetes,
+    )
+    if response.status_code == 400:
+        return "complet"
+    if response.status_code != 200:
+        return str(response.status_code)
+    if rang % 3 == 0:
+        _expirer_blocage(response.json()["item_id"])
+
+    response = client.post(f"/api/panier/user/{user_id}/valider", headers=entetes)
+    if response.status_code == 400:
+        return "epuise"
+    return "ok" if response.status_code == 200 else str(response.status_code)
+
+
+@pytest.mark.postgres
+@pytest.mark.parametrize("nb_shards", [1, 4])
+def test_centaines_acheteurs_sans_survente(client, donnees, nb_shards):
+    epreuve_id, offer_id = donnees.epreuve(places=STOCK), donnees.offre()
+    if nb_shards > 1:
+        with Session(engine) as session:
+            InventoryService.configurer_shards(session, epreuve_id, nb_shards)
+            session.commit()
+    acheteurs = [donnees.utilisateur() for _ in range(ACHETEURS)]
+
+    # Le libérateur tourne en continu pendant les achats
+    fin = threading.Event()
+
+    def liberer():
+        while not fin.wait(0.05):
+            liberer_holds_expires()
+
+    liberateur = threading.Thread(target=liberer)
+    liberateur.start()
+    try:
+        with ThreadPoolExecutor(max_workers=REQUETES_SIMULTANEES) as pool:
+            resultats = list(pool.map(
+                lambda rang: _acheter(client, donnees, acheteurs[rang], epreuve_id, offer_id, rang),
+                range(ACHETEURS),
+            ))
+    finally:
+        fin.set()
+        liberateur.join()
+    liberer_holds_expires()
+
+    with Session(engine) as session:
+        vendues = session.exec(
+            select(func.coalesce(func.sum(TicketEpreuve.nombre_places), 0)).where(TicketEpreuve.epreuve_id == epreuve_id)
+        ).one()
+        billets = session.exec(
+            select(func.count(Ticket.id)).where(Ticket.user_id.in_(acheteurs))
+        ).one()
+        bloquees = session.exec(
+            select(func.coalesce(func.sum(SeatHold.places), 0)).where(SeatHold.epreuve_id == epreuve_id)
+        ).one()
+        restantes = InventoryService.places_disponibles(session, [epreuve_id])[epreuve_id]
+
+    assert set(resultats) <= {"ok", "complet", "epuise"}
+    # Un blocage encore actif garantit la vente : seule une validation après expiration peut échouer
+    assert all(rang % 3 == 0 for rang, resultat in enumerate(resultats) if resultat == "epuise")
+    # Demande (450 places) supérieure au stock : des acheteurs ont été refusés
+    assert "complet" in resultats
+    assert billets == resultats.count("ok")
+    assert vendues == sum(1 + rang % 2 for rang, resultat in enumerate(resultats) if resultat == "ok")
+    assert vendues <= STOCK
+    assert restantes >= 0
+    # Blocages consommés par la validation ou libérés : chaque place est vendue ou encore en vente
+    assert bloquees == 0
+    assert vendues + restantes == STOCK
@@ -14,12 +14,83 @@ const api = axios.create({
 // Log pour vérifier quelle URL est utilisée
 console.log('🔧 API Base URL:', API_BASE_URL);
 
+// Juste après un achat, les lectures doivent voir nos propres écritures :
+// le backend les sert alors depuis la base principale plutôt que la réplique
+const READ_YOUR_WRITES_MS = 10000;
+let derniereEcriture = 0;
+
+api.interceptors.request.use((config) => {
+  if (Date.now() - derniereEcriture < READ_YOUR_WRITES_MS) {
+    config.headers['X-Read-Your-Writes'] = '1';
+  }
+  // Jeton d'accès signé : le backend authentifie la requête sans relire l'utilisateur en base
+  const token = localStorage.getItem('token');
+  if (token) {
+    config.headers['Authorization'] = `Bearer ${token}`;
+  }
+  return config;
+});
+
+const enregistrerTokens = (data) => {
+  localStorage.setItem('token', data.access_token);
+  localStorage.setItem('refresh_token', data.refresh_token);
+};
+
+const supprimerTokens = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
+};
+
+// Jeton d'accès expiré (401) : un seul rafraîchissement à la fois, puis la requête est rejouée
+let rafraichissementEnCours = null;
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const requete = error.config;
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!error.response || error.response.status !== 401 || !refreshToken
+        || requete._dejaRejouee || requete.url === '/api/auth/refresh') {
+      return Promise.reject(error);
+    }
+
+    try {
+      if (!rafraichissementEnCours) {
+        rafraichissementEnCours = api.post('/api/auth/refresh', null, {
+          params: { refresh_token: refreshToken }
+        }).finally(() => { rafraichissementEnCours = null; });
+      }
+      const response = await rafraichissementEnCours;
+      enregistrerTokens(response.data);
+    } catch (erreurRafraichissement) {
+      // Session expirée : il faut se reconnecter
+      supprimerTokens();
+      localStorage.removeItem('user');
+      return Promise.reject(error);
+    }
+
+    requete._dejaRejouee = true;
+    return api(requete);
+  }
+);
+
+// Listes paginées par le backend (50 lignes par défaut) : on suit l'en-tête X-Next-Cursor
+const lireToutesLesPages = async (url) => {
+  const lignes = [];
+  let cursor;
+  do {
+    const response = await api.get(url, { params: { limit: 200, cursor } });
+    lignes.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return lignes;
+};
+
 // ==================== OFFERS ====================
 
 export const getOffers = async () => {
   try {
-    const response = await api.get('/offers');
-    return response.data;
+    return await lireToutesLesPages('/offers');
   } catch (error) {
     console.error("Erreur lors de la récupération des offres:", error);
     throw error;
@@ -59,10 +130,13 @@ export const authAPI = {
       
       console.log('✅ User.id trouvé:', response.data.id);
       
-      localStorage.setItem('user', JSON.stringify(response.data));
-      console.log('✅ User sauvegardé dans localStorage:', response.data);
+      // Les jetons sont stockés à part, l'objet user reste celui affiché par l'interface
+      const { access_token, refresh_token, token_type, expires_in, ...user } = response.data;
+      enregistrerTokens(response.data);
+      localStorage.setItem('user', JSON.stringify(user));
+      console.log('✅ User sauvegardé dans localStorage:', user);
       
-      return response.data;
+      return user;
     } catch (error) {
       console.error("❌ Erreur lors de la connexion:", error);
       if (error.response) {
@@ -74,6 +148,7 @@ export const authAPI = {
   
   logout: () => {
     localStorage.removeItem('user');
+    supprimerTokens();
     console.log('✅ Déconnexion - User supprimé de localStorage');
   },
   
@@ -108,8 +183,7 @@ export const authAPI = {
 export const sportsAPI = {
   getAll: async () => {
     try {
-      const response = await api.get('/api/sports');
-      return response.data;
+      return await lireToutesLesPages('/api/sports');
     } catch (error) {
       console.error("Erreur lors de la récupération des sports:", error);
       throw error;
@@ -139,9 +213,9 @@ export const billetsAPI = {
         throw new Error('User ID invalide');
       }
       
-      const response = await api.get(`/api/tickets/user/${userId}`);
-      console.log('✅ Billets récupérés:', response.data);
-      return response.data;
+      const billets = await lireToutesLesPages(`/api/tickets/user/${userId}`);
+      console.log('✅ Billets récupérés:', billets);
+      return billets;
     } catch (error) {
       console.error("❌ Erreur lors de la récupération des billets:", error);
       throw error;
@@ -252,6 +326,7 @@ export const panierAPI = {
       }
       
       const response = await api.post(`/api/panier/user/${userId}/valider`);
+      derniereEcriture = Date.now();
       console.log('✅ Validation réussie:', response.data);
       return response.data;
     } catch (error) {